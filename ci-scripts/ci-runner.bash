@@ -148,6 +148,8 @@ if [ $CI_GENERIC -eq 1 ]; then
                  -W=error::reframe.core.exceptions.ReframeDeprecationWarning -ra
     checked_exec ! ./bin/reframe.py --system=generic -l 2>&1 | \
         grep -- '--- Logging error ---'
+    checked_exec ./ci-scripts/importtime.py --forbid=reframe.core.pipeline
+    checked_exec ./ci-scripts/gentestcases.py --max-time=2
 elif [ $CI_TUTORIAL -eq 1 ]; then
     # Run tutorial checks
     # Find modified or added tutorial checks
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+#
+# Copyright 2016-2020 Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+#
+# Test case generation benchmark
+#
+
+import os
+import sys
+
+PREFIX = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+)
+sys.path = [PREFIX, os.path.join(PREFIX, 'external')] + sys.path
+
+import argparse                                    # noqa: F401, F403
+import resource                                    # noqa: F401, F403
+import time                                        # noqa: F401, F403
+
+import reframe as rfm                              # noqa: F401, F403
+import reframe.core.config as config               # noqa: F401, F403
+import reframe.core.runtime as rt                  # noqa: F401, F403
+import reframe.frontend.dependency as dependency   # noqa: F401, F403
+import reframe.frontend.executors as executors     # noqa: F401, F403
+
+
+class _BenchmarkTest(rfm.RunOnlyRegressionTest):
+    def __init__(self, i):
+        self.name = f'benchmark_test_{i}'
+        self.valid_systems = ['*']
+        self.valid_prog_environs = ['*']
+        self.executable = 'true'
+
+
+def _maxrss():
+    '''Return the peak resident set size of this process in MiB.'''
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure the time it takes to generate and sort the '
+                    'test cases of a number of tests'
+    )
+    parser.add_argument('-n', '--num-tests', type=int, default=1500,
+                        help='generate the test cases of N tests '
+                             '(default: %(default)s)')
+    parser.add_argument('-C', '--config-file',
+                        default=os.path.join(PREFIX, 'unittests', 'resources',
+                                             'settings.py'),
+                        help='the configuration file to use '
+                             '(default: %(default)s)')
+    parser.add_argument('--system', default='sys0',
+                        help='the system to generate the test cases for '
+                             '(default: %(default)s)')
+    parser.add_argument('--max-time', type=float, metavar='S',
+                        help='fail if generating the test cases takes longer '
+                             'than S seconds')
+    options = parser.parse_args()
+
+    site_config = config.load_config(options.config_file)
+    site_config.select_subconfig(options.system)
+    rt.init_runtime(site_config)
+
+    checks = [_BenchmarkTest(i) for i in range(options.num_tests)]
+    rss_start = _maxrss()
+    t_start = time.time()
+    cases = executors.generate_testcases(checks)
+    t_generated = time.time()
+    graph = dependency.build_deps(cases)
+    dependency.validate_deps(graph)
+    dependency.toposort(graph)
+    t_sorted = time.time()
+    rss_extra = _maxrss() - rss_start
+    print(f'{len(cases)} test cases of {len(checks)} tests '
+          f'on {options.system!r}')
+    print(f'generate: {t_generated - t_start:.2f} s')
+    print(f'build and sort dependencies: {t_sorted - t_generated:.2f} s')
+    print(f'extra peak RSS: {rss_extra:.1f} MiB')
+
+    total = t_sorted - t_start
+    if options.max_time is not None and total > options.max_time:
+        sys.stderr.write(f'{sys.argv[0]}: generating the test cases took '
+                         f'longer than {options.max_time} s\n')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+#
+# Copyright 2016-2020 Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+#
+# Import time benchmark based on `python -X importtime'
+#
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+
+PREFIX = os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+)
+
+
+def import_times(module):
+    '''Import ``module`` in a fresh interpreter and return the self and
+    cumulative import times in us of all the modules imported.'''
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [PREFIX] + [p for p in [env.get('PYTHONPATH')] if p]
+    )
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, env=env, check=True
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)',
+                         line)
+        if match:
+            times[match.group(4)] = (int(match.group(1)),
+                                     int(match.group(2)))
+
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure the time it takes to import a module'
+    )
+    parser.add_argument('module', nargs='?', default='reframe',
+                        help='the module to import (default: %(default)s)')
+    parser.add_argument('-n', '--repeat', type=int, default=5,
+                        help='import the module N times and report the '
+                             'fastest one (default: %(default)s)')
+    parser.add_argument('-t', '--top', type=int, default=10,
+                        help='list the N modules with the highest self '
+                             'import time (default: %(default)s)')
+    parser.add_argument('--max-time', type=float, metavar='MS',
+                        help='fail if the module takes longer than MS '
+                             'milliseconds to import')
+    parser.add_argument('--forbid', action='append', default=[],
+                        metavar='MODULE',
+                        help='fail if MODULE is imported as well')
+    options = parser.parse_args()
+
+    try:
+        runs = [import_times(options.module) for _ in range(options.repeat)]
+    except subprocess.CalledProcessError as e:
+        sys.stderr.write(f'{sys.argv[0]}: could not import '
+                         f'{options.module!r}:\n{e.stderr}')
+        sys.exit(1)
+
+    times = min(runs, key=lambda t: t[options.module][1])
+    total = times[options.module][1] / 1000
+    print(f'import {options.module}: {total:.2f} ms '
+          f'(best of {options.repeat})')
+    print(f'{"self [ms]":>10} {"cumulative [ms]":>16}  module')
+    for name, (self_time, cumul_time) in sorted(
+        times.items(), key=lambda t: t[1][0], reverse=True
+    )[:options.top]:
+        print(f'{self_time/1000:>10.2f} {cumul_time/1000:>16.2f}  {name}')
+
+    failed = False
+    if options.max_time is not None and total > options.max_time:
+        sys.stderr.write(f'{sys.argv[0]}: importing {options.module!r} '
+                         f'took longer than {options.max_time} ms\n')
+        failed = True
+
+    for name in options.forbid:
+        if name in times:
+            sys.stderr.write(f'{sys.argv[0]}: importing {options.module!r} '
+                             f'imports also {name!r}\n')
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,7 +5,10 @@
 
 import os
 import sys
+import time
 
+# The time that ReFrame started to be imported
+IMPORT_TIME = time.time()
 
 VERSION = '3.2-dev0'
 INSTALL_PREFIX = os.path.normpath(
@@ -22,6 +25,44 @@ if sys.version_info[:3] < MIN_PYTHON_VERSION:
 os.environ['RFM_INSTALL_PREFIX'] = INSTALL_PREFIX
 
 
-# Import important names for user tests
-from reframe.core.pipeline import *     # noqa: F401, F403
-from reframe.core.decorators import *   # noqa: F401, F403
+# Important names for user tests; these are imported lazily on first access,
+# so that importing ReFrame does not pull in the whole framework
+_LAZY_NAMES = {
+    'reframe.core.pipeline': [
+        'CompileOnlyRegressionTest', 'RegressionTest', 'RunOnlyRegressionTest',
+        'DEPEND_BY_ENV', 'DEPEND_EXACT', 'DEPEND_FULLY', 'final'
+    ],
+    'reframe.core.decorators': [
+        'parameterized_test', 'simple_test', 'required_version',
+        'require_deps', 'run_before', 'run_after'
+    ]
+}
+_LAZY_MODULES = {name: modname
+                 for modname, names in _LAZY_NAMES.items() for name in names}
+__all__ = ['VERSION', 'INSTALL_PREFIX', 'MIN_PYTHON_VERSION',
+           *_LAZY_MODULES.keys()]
+
+
+if sys.version_info[:2] < (3, 7):
+    # Module-level __getattr__() is not supported
+    from reframe.core.pipeline import *     # noqa: F401, F403
+    from reframe.core.decorators import *   # noqa: F401, F403
+else:
+    def __getattr__(name):
+        try:
+            modname = _LAZY_MODULES[name]
+        except KeyError:
+            raise AttributeError(
+                f'module {__name__!r} has no attribute {name!r}'
+            ) from None
+
+        import importlib
+
+        value = getattr(importlib.import_module(modname), name)
+
+        # Cache the name, so that __getattr__() is not called again for it
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted({*globals().keys(), *_LAZY_MODULES.keys()})
@@ -42,12 +42,17 @@ def _register_backend(name, local=False, *, backend_type):
 
 
 def _get_backend(name, *, backend_type):
+    registry = globals()[f'_{backend_type}s']
     backend_modules = globals()[f'_{backend_type}_backend_modules']
-    for mod in backend_modules:
-        importlib.import_module(mod)
+
+    # Import the backend modules on demand, until the requested backend is
+    # registered; the modules imported once are not looked up again
+    while name not in registry and backend_modules:
+        importlib.import_module(backend_modules[0])
+        backend_modules.pop(0)
 
     try:
-        return globals()[f'_{backend_type}s'][name]
+        return registry[name]
     except KeyError:
         raise ConfigError(f"no such {backend_type}: '{name}'")
 
@@ -0,0 +1,121 @@
+# Copyright 2016-2020 Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+#
+# Content-addressed cache of build artifacts
+#
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+import reframe.utility.os_ext as os_ext
+from reframe.core.logging import getlogger
+
+
+def _hash_tree(hasher, path):
+    for dirpath, dirnames, filenames in os.walk(path):
+        # Walk the tree in a deterministic order
+        dirnames.sort()
+        for name in sorted(filenames):
+            filename = os.path.join(dirpath, name)
+            hasher.update(os.path.relpath(filename, path).encode())
+            if os.path.islink(filename):
+                hasher.update(os.readlink(filename).encode())
+                continue
+
+            with open(filename, 'rb') as fp:
+                for chunk in iter(lambda: fp.read(1 << 20), b''):
+                    hasher.update(chunk)
+
+
+class BuildCache:
+    '''A cache of test stage directories after a successful build.
+
+    Every cache entry is identified by a key computed from the staged sources,
+    the build commands, the build environments, the modules they resolve to
+    and the partition the test is built for.
+
+    :arg prefix: The directory where the cache entries are stored.
+    '''
+
+    def __init__(self, prefix):
+        self._prefix = os.path.abspath(prefix)
+
+    @property
+    def prefix(self):
+        return self._prefix
+
+    def key(self, stagedir, build_commands, environs, partition,
+            modules_system=None):
+        '''Compute the cache key of a build.
+
+        If ``modules_system`` is given, the modules of ``environs`` are
+        resolved through its module mappings and the resolved modules are
+        hashed together with the name, the version and the search path of the
+        modules system as well as the currently loaded modules. The default
+        version of a module that is loaded without a version is not queried;
+        it is covered by the module search path only.
+        '''
+        hasher = hashlib.sha256()
+        _hash_tree(hasher, stagedir)
+        for cmd in build_commands:
+            hasher.update(cmd.encode())
+
+        for e in environs:
+            hasher.update(type(e).__name__.encode())
+            hasher.update(repr(sorted(vars(e).items())).encode())
+            if modules_system is not None:
+                for m in e.modules:
+                    resolved = modules_system.resolve_module(m)
+                    hasher.update(repr(resolved).encode())
+
+        if modules_system is not None:
+            hasher.update(modules_system.name.encode())
+            hasher.update(str(modules_system.version).encode())
+            hasher.update(repr(modules_system.searchpath).encode())
+            hasher.update(repr(modules_system.loaded_modules()).encode())
+
+        hasher.update(partition.fullname.encode())
+        return hasher.hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self._prefix, key)
+
+    def restore(self, key, stagedir):
+        '''Restore the build artifacts of the entry ``key`` into ``stagedir``.
+
+        :returns: :class:`True` if ``key`` was found in the cache,
+            :class:`False` otherwise.
+        '''
+        entry = self._entry(key)
+        if not os.path.isdir(entry):
+            return False
+
+        getlogger().debug(f'restoring build artifacts from {entry!r}')
+        os_ext.copytree(entry, stagedir, symlinks=True, dirs_exist_ok=True)
+        return True
+
+    def store(self, key, stagedir):
+        '''Store the contents of ``stagedir`` in the cache under ``key``.'''
+        entry = self._entry(key)
+        if os.path.exists(entry):
+            return
+
+        # Populate a temporary entry first and move it in place atomically,
+        # so that concurrent sessions never see a partially written entry
+        os.makedirs(self._prefix, exist_ok=True)
+        tmpdir = tempfile.mkdtemp(prefix='.tmp', dir=self._prefix)
+        try:
+            os_ext.copytree(stagedir, tmpdir, symlinks=True,
+                            dirs_exist_ok=True)
+            os.rename(tmpdir, entry)
+        except OSError:
+            # Another session may have stored this entry in the meantime
+            getlogger().debug(f'could not store build cache entry {entry!r}')
+            shutil.rmtree(tmpdir, ignore_errors=True)
+        else:
+            getlogger().debug(f'stored build artifacts in {entry!r}')
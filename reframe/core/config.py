@@ -5,6 +5,8 @@
 
 import copy
 import fnmatch
+import functools
+import hashlib
 import itertools
 import json
 import jsonschema
@@ -40,6 +42,39 @@ def _match_option(opt, opt_map):
     raise KeyError(opt)
 
 
+@functools.lru_cache(maxsize=None)
+def _compile_option(option):
+    '''Split an option path to its components converting any indices to
+    integers.
+
+    :returns: :class:`None` if the option is not valid.
+    '''
+
+    # Options may not start with a slash
+    if not option or option[0] == '/':
+        return None
+
+    # Remove trailing /
+    if option[-1] == '/':
+        option = option[:-1]
+
+    # Convert any indices to integers
+    prepared_option = []
+    for opt in option.split('/'):
+        try:
+            opt = int(opt)
+        except ValueError:
+            pass
+
+        prepared_option.append(opt)
+
+    return tuple(prepared_option)
+
+
+# Value returned from the lookups of options that are not found
+_NOT_FOUND = object()
+
+
 class _SiteConfig:
     def __init__(self, site_config, filename):
         self._site_config = copy.deepcopy(site_config)
@@ -48,6 +83,13 @@ class _SiteConfig:
         self._local_system = None
         self._sticky_options = {}
 
+        # Local configurations indexed by the system they were selected for
+        self._subconfigs = {}
+
+        # Values of the retrieved options indexed by the selected system and
+        # the option
+        self._option_cache = {}
+
         # Open and store the JSON schema for later validation
         schema_filename = os.path.join(reframe.INSTALL_PREFIX, 'reframe',
                                        'schemas', 'config.json')
@@ -83,9 +125,11 @@ class _SiteConfig:
 
     def add_sticky_option(self, option, value):
         self._sticky_options[option] = value
+        self._option_cache.clear()
 
     def remove_sticky_option(self, option):
         self._sticky_options.pop(option, None)
+        self._option_cache.clear()
 
     def get(self, option, default=None):
         '''Retrieve value of option.
@@ -93,23 +137,21 @@ class _SiteConfig:
         If the option cannot be retrieved, ``default`` will be returned.
         '''
 
-        # Options may not start with a slash
-        if not option or option[0] == '/':
-            return default
-
-        # Remove trailing /
-        if option[-1] == '/':
-            option = option[:-1]
+        # The configuration does not change, so the option lookups are
+        # memoized for every selected system
+        key = (self._local_system if self._local_config else None, option)
+        try:
+            value = self._option_cache[key]
+        except KeyError:
+            value = self._get(option)
+            self._option_cache[key] = value
 
-        # Convert any indices to integers
-        prepared_option = []
-        for opt in option.split('/'):
-            try:
-                opt = int(opt)
-            except ValueError:
-                pass
+        return default if value is _NOT_FOUND else value
 
-            prepared_option.append(opt)
+    def _get(self, option):
+        prepared_option = _compile_option(option)
+        if prepared_option is None:
+            return _NOT_FOUND
 
         # Walk through the option path constructing a default key at the same
         # time for looking it up in the defaults or the sticky options
@@ -169,7 +211,7 @@ class _SiteConfig:
             try:
                 return _match_option(default_key, self._schema['defaults'])
             except KeyError:
-                return default
+                return _NOT_FOUND
 
         return value
 
@@ -245,8 +287,30 @@ class _SiteConfig:
         raise ConfigError(f"could not find a configuration entry "
                           f"for the current system: '{hostname}'")
 
-    def validate(self):
+    def validate(self, cache_dir=None):
+        '''Validate the configuration.
+
+        :arg cache_dir: If not :class:`None`, the configurations that have
+            been validated successfully are cached in this directory, so that
+            they are not validated again. The cached configurations are
+            indexed by their contents and the validation schema, so that a
+            cached validation is never reused if any of them changes.
+        '''
         site_config = self._pick_config()
+        cache_entry = None
+        if cache_dir is not None:
+            cache_entry, normalized = self._validation_cache_entry(
+                cache_dir, site_config
+            )
+
+        if cache_entry is not None:
+            try:
+                with open(cache_entry) as fp:
+                    if fp.read() == normalized:
+                        return
+            except OSError:
+                pass
+
         try:
             jsonschema.validate(site_config, self._schema)
         except jsonschema.ValidationError as e:
@@ -272,12 +336,52 @@ class _SiteConfig:
 
                 partition_names.add(partname)
 
+        if cache_entry is not None:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                with open(cache_entry, 'w') as fp:
+                    fp.write(normalized)
+            except OSError as e:
+                getlogger().debug(
+                    f'could not cache the validation of the configuration: {e}'
+                )
+
+    def _validation_cache_entry(self, cache_dir, site_config):
+        try:
+            normalized = json.dumps(site_config, sort_keys=True)
+        except TypeError:
+            # The configuration is not JSON serializable, so its validation
+            # cannot be cached
+            return None, None
+
+        hasher = hashlib.sha256()
+        hasher.update(reframe.VERSION.encode())
+        hasher.update(json.dumps(self._schema, sort_keys=True).encode())
+        hasher.update(normalized.encode())
+        return os.path.join(cache_dir, hasher.hexdigest()), normalized
+
     def select_subconfig(self, system_fullname=None):
         if (self._local_system is not None and
             self._local_system == system_fullname):
             return
 
         system_fullname = system_fullname or self._detect_system()
+
+        # The local configurations are cached, so that switching between
+        # partitions, e.g., when running their test cases interleaved, does
+        # not rebuild them
+        try:
+            self._local_config = self._subconfigs[system_fullname]
+        except KeyError:
+            # Fall back to the full configuration if the system cannot be
+            # selected
+            self._local_config = {}
+            self._local_config = self._create_subconfig(system_fullname)
+            self._subconfigs[system_fullname] = self._local_config
+
+        self._local_system = system_fullname
+
+    def _create_subconfig(self, system_fullname):
         try:
             system_name, part_name = system_fullname.split(':', maxsplit=1)
         except ValueError:
@@ -287,7 +391,7 @@ class _SiteConfig:
         # Start from a fresh copy of the site_config, because we will be
         # modifying it
         site_config = copy.deepcopy(self._site_config)
-        self._local_config = {}
+        local_config = {}
         systems = list(
             filter(lambda x: x['name'] == system_name, site_config['systems'])
         )
@@ -312,7 +416,7 @@ class _SiteConfig:
             )
 
         # Create local configuration for the current or the requested system
-        self._local_config['systems'] = systems
+        local_config['systems'] = systems
         for name, section in site_config.items():
             if name == 'systems':
                 # The systems sections has already been treated
@@ -343,12 +447,12 @@ class _SiteConfig:
                 except KeyError:
                     pass
                 else:
-                    self._local_config.setdefault(name, [])
-                    self._local_config[name].append(val)
+                    local_config.setdefault(name, [])
+                    local_config[name].append(val)
 
         required_sections = self._schema['required']
         for name in required_sections:
-            if name not in self._local_config.keys():
+            if name not in local_config.keys():
                 raise ConfigError(f"section '{name}' not defined "
                                   f"for system '{system_fullname}'")
 
@@ -359,7 +463,7 @@ class _SiteConfig:
                                for p in systems[0]['partitions']))
         }
         found_environs = {
-            e['name'] for e in self._local_config['environments']
+            e['name'] for e in local_config['environments']
         }
         undefined_environs = sys_environs - found_environs
         if undefined_environs:
@@ -369,7 +473,7 @@ class _SiteConfig:
                 f"are not defined for '{system_fullname}'"
             )
 
-        self._local_system = system_fullname
+        return local_config
 
 
 def convert_old_config(filename, newfilename=None):
@@ -27,15 +27,23 @@ from reframe.utility.versioning import VersionValidator
 
 
 def _register_test(cls, args=None):
-    def _instantiate(cls, args):
+    def _split_args(args):
         if isinstance(args, collections.abc.Sequence):
-            return cls(*args)
+            return args, {}
         elif isinstance(args, collections.abc.Mapping):
-            return cls(**args)
+            return (), args
         elif args is None:
-            return cls()
+            return (), {}
+        else:
+            # Invalid instantiation arguments; the test is skipped
+            return None
+
+    def _instantiate_all(select=None):
+        '''Instantiate all the registered tests.
 
-    def _instantiate_all():
+        If ``select`` is given, it is called with the class and the name of
+        each test before instantiating it and the test is skipped if it
+        returns :class:`False`.'''
         ret = []
         for cls, args in mod.__rfm_test_registry:
             try:
@@ -45,8 +53,16 @@ def _register_test(cls, args=None):
             except AttributeError:
                 mod.__rfm_skip_tests = set()
 
+            split_args = _split_args(args)
+            if split_args is None:
+                continue
+
+            args, kwargs = split_args
+            if select and not select(cls, cls._rfm_test_name(args, kwargs)):
+                continue
+
             try:
-                ret.append(_instantiate(cls, args))
+                ret.append(cls(*args, **kwargs))
             except Exception:
                 frame = user_frame(sys.exc_info()[2])
                 msg = "skipping test due to errors: %s: " % cls.__name__
@@ -106,7 +106,9 @@ class ProgEnvironment(Environment):
     '''A class representing a programming environment.
 
     This type of environment adds also properties for retrieving the compiler
-    and compilation flags.
+    and compilation flags. The compilation flags are returned as read-only
+    sequences, since environments are shared among all the test cases that
+    use them.
 
     .. warning::
        Users may not create :class:`ProgEnvironment` objects directly.
@@ -176,7 +178,7 @@ class ProgEnvironment(Environment):
 
         :type: :class:`List[str]`
         '''
-        return self._cppflags
+        return util.SequenceView(self._cppflags)
 
     @property
     def cflags(self):
@@ -184,7 +186,7 @@ class ProgEnvironment(Environment):
 
         :type: :class:`List[str]`
         '''
-        return self._cflags
+        return util.SequenceView(self._cflags)
 
     @property
     def cxxflags(self):
@@ -192,7 +194,7 @@ class ProgEnvironment(Environment):
 
         :type: :class:`List[str]`
         '''
-        return self._cxxflags
+        return util.SequenceView(self._cxxflags)
 
     @property
     def fflags(self):
@@ -200,7 +202,7 @@ class ProgEnvironment(Environment):
 
         :type: :class:`List[str]`
         '''
-        return self._fflags
+        return util.SequenceView(self._fflags)
 
     @property
     def ldflags(self):
@@ -208,7 +210,7 @@ class ProgEnvironment(Environment):
 
         :type: :class:`List[str]`
         '''
-        return self._ldflags
+        return util.SequenceView(self._ldflags)
 
     @property
     def nvcc(self):
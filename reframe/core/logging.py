@@ -10,11 +10,14 @@ import logging.handlers
 import numbers
 import os
 import pprint
+import queue
 import re
 import shutil
 import sys
 import socket
+import threading
 import time
+import weakref
 
 import reframe
 import reframe.utility.color as color
@@ -133,10 +136,15 @@ class MultiFileHandler(logging.FileHandler):
         # Associates filenames with open streams
         self._streams = {}
 
+        # Directories known to exist
+        self._dirnames = set()
+
     def emit(self, record):
         try:
             dirname = self._prefix % record.__dict__
-            os.makedirs(dirname, exist_ok=True)
+            if dirname not in self._dirnames:
+                os.makedirs(dirname, exist_ok=True)
+                self._dirnames.add(dirname)
         except KeyError as e:
             raise LoggingError('logging failed: unknown placeholder in '
                                'filename pattern: %s' % e) from None
@@ -155,6 +163,111 @@ class MultiFileHandler(logging.FileHandler):
             super().close()
 
 
+class AsyncHandler(logging.handlers.QueueHandler):
+    '''A handler that passes the log records to another handler
+    asynchronously.
+
+    The records are put in a bounded queue and they are passed to the target
+    handler in batches by a background thread, so that slow handlers, e.g.,
+    handlers writing to a shared file system or sending the records over the
+    network, do not slow down the logging thread. If the queue is full,
+    logging blocks until there is space in it.
+
+    :arg target: The handler to pass the log records to.
+    :arg maxsize: The maximum number of records in the queue.
+    :arg batch_size: The maximum number of records that the background thread
+        passes to the target handler at once.
+    '''
+
+    def __init__(self, target, maxsize=1024, batch_size=64):
+        super().__init__(queue.Queue(maxsize))
+        self.target = target
+        self.level = target.level
+        self._batch_size = batch_size
+        self._thread = threading.Thread(target=self._process, daemon=True)
+        self._thread.start()
+        _async_handlers.add(self)
+
+    def setLevel(self, level):
+        set_handler_level(self, level)
+        self.target.setLevel(level)
+
+    def _process(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            with self.target.lock:
+                for record in batch:
+                    if record is None:
+                        continue
+
+                    # Errors cannot be propagated to the logging thread
+                    try:
+                        self.target.handle(record)
+                    except Exception:
+                        self.handleError(record)
+
+            for _ in batch:
+                self.queue.task_done()
+
+            if batch[-1] is None:
+                return
+
+    def enqueue(self, record):
+        if self._thread is None:
+            # The background thread is stopped; pass the record directly
+            self.target.handle(record)
+        else:
+            self.queue.put(record)
+
+    def flush(self):
+        '''Wait until all the queued records are handled.'''
+        self.queue.join()
+        self.target.flush()
+
+    def stop(self):
+        '''Stop the background thread after the queued records are handled.
+
+        Any records logged afterwards are passed to the target handler
+        directly.
+        '''
+        if self._thread is not None:
+            self.queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        self.target.close()
+        super().close()
+
+    def _reinit_after_fork(self):
+        # Only the forking thread survives in the child process, so the
+        # background thread and the state of the queue are not usable; the
+        # records already queued are handled by the parent process
+        self.queue = queue.Queue(self.queue.maxsize)
+        self._thread = None
+
+
+# The asynchronous handlers of the process; their records are passed to their
+# target handlers directly in forked processes
+_async_handlers = weakref.WeakSet()
+
+
+def _reinit_async_handlers():
+    for hdlr in list(_async_handlers):
+        hdlr._reinit_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reinit_async_handlers)
+
+
 def _format_time_rfc3339(timestamp, datefmt):
     tz_suffix = time.strftime('%z', timestamp)
     tz_rfc3339 = tz_suffix[:-2] + ':' + tz_suffix[-2:]
@@ -325,6 +438,9 @@ def _extract_handlers(site_config, handlers_group):
         datefmt = site_config.get(f'{handler_prefix}/{i}/datefmt')
         hdlr.setFormatter(RFC3339Formatter(fmt=fmt, datefmt=datefmt))
         hdlr.setLevel(_check_level(level))
+        if site_config.get(f'{handler_prefix}/{i}/async'):
+            hdlr = AsyncHandler(hdlr)
+
         handlers.append(hdlr)
 
     return handlers
@@ -414,7 +530,7 @@ class LoggerAdapter(logging.LoggerAdapter):
     def std_stream_handlers(self):
         if self.logger:
             return [h for h in self.logger.handlers
-                    if isinstance(h, logging.StreamHandler)]
+                    if isinstance(_target_handler(h), logging.StreamHandler)]
         else:
             return []
 
@@ -512,22 +628,22 @@ _logger = None
 _perf_logger = None
 _context_logger = null_logger
 
+# Loggers set by `logging_context`; they are kept per thread, so that tests
+# processed concurrently log with their own context
+_thread_context = threading.local()
+
 
 class logging_context:
     def __init__(self, check=None, level=DEBUG):
-        global _context_logger
-
         self._level = level
-        self._orig_logger = _context_logger
+        self._orig_logger = getattr(_thread_context, 'logger', None)
         if check is not None:
-            _context_logger = LoggerAdapter(_logger, check)
+            _thread_context.logger = LoggerAdapter(_logger, check)
 
     def __enter__(self):
-        return _context_logger
+        return getlogger()
 
     def __exit__(self, exc_type, exc_value, traceback):
-        global _context_logger
-
         # Log any exceptions thrown with the current context logger
         if exc_type is not None:
             msg = 'caught {0}: {1}'
@@ -535,12 +651,29 @@ class logging_context:
             getlogger().log(self._level, msg.format(exc_fullname, exc_value))
 
         # Restore context logger
-        _context_logger = self._orig_logger
+        _thread_context.logger = self._orig_logger
+
+
+def _target_handler(hdlr):
+    return hdlr.target if isinstance(hdlr, AsyncHandler) else hdlr
+
+
+def _stop_async_handlers(logger):
+    if logger is None:
+        return
+
+    for hdlr in logger.handlers:
+        if isinstance(hdlr, AsyncHandler):
+            hdlr.stop()
 
 
 def configure_logging(site_config):
     global _logger, _context_logger, _perf_logger
 
+    # The previous loggers may still be in use, but their asynchronous
+    # handlers must not keep their threads
+    _stop_async_handlers(_logger)
+    _stop_async_handlers(_perf_logger)
     if site_config is None:
         _logger = None
         _context_logger = null_logger
@@ -551,15 +684,29 @@ def configure_logging(site_config):
     _context_logger = LoggerAdapter(_logger)
 
 
+def flush_logging():
+    '''Wait until all the log records are handled.'''
+    for logger in (_logger, _perf_logger):
+        if logger is not None:
+            for hdlr in logger.handlers:
+                hdlr.flush()
+
+
 def save_log_files(dest):
     os.makedirs(dest, exist_ok=True)
     for hdlr in _logger.handlers:
+        hdlr.flush()
+        hdlr = _target_handler(hdlr)
         if isinstance(hdlr, logging.FileHandler):
             shutil.copy(hdlr.baseFilename, dest, follow_symlinks=True)
 
 
 def getlogger():
-    return _context_logger
+    logger = getattr(_thread_context, 'logger', None)
+    if logger is None:
+        return _context_logger
+
+    return logger
 
 
 def getperflogger(check):
@@ -13,12 +13,14 @@ __all__ = [
 ]
 
 
+import contextlib
 import functools
 import inspect
 import itertools
 import numbers
 import os
 import shutil
+import threading
 
 import reframe.core.environments as env
 import reframe.core.fields as fields
@@ -29,6 +31,7 @@ import reframe.utility.os_ext as os_ext
 import reframe.utility.sanity as sn
 import reframe.utility.typecheck as typ
 from reframe.core.backends import (getlauncher, getscheduler)
+from reframe.core.buildcache import BuildCache
 from reframe.core.buildsystems import BuildSystemField
 from reframe.core.containers import ContainerPlatform, ContainerPlatformField
 from reframe.core.deferrable import _DeferredExpression
@@ -123,12 +126,33 @@ class RegressionTest(metaclass=RegressionTestMeta):
     This class provides the implementation of the pipeline phases that the
     regression test goes through during its lifetime.
 
+    The :attr:`tags` and :attr:`valid_systems` of a test may also be declared
+    at the class level as keyword arguments of the class definition, in
+    which case they become the initial values of these attributes:
+
+    .. code-block:: python
+
+       class MyTest(rfm.RegressionTest, tags={'foo'}, valid_systems=['*']):
+           ...
+
+    Tests with such declarations, either in their class or in any of their
+    base classes, are filtered by name, tags and system before being
+    instantiated by the frontend. Their constructor must not change their
+    :attr:`name` or add tags and systems that are not declared.
+
     .. note::
         .. versionchanged:: 2.19
            Base constructor takes no arguments.
 
+        .. versionchanged:: 3.2
+           Tags and valid systems can be declared at the class level.
+
     '''
 
+    # Tags and valid systems declared at the class level
+    _rfm_tags = None
+    _rfm_valid_systems = None
+
     #: The name of the test.
     #:
     #: :type: string that can contain any character except ``/``
@@ -687,14 +711,6 @@ class RegressionTest(metaclass=RegressionTestMeta):
     def __new__(cls, *args, **kwargs):
         obj = super().__new__(cls)
 
-        # Create a test name from the class name and the constructor's
-        # arguments
-        name = cls.__qualname__
-        if args or kwargs:
-            arg_names = map(lambda x: util.toalphanum(str(x)),
-                            itertools.chain(args, kwargs.values()))
-            name += '_' + '_'.join(arg_names)
-
         # Determine the prefix
         try:
             prefix = cls._rfm_custom_prefix
@@ -704,16 +720,34 @@ class RegressionTest(metaclass=RegressionTestMeta):
             else:
                 prefix = os.path.abspath(os.path.dirname(inspect.getfile(cls)))
 
-        obj._rfm_init(name, prefix)
+        obj._rfm_init(cls._rfm_test_name(args, kwargs), prefix)
         return obj
 
     def __init__(self):
         pass
 
     @classmethod
-    def __init_subclass__(cls, *, special=False, **kwargs):
+    def __init_subclass__(cls, *, special=False, tags=None,
+                          valid_systems=None, **kwargs):
         super().__init_subclass__(**kwargs)
         cls._rfm_special_test = special
+        if tags is not None:
+            cls._rfm_tags = set(tags)
+
+        if valid_systems is not None:
+            cls._rfm_valid_systems = list(valid_systems)
+
+    @classmethod
+    def _rfm_test_name(cls, args, kwargs):
+        '''Create a test name from the class name and the constructor's
+        arguments.'''
+        name = cls.__qualname__
+        if args or kwargs:
+            arg_names = map(lambda x: util.toalphanum(str(x)),
+                            itertools.chain(args, kwargs.values()))
+            name += '_' + '_'.join(arg_names)
+
+        return name
 
     def _rfm_init(self, name=None, prefix=None):
         if name is not None:
@@ -721,7 +755,7 @@ class RegressionTest(metaclass=RegressionTestMeta):
 
         self.descr = self.name
         self.valid_prog_environs = []
-        self.valid_systems = []
+        self.valid_systems = list(self._rfm_valid_systems or [])
         self.sourcepath = ''
         self.prebuild_cmds = []
         self.postbuild_cmds = []
@@ -731,7 +765,7 @@ class RegressionTest(metaclass=RegressionTestMeta):
         self.postrun_cmds = []
         self.keep_files = []
         self.readonly_files = []
-        self.tags = set()
+        self.tags = set(self._rfm_tags or ())
         self.maintainers = []
         self._perfvalues = {}
         self.container_platform = None
@@ -793,6 +827,12 @@ class RegressionTest(metaclass=RegressionTestMeta):
         self._compile_proc = None
         self.build_system = None
 
+        # Build cache and key to store the build artifacts under; they are
+        # set only if the build cache is enabled and there was a cache miss
+        self._build_cache = None
+        self._build_cache_key = None
+        self._build_restored = False
+
         # Performance logging
         self._perf_logger = logging.null_logger
 
@@ -970,21 +1010,10 @@ class RegressionTest(metaclass=RegressionTestMeta):
         return ret
 
     def supports_system(self, name):
-        if name.find(':') != -1:
-            system, partition = name.split(':')
-        else:
-            system, partition = self.current_system.name, name
-
-        valid_matches = ['*', '*:*', system, f'{system}:*',
-                         f'*:{partition}', f'{system}:{partition}']
-
-        return any(n in self.valid_systems for n in valid_matches)
+        return rt.is_system_supported(self.valid_systems, name)
 
     def supports_environ(self, env_name):
-        if '*' in self.valid_prog_environs:
-            return True
-
-        return env_name in self.valid_prog_environs
+        return rt.is_environ_supported(self.valid_prog_environs, env_name)
 
     def is_local(self):
         '''Check if the test will execute locally.
@@ -1176,17 +1205,56 @@ class RegressionTest(metaclass=RegressionTestMeta):
                                      launcher=getlauncher('local')(),
                                      name='rfm_%s_build' % self.name,
                                      workdir=self._stagedir)
-        with os_ext.change_dir(self._stagedir):
-            try:
-                self._build_job.prepare(
-                    build_commands, environs,
-                    login=rt.runtime().get_option('general/0/use_login_shell'),
-                    trap_errors=True
-                )
-            except OSError as e:
-                raise PipelineError('failed to prepare build job') from e
+        self._build_cache = None
+        self._build_cache_key = None
+        self._build_restored = False
+        # Compile-only tests check the output of their build, so they are
+        # always built
+        cache_dir = rt.runtime().get_option('general/0/build_cache_dir')
+        if cache_dir and not isinstance(self, CompileOnlyRegressionTest):
+            build_cache = BuildCache(os_ext.expandvars(cache_dir))
+            cache_key = build_cache.key(self._stagedir, build_commands,
+                                        environs, self._current_partition,
+                                        rt.runtime().modules_system)
+            if build_cache.restore(cache_key, self._stagedir):
+                self.logger.debug('build artifacts restored from cache')
+                self._build_restored = True
+                return
+
+            self._build_cache = build_cache
+            self._build_cache_key = cache_key
 
-            self._build_job.submit()
+        try:
+            self._build_job.prepare(
+                build_commands, environs,
+                login=rt.runtime().get_option('general/0/use_login_shell'),
+                trap_errors=True
+            )
+        except OSError as e:
+            raise PipelineError('failed to prepare build job') from e
+
+        self._build_job.submit()
+
+    @final
+    def compile_complete(self):
+        '''Check if the compilation phase has finished.
+
+        This call is non-blocking.
+
+        :returns: :class:`True` if the associated build job has finished,
+            :class:`False` otherwise.
+
+            If no build job is associated with this test, :class:`True` is
+            returned.
+        :raises reframe.core.exceptions.ReframeError: In case of errors.
+
+        .. versionadded:: 3.2
+
+        '''
+        if not self._build_job or self._build_restored:
+            return True
+
+        return self._build_job.finished()
 
     @_run_hooks('post_compile')
     @final
@@ -1204,6 +1272,9 @@ class RegressionTest(metaclass=RegressionTestMeta):
               more details.
 
         '''
+        if self._build_restored:
+            return
+
         self._build_job.wait()
         self.logger.debug('compilation finished')
 
@@ -1211,6 +1282,9 @@ class RegressionTest(metaclass=RegressionTestMeta):
         if self._build_job.exitcode != 0:
             raise BuildError(self._build_job.stdout, self._build_job.stderr)
 
+        if self._build_cache:
+            self._build_cache.store(self._build_cache_key, self._stagedir)
+
     @_run_hooks('pre_run')
     @final
     def run(self):
@@ -1293,20 +1367,22 @@ class RegressionTest(metaclass=RegressionTestMeta):
                 self._current_partition.get_resource(r, **v))
 
         self._job.options = resources_opts + self._job.options
-        with os_ext.change_dir(self._stagedir):
-            try:
-                self._job.prepare(
-                    commands, environs,
-                    login=rt.runtime().get_option('general/0/use_login_shell'),
-                )
-            except OSError as e:
-                raise PipelineError('failed to prepare job') from e
-
-            self._job.submit()
+        try:
+            self._job.prepare(
+                commands, environs,
+                login=rt.runtime().get_option('general/0/use_login_shell'),
+            )
+        except OSError as e:
+            raise PipelineError('failed to prepare job') from e
 
-        msg = ('spawned job (%s=%s)' %
-               ('pid' if self.is_local() else 'jobid', self._job.jobid))
-        self.logger.debug(msg)
+        self._job.submit()
+        if self._job.jobid is None:
+            # The job will be submitted packed with others
+            self.logger.debug('deferred job submission')
+        else:
+            msg = ('spawned job (%s=%s)' %
+                   ('pid' if self.is_local() else 'jobid', self._job.jobid))
+            self.logger.debug(msg)
 
         # Update num_tasks if test is flexible
         if self.job.sched_flex_alloc_nodes:
@@ -1370,12 +1446,34 @@ class RegressionTest(metaclass=RegressionTestMeta):
             if self.strict_check:
                 raise
 
+    @contextlib.contextmanager
+    def _evaluation_context(self):
+        '''Context for evaluating the sanity and performance expressions.
+
+        The sanity functions resolve relative file names against the stage
+        directory. The current working directory is shared by all threads of
+        the process, so it is changed only if called from the main thread.
+        '''
+        with sn._file_cache(self._stagedir):
+            if threading.current_thread() is not threading.main_thread():
+                yield
+                return
+
+            with os_ext.change_dir(self._stagedir):
+                yield
+
     @final
     def check_sanity(self):
         '''The sanity checking phase of the regression test pipeline.
 
         :raises reframe.core.exceptions.SanityError: If the sanity check fails.
 
+        .. versionchanged:: 3.2
+           The current working directory is changed to the stage directory
+           only if called from the main thread; the framework's sanity
+           functions resolve relative file names against the stage directory
+           of the test in any case.
+
         .. warning::
 
            .. versionchanged:: 3.0
@@ -1388,7 +1486,7 @@ class RegressionTest(metaclass=RegressionTestMeta):
         if self.sanity_patterns is None:
             raise SanityError('sanity_patterns not set')
 
-        with os_ext.change_dir(self._stagedir):
+        with self._evaluation_context():
             success = sn.evaluate(self.sanity_patterns)
             if not success:
                 raise SanityError()
@@ -1412,7 +1510,7 @@ class RegressionTest(metaclass=RegressionTestMeta):
         if self.perf_patterns is None:
             return
 
-        with os_ext.change_dir(self._stagedir):
+        with self._evaluation_context():
             # Check if default reference perf values are provided and
             # store all the variables tested in the performance check
             has_default = False
@@ -33,6 +33,9 @@ class RuntimeContext:
         self._current_run = 0
         self._timestamp = datetime.now()
 
+        # Cache of the commands emitted by `emit_loadenv_commands()`
+        self._loadenv_cache = {}
+
     def _makedir(self, *dirs, wipeout=False):
         ret = os.path.join(*dirs)
         if wipeout:
@@ -219,10 +222,35 @@ def loadenv(*environs):
     return env_snapshot, commands
 
 
+def _environ_key(environ):
+    return (type(environ).__name__, environ.name, tuple(environ.modules),
+            tuple(environ.variables.items()))
+
+
 def emit_loadenv_commands(*environs):
+    '''Return the shell commands required to load the given environments.
+
+    The environments are not loaded in the current Python context. The
+    commands emitted for every combination of environments are cached for the
+    duration of the session, as long as the environment of the current
+    process does not change, so that the modules system is queried only once.
+
+    :arg environs: A list of environments to load.
+    :type environs: List[Environment]
+    :returns: A list of shell commands.
+    '''
+    cache = runtime()._loadenv_cache
+    key = (tuple(_environ_key(e) for e in environs),
+           tuple(sorted(os.environ.items())))
+    try:
+        return list(cache[key])
+    except KeyError:
+        pass
+
     env_snapshot, commands = loadenv(*environs)
     env_snapshot.restore()
-    return commands
+    cache[key] = commands
+    return list(commands)
 
 
 def is_env_loaded(environ):
@@ -318,3 +346,34 @@ class module_use:
 
     def __exit__(self, exc_type, exc_value, traceback):
         runtime().modules_system.searchpath_remove(*self._paths)
+
+
+def is_system_supported(valid_systems, name):
+    '''Check if a system or partition matches a list of valid systems.
+
+    :arg valid_systems: A list of valid systems as in
+        :attr:`reframe.core.pipeline.RegressionTest.valid_systems`.
+    :arg name: A fully qualified partition name of the form
+        ``system:partition`` or the name of a partition of the current system.
+    :returns: :class:`True` if ``name`` matches any entry of
+        ``valid_systems``, :class:`False` otherwise.
+    '''
+    if name.find(':') != -1:
+        system, partition = name.split(':')
+    else:
+        system, partition = runtime().system.name, name
+
+    valid_matches = ['*', '*:*', system, f'{system}:*',
+                     f'*:{partition}', f'{system}:{partition}']
+
+    return any(n in valid_systems for n in valid_matches)
+
+
+def is_environ_supported(valid_prog_environs, name):
+    '''Check if a programming environment matches a list of valid ones.
+
+    :arg valid_prog_environs: A list of valid programming environments as in
+        :attr:`reframe.core.pipeline.RegressionTest.valid_prog_environs`.
+    :arg name: The name of the programming environment.
+    '''
+    return '*' in valid_prog_environs or name in valid_prog_environs
@@ -8,6 +8,9 @@
 #
 
 import abc
+import contextlib
+import os
+import selectors
 import time
 
 import reframe.core.fields as fields
@@ -90,6 +93,167 @@ class JobScheduler(abc.ABC):
         :meta private:
         '''
 
+    @classmethod
+    def poll_jobs(cls, jobs):
+        '''Retrieve the state of multiple jobs of this scheduler at once.
+
+        Backends that can query the state of several jobs with a single
+        command may override this method, so that subsequent calls to
+        :func:`finished` for these jobs do not need to query the scheduler
+        again. The default implementation does nothing, in which case every
+        job is polled separately.
+
+        :arg jobs: A list of job descriptors associated with this scheduler.
+        :meta private:
+        '''
+
+    def packing_key(self, job):
+        '''Return the key under which ``job`` may be packed with other jobs.
+
+        Jobs of this scheduler that have the same packing key may be
+        submitted together with a single call to :func:`submit_packed`.
+        The default implementation returns :class:`None`, meaning that the
+        job may not be packed with other jobs.
+
+        :arg job: A job descriptor.
+        :meta private:
+        '''
+        return None
+
+    @classmethod
+    def submit_packed(cls, jobs):
+        '''Submit multiple jobs of this scheduler at once.
+
+        This is called only for jobs with the same :func:`packing_key`.
+        Backends that support packing must set the job id of all the jobs
+        passed. The default implementation submits every job separately.
+
+        :arg jobs: A list of job descriptors associated with this scheduler.
+        :meta private:
+        '''
+        for job in jobs:
+            job.scheduler.submit(job)
+
+    def completion_fd(self, job):
+        '''Return a file descriptor that becomes readable when ``job`` exits.
+
+        Backends that can be notified about the completion of their jobs may
+        override this method, so that the framework does not have to wait for
+        the next poll to find out that a job has finished. The default
+        implementation returns :class:`None`.
+
+        :arg job: A job descriptor.
+        :meta private:
+        '''
+        return None
+
+
+def poll_jobs(jobs):
+    '''Retrieve the state of multiple jobs grouping them by scheduler.
+
+    :arg jobs: An iterable of job descriptors.
+
+    :meta private:
+    '''
+    jobs_per_sched = {}
+    for job in jobs:
+        if job.jobid is None:
+            continue
+
+        jobs_per_sched.setdefault(type(job.scheduler), []).append(job)
+
+    for sched_type, sched_jobs in jobs_per_sched.items():
+        sched_type.poll_jobs(sched_jobs)
+
+
+# The jobs whose submission has been deferred by pack_jobs() along with their
+# packing keys; this is None outside a pack_jobs() context
+_packed_jobs = None
+
+
+@contextlib.contextmanager
+def pack_jobs():
+    '''Pack the jobs submitted in this context and submit them on exit.
+
+    The submission of the jobs that can be packed with other jobs is deferred
+    until the context exits. The deferred jobs are then submitted in groups
+    of jobs with the same scheduler and packing key. If the submission of a
+    group fails, the error is raised when its jobs are polled or waited for.
+    If the context is interrupted, e.g., by a :class:`KeyboardInterrupt`, the
+    deferred jobs are not submitted at all. Nested contexts are part of the
+    outermost one.
+
+    :meta private:
+    '''
+    global _packed_jobs
+    if _packed_jobs is not None:
+        yield
+        return
+
+    _packed_jobs = []
+    submit = True
+    try:
+        yield
+    except BaseException as e:
+        # Jobs deferred before a regular exception belong to tasks that have
+        # already started, so they must be submitted
+        submit = isinstance(e, Exception)
+        raise
+    finally:
+        packed_jobs, _packed_jobs = _packed_jobs, None
+        if submit:
+            _submit_packed(packed_jobs)
+
+
+def _submit_packed(packed_jobs):
+    groups = {}
+    for key, job in packed_jobs:
+        groups.setdefault((type(job.scheduler), key), []).append(job)
+
+    for (sched_type, _), jobs in groups.items():
+        try:
+            if len(jobs) == 1:
+                jobs[0].scheduler.submit(jobs[0])
+            else:
+                getlogger().debug(f'submitting {len(jobs)} packed jobs')
+                sched_type.submit_packed(jobs)
+        except Exception as e:
+            for job in jobs:
+                if job.jobid is None:
+                    job._submit_error = e
+
+
+def wait_any(jobs, timeout):
+    '''Block until any of ``jobs`` finishes or ``timeout`` seconds pass.
+
+    Only jobs whose scheduler provides a completion file descriptor may
+    interrupt the wait earlier; if there is no such job, this function simply
+    sleeps for ``timeout`` seconds.
+
+    :arg jobs: An iterable of job descriptors.
+    :arg timeout: The maximum time to wait in seconds.
+
+    :meta private:
+    '''
+    fds = set()
+    for job in jobs:
+        if job.jobid is None:
+            continue
+
+        fd = job.scheduler.completion_fd(job)
+        if fd is not None:
+            fds.add(fd)
+
+    if not fds:
+        time.sleep(timeout)
+        return
+
+    with selectors.DefaultSelector() as selector:
+        for fd in fds:
+            selector.register(fd, selectors.EVENT_READ)
+
+        selector.select(timeout)
+
 
 class Job:
     '''A job descriptor.
@@ -206,7 +370,8 @@ class Job:
                  sched_nodelist=None,
                  sched_exclude_nodelist=None,
                  sched_exclusive_access=None,
-                 sched_options=None):
+                 sched_options=None,
+                 sched_allocation=None):
 
         # Mutable fields
         self.num_tasks = 1
@@ -233,6 +398,9 @@ class Job:
         self._max_pending_time = max_pending_time
         self._completion_time = None
 
+        # The error of a deferred submission; see pack_jobs()
+        self._submit_error = None
+
         # Backend scheduler related information
         self._sched_flex_alloc_nodes = sched_flex_alloc_nodes
         self._sched_access = sched_access
@@ -242,10 +410,15 @@ class Job:
         self._sched_reservation = sched_reservation
         self._sched_account = sched_account
         self._sched_exclusive_access = sched_exclusive_access
+        self._sched_allocation = sched_allocation
 
     @classmethod
     def create(cls, scheduler, launcher, *args, **kwargs):
         ret = Job(*args, **kwargs)
+        if ret.sched_allocation is not None:
+            # Run the job inside the allocation, if its scheduler allows it
+            scheduler = ret.sched_allocation.step_scheduler(scheduler)
+
         ret.scheduler, ret.launcher = scheduler, launcher
         return ret
 
@@ -305,6 +478,10 @@ class Job:
     def sched_exclusive_access(self):
         return self._sched_exclusive_access
 
+    @property
+    def sched_allocation(self):
+        return self._sched_allocation
+
     @property
     def completion_time(self):
         return self.scheduler.completion_time(self) or self._completion_time
@@ -332,8 +509,8 @@ class Job:
             getlogger().debug('flex_alloc_nodes: setting num_tasks to %s' %
                               self.num_tasks)
 
-        with shell.generate_script(self.script_filename,
-                                   **gen_opts) as builder:
+        script_path = os.path.join(self.workdir, self.script_filename)
+        with shell.generate_script(script_path, **gen_opts) as builder:
             builder.write_prolog(self.scheduler.emit_preamble(self))
             builder.write(runtime.emit_loadenv_commands(*environs))
             for c in commands:
@@ -366,24 +543,35 @@ class Job:
         return len(available_nodes) * num_tasks_per_node
 
     def submit(self):
+        if _packed_jobs is not None:
+            key = self.scheduler.packing_key(self)
+            if key is not None:
+                # The job will be submitted when the pack_jobs() context exits
+                _packed_jobs.append((key, self))
+                return
+
         return self.scheduler.submit(self)
 
-    def wait(self):
-        if self.jobid is None:
-            raise JobNotStartedError('cannot wait an unstarted job')
+    def _check_started(self, action):
+        if self.jobid is not None:
+            return
+
+        if self._submit_error is not None:
+            raise JobError('job submission failed') from self._submit_error
 
+        raise JobNotStartedError(f'cannot {action} an unstarted job')
+
+    def wait(self):
+        self._check_started('wait')
         self.scheduler.wait(self)
         self._completion_time = self._completion_time or time.time()
 
     def cancel(self):
-        if self.jobid is None:
-            raise JobNotStartedError('cannot cancel an unstarted job')
-
+        self._check_started('cancel')
         return self.scheduler.cancel(self)
 
     def finished(self):
-        if self.jobid is None:
-            raise JobNotStartedError('cannot poll an unstarted job')
+        self._check_started('poll')
 
         done = self.scheduler.finished(self)
         if done:
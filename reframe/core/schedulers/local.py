@@ -22,6 +22,16 @@ class _TimeoutExpired(ReframeError):
     pass
 
 
+def _pidfd_open(pid):
+    '''Return a file descriptor referring to process ``pid`` or :class:`None`
+    if process file descriptors are not supported.'''
+    try:
+        return os.pidfd_open(pid)
+    except (AttributeError, OSError):
+        # Python < 3.9 or Linux < 5.3
+        return None
+
+
 @register_scheduler('local', local=True)
 class LocalJobScheduler(sched.JobScheduler):
     def __init__(self):
@@ -31,6 +41,10 @@ class LocalJobScheduler(sched.JobScheduler):
         # Underlying process
         self._proc = None
 
+        # File descriptor of the underlying process; it becomes readable as
+        # soon as the process exits
+        self._proc_fd = None
+
         # Underlying process' stdout/stderr
         self._f_stdout = None
         self._f_stderr = None
@@ -40,26 +54,32 @@ class LocalJobScheduler(sched.JobScheduler):
 
     def submit(self, job):
         # `chmod +x' first, because we will execute the script locally
-        os.chmod(job.script_filename,
-                 os.stat(job.script_filename).st_mode | stat.S_IEXEC)
+        script_path = os.path.join(job.workdir, job.script_filename)
+        os.chmod(script_path, os.stat(script_path).st_mode | stat.S_IEXEC)
 
         # Run from the absolute path
-        self._f_stdout = open(job.stdout, 'w+')
-        self._f_stderr = open(job.stderr, 'w+')
+        self._f_stdout = open(os.path.join(job.workdir, job.stdout), 'w+')
+        self._f_stderr = open(os.path.join(job.workdir, job.stderr), 'w+')
 
         # The new process starts also a new session (session leader), so that
         # we can later kill any other processes that this might spawn by just
         # killing this one.
         self._proc = os_ext.run_command_async(
-            os.path.abspath(job.script_filename),
+            os.path.abspath(script_path),
             stdout=self._f_stdout,
             stderr=self._f_stderr,
-            start_new_session=True)
+            start_new_session=True,
+            cwd=job.workdir)
+
+        self._proc_fd = _pidfd_open(self._proc.pid)
 
         # Update job info
         job.jobid = self._proc.pid
         job.nodelist = [socket.gethostname()]
 
+    def completion_fd(self, job):
+        return self._proc_fd
+
     def emit_preamble(self, job):
         return []
 
@@ -163,6 +183,9 @@ class LocalJobScheduler(sched.JobScheduler):
             self._wait_all(job)
             self._f_stdout.close()
             self._f_stderr.close()
+            if self._proc_fd is not None:
+                os.close(self._proc_fd)
+                self._proc_fd = None
 
     def finished(self, job):
         '''Check if the spawned process has finished.
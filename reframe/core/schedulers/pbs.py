@@ -122,7 +122,8 @@ class PbsJobScheduler(sched.JobScheduler):
         # Slurm wrappers.
         cmd = 'qsub -o %s -e %s %s' % (job.stdout, job.stderr,
                                        job.script_filename)
-        completed = _run_strict(cmd, timeout=self._job_submit_timeout)
+        completed = _run_strict(cmd, timeout=self._job_submit_timeout,
+                                cwd=job.workdir)
         jobid_match = re.search(r'^(?P<jobid>\S+)', completed.stdout)
         if not jobid_match:
             raise JobError('could not retrieve the job id '
@@ -156,9 +157,10 @@ class PbsJobScheduler(sched.JobScheduler):
         _run_strict('qdel %s' % jobid, timeout=self._job_submit_timeout)
 
     def finished(self, job):
-        with os_ext.change_dir(job.workdir):
-            output_ready = (os.path.exists(job.stdout) and
-                            os.path.exists(job.stderr))
+        output_ready = (
+            os.path.exists(os.path.join(job.workdir, job.stdout)) and
+            os.path.exists(os.path.join(job.workdir, job.stderr))
+        )
 
         done = self._cancelled or output_ready
 
@@ -6,7 +6,10 @@
 import functools
 import glob
 import itertools
+import os
 import re
+import shlex
+import tempfile
 import time
 from argparse import ArgumentParser
 from contextlib import suppress
@@ -15,11 +18,13 @@ from datetime import datetime
 import reframe.core.environments as env
 import reframe.core.runtime as rt
 import reframe.core.schedulers as sched
+import reframe.core.shell as shell
 import reframe.utility.os_ext as os_ext
 from reframe.core.backends import register_scheduler
 from reframe.core.exceptions import (SpawnedProcessError,
                                      JobBlockedError, JobError)
 from reframe.core.logging import getlogger
+from reframe.core.schedulers.local import LocalJobScheduler
 from reframe.utility import seconds_to_hms
 
 
@@ -64,6 +69,33 @@ def slurm_state_pending(state):
     return False
 
 
+def _jobid_matches(reported_jobid, jobid):
+    '''Check if a job id reported by Slurm refers to ``jobid``.
+
+    If ``jobid`` is the id of a job array task, i.e., ``<job_id>_<task_id>``,
+    only this task matches, even if it is reported as part of a range of
+    pending tasks, e.g., ``<job_id>_[0-9]``. Otherwise, all the tasks of the
+    job match.
+    '''
+    job_id, _, task_id = jobid.partition('_')
+    reported_job_id, _, reported_tasks = reported_jobid.partition('_')
+    if reported_job_id != job_id:
+        return False
+
+    if not task_id:
+        return True
+
+    # Ranges of tasks may also contain a throttle limit, e.g., `[0-9%2]'
+    task_id = int(task_id)
+    for task_range in reported_tasks.strip('[]').split('%')[0].split(','):
+        first, _, last = task_range.partition('-')
+        with suppress(ValueError):
+            if int(first) <= task_id <= int(last or first):
+                return True
+
+    return False
+
+
 _run_strict = functools.partial(os_ext.run_command, check=True)
 
 
@@ -83,6 +115,9 @@ class SlurmJobScheduler(sched.JobScheduler):
     # See (`Job Array Support<https://slurm.schedmd.com/job_array.html`__)
     _state_patt = r'\d+(?:_\d+|_\[\d+-\d+\])?'
 
+    # Preamble options that differ between the jobs packed in a job array
+    _per_job_options = ('--job-name=', '--output=', '--error=')
+
     def __init__(self):
         self._prefix = '#SBATCH'
 
@@ -106,6 +141,9 @@ class SlurmJobScheduler(sched.JobScheduler):
 
         self._is_cancelling = False
         self._is_job_array = None
+
+        # The task id of the job in the job array it was packed in
+        self._array_task_id = None
         self._update_state_count = 0
         self._submit_time = None
         self._completion_time = None
@@ -116,6 +154,10 @@ class SlurmJobScheduler(sched.JobScheduler):
             f'schedulers/@{self.registered_name}/use_nodes_option'
         )
 
+        # Job state retrieved by a batched poll; it will be consumed by the
+        # next call to `_update_state()`
+        self._polled_state = None
+
     def completion_time(self, job):
         if (self._completion_time or
             not slurm_state_completed(job.state)):
@@ -124,7 +166,7 @@ class SlurmJobScheduler(sched.JobScheduler):
         with rt.temp_environment(variables={'SLURM_TIME_FORMAT': '%s'}):
             completed = os_ext.run_command(
                 'sacct -S %s -P -j %s -o jobid,end' %
-                (self._submit_time.strftime('%F'), job.jobid),
+                (self._submit_time.strftime('%F'), self._slurm_jobid(job)),
                 log=False
             )
 
@@ -144,6 +186,13 @@ class SlurmJobScheduler(sched.JobScheduler):
 
         return self._completion_time
 
+    def _slurm_jobid(self, job):
+        '''The id of ``job`` as understood by the Slurm commands.'''
+        if self._array_task_id is None:
+            return str(job.jobid)
+
+        return f'{job.jobid}_{self._array_task_id}'
+
     def _format_option(self, var, option):
         if var is not None:
             return self._prefix + ' ' + option.format(var)
@@ -234,7 +283,8 @@ class SlurmJobScheduler(sched.JobScheduler):
 
     def submit(self, job):
         cmd = 'sbatch %s' % job.script_filename
-        completed = _run_strict(cmd, timeout=self._job_submit_timeout)
+        completed = _run_strict(cmd, timeout=self._job_submit_timeout,
+                                cwd=job.workdir)
         jobid_match = re.search(r'Submitted batch job (?P<jobid>\d+)',
                                 completed.stdout)
         if not jobid_match:
@@ -244,6 +294,91 @@ class SlurmJobScheduler(sched.JobScheduler):
         job.jobid = int(jobid_match.group('jobid'))
         self._submit_time = datetime.now()
 
+    def _shared_preamble(self, job):
+        prefixes = tuple(f'{self._prefix} {opt}'
+                         for opt in self._per_job_options)
+        return [line for line in self.emit_preamble(job)
+                if not line.startswith(prefixes)]
+
+    def packing_key(self, job):
+        # Only single-node jobs are packed; job arrays and jobs with a
+        # flexible node allocation are always submitted on their own
+        if job.num_tasks_per_node is None:
+            single_node = job.num_tasks <= 1
+        else:
+            single_node = job.num_tasks <= job.num_tasks_per_node
+
+        if (not single_node or job.sched_flex_alloc_nodes or
+            self.is_array(job)):
+            return None
+
+        # Jobs requesting the same resources have the same preamble apart
+        # from their name and their output files
+        return tuple(self._shared_preamble(job))
+
+    @classmethod
+    def submit_packed(cls, jobs):
+        '''Submit the jobs as the tasks of a single job array.
+
+        Every array task redirects its output to the job's output files,
+        changes to the working directory of its job and runs the job script.
+        The array script is written in the stage prefix of the session and is
+        removed after its submission; any errors of the array script itself
+        go to a log file next to it.
+        '''
+        sched = jobs[0].scheduler
+        dirname = rt.runtime().stage_prefix
+        os.makedirs(dirname, exist_ok=True)
+        fd, script = tempfile.mkstemp(prefix='rfm_array_', suffix='.sh',
+                                      dir=dirname)
+        os.close(fd)
+        logfile = os.path.splitext(script)[0] + '.log'
+        login = rt.runtime().get_option('general/0/use_login_shell')
+        try:
+            with shell.generate_script(script, login=login) as builder:
+                builder.write_prolog([
+                    f'{sched._prefix} --job-name="rfm_array_job"',
+                    f'{sched._prefix} --array=0-{len(jobs) - 1}',
+                    f'{sched._prefix} --output={logfile}',
+                    f'{sched._prefix} --error={logfile}',
+                    f'{sched._prefix} --open-mode=append',
+                    *sched._shared_preamble(jobs[0])
+                ])
+                builder.write_body('case $SLURM_ARRAY_TASK_ID in')
+                for task_id, job in enumerate(jobs):
+                    workdir = os.path.abspath(job.workdir)
+                    stdout = os.path.join(workdir, job.stdout)
+                    stderr = os.path.join(workdir, job.stderr)
+                    builder.write_body(
+                        f'    {task_id}) exec >{shlex.quote(stdout)} '
+                        f'2>{shlex.quote(stderr)}; '
+                        f'cd {shlex.quote(workdir)} && '
+                        f'exec bash {shlex.quote(job.script_filename)} ;;'
+                    )
+
+                builder.write_body('esac')
+
+            # sbatch keeps its own copy of the script
+            completed = _run_strict('sbatch %s' % script,
+                                    timeout=sched._job_submit_timeout,
+                                    cwd=dirname)
+        finally:
+            with suppress(OSError):
+                os.remove(script)
+
+        jobid_match = re.search(r'Submitted batch job (?P<jobid>\d+)',
+                                completed.stdout)
+        if not jobid_match:
+            raise JobError(
+                'could not retrieve the job id of the submitted job array')
+
+        jobid = int(jobid_match.group('jobid'))
+        submit_time = datetime.now()
+        for task_id, job in enumerate(jobs):
+            job.jobid = jobid
+            job.scheduler._array_task_id = task_id
+            job.scheduler._submit_time = submit_time
+
     def allnodes(self):
         try:
             completed = _run_strict('scontrol -a show -o nodes')
@@ -263,15 +398,16 @@ class SlurmJobScheduler(sched.JobScheduler):
         return None
 
     def _merge_files(self, job):
-        with os_ext.change_dir(job.workdir):
-            out_glob = glob.glob(job.stdout + '_*')
-            err_glob = glob.glob(job.stderr + '_*')
-            getlogger().debug(
-                'merging job array output files: %s' % ', '.join(out_glob))
-            os_ext.concat_files(job.stdout, *out_glob, overwrite=True)
-            getlogger().debug(
-                'merging job array error files: %s' % ','.join(err_glob))
-            os_ext.concat_files(job.stderr, *err_glob, overwrite=True)
+        stdout = os.path.join(job.workdir, job.stdout)
+        stderr = os.path.join(job.workdir, job.stderr)
+        out_glob = glob.glob(stdout + '_*')
+        err_glob = glob.glob(stderr + '_*')
+        getlogger().debug(
+            'merging job array output files: %s' % ', '.join(out_glob))
+        os_ext.concat_files(stdout, *out_glob, overwrite=True)
+        getlogger().debug(
+            'merging job array error files: %s' % ','.join(err_glob))
+        os_ext.concat_files(stderr, *err_glob, overwrite=True)
 
     def filternodes(self, job, nodes):
         # Collect options that restrict node selection, but we need to first
@@ -374,28 +510,112 @@ class SlurmJobScheduler(sched.JobScheduler):
         if nodespec and nodespec != 'None assigned':
             job.nodelist = [n.name for n in self._get_nodes_by_name(nodespec)]
 
+    @classmethod
+    def _match_states(cls, sacct_output):
+        return list(re.finditer(
+            r'^(?P<jobid>%s)\|(?P<state>\S+)([^\|]*)\|(?P<exitcode>\d+)\:'
+            r'(?P<signal>\d+)\|(?P<nodespec>.*)' % cls._state_patt,
+            sacct_output, re.MULTILINE))
+
+    @classmethod
+    def poll_jobs(cls, jobs):
+        jobs = [j for j in jobs if not slurm_state_completed(j.state)]
+        if not jobs:
+            return
+
+        # Query the state of all the jobs with a single sacct invocation
+        jobs_by_id = {j.scheduler._slurm_jobid(j): j for j in jobs}
+        submit_time = min(j.scheduler._submit_time for j in jobs)
+        try:
+            completed = _run_strict(
+                'sacct -S %s -P -j %s -o jobid,state,exitcode,nodelist' %
+                (submit_time.strftime('%F'), ','.join(jobs_by_id.keys()))
+            )
+        except SpawnedProcessError as e:
+            # Let each job be polled separately
+            getlogger().debug('batched job polling failed: %s' % e)
+            return
+
+        # Job array tasks are reported as <job_id>_<array_task_id>, so index
+        # the polled jobs by their job ids
+        jobids = {}
+        for jobid in jobs_by_id.keys():
+            jobids.setdefault(jobid.split('_')[0], []).append(jobid)
+
+        state_matches = {jobid: [] for jobid in jobs_by_id.keys()}
+        for s in cls._match_states(completed.stdout):
+            reported_jobid = s.group('jobid')
+            for jobid in jobids.get(reported_jobid.split('_')[0], []):
+                if _jobid_matches(reported_jobid, jobid):
+                    state_matches[jobid].append(s)
+
+        # Query the blocking reasons of the pending jobs that are due for
+        # checking with a single squeue invocation
+        reasons = {}
+        for jobid, job in jobs_by_id.items():
+            sched = job.scheduler
+            if sched._is_cancelling or not state_matches[jobid]:
+                continue
+
+            if (sched._update_state_count + 1) % cls.SACCT_SQUEUE_RATIO:
+                continue
+
+            state = ','.join(s.group('state') for s in state_matches[jobid])
+            if slurm_state_pending(state):
+                reasons[jobid] = []
+
+        if reasons:
+            try:
+                completed = _run_strict('squeue -h -j %s -o "%%i|%%r"' %
+                                        ','.join(reasons.keys()))
+            except SpawnedProcessError as e:
+                getlogger().debug('batched job polling failed: %s' % e)
+                return
+
+            for line in completed.stdout.splitlines():
+                reported_jobid, _, reason_descr = line.partition('|')
+                for jobid in reasons.keys():
+                    if _jobid_matches(reported_jobid, jobid):
+                        reasons[jobid].append(reason_descr)
+
+        for jobid, job in jobs_by_id.items():
+            job.scheduler._polled_state = (state_matches[jobid],
+                                           reasons.get(jobid))
+
     def _update_state(self, job):
         '''Check the status of the job.'''
 
-        completed = _run_strict(
-            'sacct -S %s -P -j %s -o jobid,state,exitcode,nodelist' %
-            (self._submit_time.strftime('%F'), job.jobid)
-        )
-        self._update_state_count += 1
+        if self._polled_state is not None:
+            # The job state has been already retrieved by `poll_jobs()`
+            state_match, reasons = self._polled_state
+            self._polled_state = None
+        else:
+            jobid = self._slurm_jobid(job)
+            completed = _run_strict(
+                'sacct -S %s -P -j %s -o jobid,state,exitcode,nodelist' %
+                (self._submit_time.strftime('%F'), jobid)
+            )
+            state_match = [s for s in self._match_states(completed.stdout)
+                           if _jobid_matches(s.group('jobid'), jobid)]
+            reasons = None
+            if not state_match:
+                getlogger().debug(
+                    'job state not matched (stdout follows)\n%s' %
+                    completed.stdout
+                )
 
-        state_match = list(re.finditer(
-            r'^(?P<jobid>%s)\|(?P<state>\S+)([^\|]*)\|(?P<exitcode>\d+)\:'
-            r'(?P<signal>\d+)\|(?P<nodespec>.*)' % self._state_patt,
-            completed.stdout, re.MULTILINE))
+        self._update_state_count += 1
         if not state_match:
-            getlogger().debug('job state not matched (stdout follows)\n%s' %
-                              completed.stdout)
             return
 
         # Join the states with ',' in case of job arrays
         job.state = ','.join(s.group('state') for s in state_match)
         if not self._update_state_count % self.SACCT_SQUEUE_RATIO:
-            self._cancel_if_blocked(job)
+            if reasons is None:
+                self._cancel_if_blocked(job)
+            elif not self._is_cancelling and slurm_state_pending(job.state):
+                for reason_descr in reasons:
+                    self._check_and_cancel(job, reason_descr)
 
         if slurm_state_completed(job.state):
             # Since Slurm exitcodes are positive take the maximum one
@@ -410,7 +630,8 @@ class SlurmJobScheduler(sched.JobScheduler):
         if self._is_cancelling or not slurm_state_pending(job.state):
             return
 
-        completed = _run_strict('squeue -h -j %s -o %%r' % job.jobid)
+        completed = _run_strict('squeue -h -j %s -o %%r' %
+                                self._slurm_jobid(job))
         if not completed.stdout:
             # Can't retrieve job's state. Perhaps it has finished already and
             # does not show up in the output of squeue
@@ -483,8 +704,9 @@ class SlurmJobScheduler(sched.JobScheduler):
             self._merge_files(job)
 
     def cancel(self, job):
-        getlogger().debug('cancelling job (id=%s)' % job.jobid)
-        _run_strict('scancel %s' % job.jobid, timeout=self._job_submit_timeout)
+        jobid = self._slurm_jobid(job)
+        getlogger().debug('cancelling job (id=%s)' % jobid)
+        _run_strict('scancel %s' % jobid, timeout=self._job_submit_timeout)
         self._is_cancelling = True
 
     def finished(self, job):
@@ -534,6 +756,11 @@ class SqueueJobScheduler(SlurmJobScheduler):
     def completion_time(self, job):
         return None
 
+    @classmethod
+    def poll_jobs(cls, jobs):
+        # Job states are retrieved with squeue on a per job basis
+        pass
+
     def _update_state(self, job):
         time_from_submit = datetime.now() - self._submit_time
         rem_wait = self._squeue_delay - time_from_submit.total_seconds()
@@ -544,7 +771,7 @@ class SqueueJobScheduler(SlurmJobScheduler):
         # finished already, squeue might return an error about an invalid
         # job id.
         completed = os_ext.run_command('squeue -h -j %s -o "%%T|%%N|%%r"' %
-                                       job.jobid)
+                                       self._slurm_jobid(job))
         state_match = list(re.finditer(r'^(?P<state>\S+)\|(?P<nodespec>\S*)\|'
                                        r'(?P<reason>.+)', completed.stdout))
         if not state_match:
@@ -577,6 +804,186 @@ class SqueueJobScheduler(SlurmJobScheduler):
         self._cancelled = True
 
 
+class SlurmAllocation:
+    '''A Slurm allocation held for running jobs as its job steps.
+
+    The allocation is acquired with ``salloc --no-shell`` and it is held until
+    it is released. The jobs of the Slurm backends that are created with this
+    allocation are not submitted to the queue; instead, their scripts are run
+    locally with the environment set up so that their parallel launch through
+    ``srun`` becomes a job step of the allocation.
+
+    :arg name: The name of the allocation.
+    :arg num_nodes: The number of nodes to allocate.
+    :arg options: Additional options to pass to ``salloc``.
+    '''
+
+    def __init__(self, name, num_nodes=1, options=None):
+        self._name = name
+        self._num_nodes = num_nodes
+        self._options = list(options or [])
+        self._submit_timeout = rt.runtime().get_option(
+            'schedulers/@slurm/job_submit_timeout'
+        )
+
+        # The job id of the allocation; None if not acquired
+        self.jobid = None
+
+    @property
+    def name(self):
+        return self._name
+
+    def acquire(self):
+        '''Acquire the allocation, waiting until it is granted.'''
+        options = [f'--job-name={self._name}', f'--nodes={self._num_nodes}',
+                   *self._options]
+        try:
+            completed = _run_strict(
+                'salloc --no-shell %s' %
+                ' '.join(shlex.quote(opt) for opt in options)
+            )
+        except SpawnedProcessError as e:
+            raise JobError(
+                f'could not acquire allocation {self._name!r}'
+            ) from e
+        except KeyboardInterrupt:
+            # salloc runs in a session of its own, so it is not interrupted
+            # along with us; withdraw the pending request explicitly
+            with suppress(SpawnedProcessError):
+                _run_strict('scancel --name=%s' % self._name,
+                            timeout=self._submit_timeout)
+
+            raise
+
+        # salloc reports the granted allocation on its standard error
+        jobid_match = re.search(r'Granted job allocation (?P<jobid>\d+)',
+                                completed.stdout + completed.stderr)
+        if not jobid_match:
+            raise JobError(
+                f'could not retrieve the job id of allocation {self._name!r}'
+            )
+
+        self.jobid = int(jobid_match.group('jobid'))
+        getlogger().debug(f'acquired allocation {self._name!r} '
+                          f'(jobid={self.jobid})')
+
+    def release(self):
+        '''Release the allocation, cancelling any job steps still running.'''
+        if self.jobid is None:
+            return
+
+        getlogger().debug(f'releasing allocation {self._name!r} '
+                          f'(jobid={self.jobid})')
+        _run_strict('scancel %s' % self.jobid, timeout=self._submit_timeout)
+        self.jobid = None
+
+    def step_scheduler(self, scheduler):
+        '''Return the scheduler for running a job of ``scheduler`` as a job
+        step of this allocation.
+
+        Only jobs of the Slurm backends may run inside the allocation; for
+        any other scheduler, ``scheduler`` itself is returned.
+        '''
+        if not isinstance(scheduler, SlurmJobScheduler):
+            return scheduler
+
+        return _SlurmStepScheduler(self)
+
+
+class _SlurmStepScheduler(LocalJobScheduler):
+    '''Run a job as a job step of a :class:`SlurmAllocation`.
+
+    The job script runs locally, so that the job is tracked through its
+    process, and ``srun`` picks up the allocation and the resources of the job
+    from the environment set by the preamble. Options passed to the scheduler
+    by the job do not apply to job steps and they are ignored; the allocation
+    is subject to the partition's access options instead.
+    '''
+
+    def __init__(self, allocation):
+        super().__init__()
+        self._allocation = allocation
+
+    def emit_preamble(self, job):
+        if job.time_limit is not None:
+            h, m, s = seconds_to_hms(job.time_limit.total_seconds())
+            time_limit = '%d:%d:%d' % (h, m, s)
+        else:
+            time_limit = None
+
+        if job.use_smt is None:
+            hint = None
+        else:
+            hint = 'multithread' if job.use_smt else 'nomultithread'
+
+        if job.num_tasks_per_node:
+            num_nodes = -(-job.num_tasks // job.num_tasks_per_node)
+        else:
+            num_nodes = None
+
+        # These are the input environment variables of srun that correspond
+        # to the options of the job
+        variables = [
+            ('SLURM_JOB_ID', self._allocation.jobid),
+            ('SLURM_JOB_NAME', job.name),
+            ('SLURM_NTASKS', job.num_tasks),
+            ('SLURM_NNODES', num_nodes),
+            ('SLURM_NTASKS_PER_NODE', job.num_tasks_per_node),
+            ('SLURM_NTASKS_PER_CORE', job.num_tasks_per_core),
+            ('SLURM_NTASKS_PER_SOCKET', job.num_tasks_per_socket),
+            ('SLURM_CPUS_PER_TASK', job.num_cpus_per_task),
+            ('SLURM_TIMELIMIT', time_limit),
+            ('SLURM_HINT', hint)
+        ]
+        return [f'export {name}={shlex.quote(str(value))}'
+                for name, value in variables if value is not None]
+
+    def submit(self, job):
+        if self._allocation.jobid is None:
+            raise JobError(
+                f'allocation {self._allocation.name!r} is not acquired'
+            )
+
+        super().submit(job)
+
+        # The job step may run on any of the nodes of the allocation
+        job.nodelist = None
+
+    def allnodes(self):
+        # Only the nodes of the allocation are available to its job steps
+        if self._allocation.jobid is None:
+            raise JobError(
+                f'allocation {self._allocation.name!r} is not acquired'
+            )
+
+        try:
+            completed = _run_strict(
+                'scontrol show -o job %s' % self._allocation.jobid
+            )
+            nodelist_match = re.search(r'(?<!\S)NodeList=(?P<nodes>\S+)',
+                                       completed.stdout)
+            if not nodelist_match or nodelist_match.group('nodes') == '(null)':
+                raise JobError(
+                    f'could not retrieve the nodes of allocation '
+                    f'{self._allocation.name!r}'
+                )
+
+            completed = _run_strict('scontrol -a show -o node %s' %
+                                    nodelist_match.group('nodes'))
+        except SpawnedProcessError as e:
+            raise JobError(
+                f'could not retrieve the nodes of allocation '
+                f'{self._allocation.name!r}'
+            ) from e
+
+        return _create_nodes(completed.stdout.splitlines())
+
+    def filternodes(self, job, nodes):
+        # The scheduler options of the job do not apply to job steps, so all
+        # the nodes of the allocation are eligible
+        return nodes
+
+
 def _create_nodes(descriptions):
     nodes = set()
     for descr in descriptions:
@@ -21,7 +21,7 @@ class SystemPartition:
 
     def __init__(self, parent, name, scheduler, launcher,
                  descr, access, container_environs, resources,
-                 local_env, environs, max_jobs):
+                 local_env, environs, max_jobs, max_builds):
         self._parent_system = parent
         self._name = name
         self._scheduler = scheduler
@@ -32,6 +32,7 @@ class SystemPartition:
         self._local_env = local_env
         self._environs = environs
         self._max_jobs = max_jobs
+        self._max_builds = max_builds
         self._resources = {r['name']: r['options'] for r in resources}
 
     @property
@@ -95,6 +96,14 @@ class SystemPartition:
         '''
         return self._max_jobs
 
+    @property
+    def max_builds(self):
+        '''The maximum number of concurrent builds allowed on this partition.
+
+        :type: integral
+        '''
+        return self._max_builds
+
     @property
     def name(self):
         '''The name of this partition.
@@ -199,6 +208,7 @@ class SystemPartition:
                           for n, v in self._local_env.variables.items()],
             'environs': [e.name for e in self._environs],
             'max_jobs': self._max_jobs,
+            'max_builds': self._max_builds,
             'resources': [
                 {
                     'name': name,
@@ -291,7 +301,8 @@ class System:
                         modules=site_config.get(f'{partid}/modules'),
                         variables=site_config.get(f'{partid}/variables')
                     ),
-                    max_jobs=site_config.get(f'{partid}/max_jobs')
+                    max_jobs=site_config.get(f'{partid}/max_jobs'),
+                    max_builds=site_config.get(f'{partid}/max_builds')
                 )
             )
 
@@ -35,6 +35,9 @@ def have_tag(patt):
     regex = re_compile(patt)
 
     def _fn(c):
+        if c.tags is None:
+            return True
+
         return any(regex.match(p) for p in c.tags)
 
     return _fn
@@ -44,7 +47,7 @@ def have_prgenv(patt):
     regex = re_compile(patt)
 
     def _fn(c):
-        if '*' in c.valid_prog_environs:
+        if c.valid_prog_environs is None or '*' in c.valid_prog_environs:
             return True
         else:
             return any(regex.match(p) for p in c.valid_prog_environs)
@@ -61,13 +64,13 @@ def have_partition(partitions):
 
 def have_gpu_only():
     def _fn(c):
-        return c.num_gpus_per_node > 0
+        return c.num_gpus_per_node is None or c.num_gpus_per_node > 0
 
     return _fn
 
 
 def have_cpu_only():
     def _fn(c):
-        return c.num_gpus_per_node == 0
+        return c.num_gpus_per_node is None or c.num_gpus_per_node == 0
 
     return _fn
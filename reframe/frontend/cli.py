@@ -3,12 +3,13 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
-import inspect
 import json
 import os
 import re
 import socket
+import sqlite3
 import sys
+import tempfile
 import time
 import traceback
 
@@ -26,16 +27,23 @@ from reframe.core.exceptions import (
     ReframeDeprecationWarning, ReframeFatalError,
     format_exception, SystemAutodetectionError
 )
+from reframe.frontend.discovery import CheckInfo, DiscoveryIndex
 from reframe.frontend.executors import Runner, generate_testcases
 from reframe.frontend.executors.policies import (SerialExecutionPolicy,
                                                  AsynchronousExecutionPolicy)
 from reframe.frontend.loader import RegressionCheckLoader
 from reframe.frontend.printer import PrettyPrinter
+from reframe.frontend.results import ResultsDatabase
+from reframe.frontend.runreport import (RunReportWriter, dump_report,
+                                        load_report)
+from reframe.frontend.timings import TimingDatabase
 
 
 def format_check(check, detailed):
-    lines = ['  - %s (found in %s)' % (check.name,
-                                       inspect.getfile(type(check)))]
+    if not isinstance(check, CheckInfo):
+        check = CheckInfo.from_check(check)
+
+    lines = ['  - %s (found in %s)' % (check.name, check.filename)]
     flex = 'flexible' if check.num_tasks <= 0 else 'standard'
 
     if detailed:
@@ -70,21 +78,154 @@ def list_checks(checks, printer, detailed=False):
     printer.info('\nFound %d check(s).' % len(checks))
 
 
-def generate_report_filename(filepatt):
+def list_sessions(results, printer):
+    printer.info('[List of stored sessions]')
+    sessions = results.sessions()
+    for s in sessions:
+        printer.info(f"- {s['session_id']}: {s.get('time_start')}, "
+                     f"{s.get('num_cases')} case(s), "
+                     f"{s.get('num_failures')} failure(s): {s['cmdline']!r}")
+
+    printer.info(f'\nFound {len(sessions)} session(s).')
+
+
+def list_results(results, name, printer):
+    printer.info(f'[Results of {name!r}]')
+    testcases = results.testcases(name)
+    for tc in testcases:
+        line = (f"- {tc['session_id']}: {tc['time_start']}, "
+                f"{tc['system']}, {tc['environment']}: "
+                f"{tc['result']}")
+        if tc['time_total'] is not None:
+            line += f" ({tc['time_total']:.2f}s)"
+
+        if tc['perfvars']:
+            line += ', ' + ', '.join(f"{p['name']}={p['value']} {p['unit']}"
+                                     for p in tc['perfvars'])
+
+        printer.info(line)
+
+    printer.info(f'\nFound {len(testcases)} test case(s).')
+
+
+def _report_counter_file(filepatt):
+    dirname, basename = os.path.split(filepatt)
+    return os.path.join(dirname, f'.{basename}.counter')
+
+
+def next_report_id(filepatt, min_id=0):
+    '''Reserve the next session id for a report file matching ``filepatt``.
+
+    The next session id is kept in a counter file next to the report files,
+    so that their directory need not be scanned. The report file of the
+    returned id is created empty, so that concurrent sessions never get the
+    same id and no report file of a previous session is overwritten.
+
+    :arg min_id: The minimum session id to return.
+    '''
+    counter_file = _report_counter_file(filepatt)
+    try:
+        with open(counter_file) as fp:
+            sessionid = max(int(fp.read()), min_id)
+    except (OSError, ValueError):
+        sessionid = min_id
+
+    # The counter is only a hint; the report files of sessions that ran
+    # before it was created, or concurrently, are skipped here
+    while True:
+        try:
+            with open(filepatt.format(sessionid=sessionid), 'x'):
+                break
+        except FileExistsError:
+            sessionid += 1
+
+    tmp_counter_file = f'{counter_file}.{os.getpid()}'
+    with open(tmp_counter_file, 'w') as fp:
+        fp.write(str(sessionid + 1))
+
+    os.replace(tmp_counter_file, counter_file)
+    return sessionid
+
+
+def generate_report_filename(filepatt, sessionid=None):
+    '''Generate the name of the report file of a session.
+
+    If ``sessionid`` is :class:`None`, the next session id is reserved with
+    :func:`next_report_id`.
+    '''
     if '{sessionid}' not in filepatt:
         return filepatt
 
-    search_patt = os.path.basename(filepatt).replace('{sessionid}', r'(\d+)')
-    new_id = -1
-    basedir = os.path.dirname(filepatt) or '.'
-    for filename in os.listdir(basedir):
-        match = re.match(search_patt, filename)
-        if match:
-            found_id = int(match.group(1))
-            new_id = max(found_id, new_id)
+    if sessionid is None:
+        sessionid = next_report_id(filepatt)
+
+    return filepatt.format(sessionid=sessionid)
 
-    new_id += 1
-    return filepatt.format(sessionid=new_id)
+
+def parse_num_workers(option, value):
+    try:
+        num_workers = int(value)
+        if num_workers < 0:
+            raise ValueError
+    except ValueError:
+        raise ConfigError(
+            f'{option} is not a non-negative integer: {value}'
+        ) from None
+
+    return num_workers
+
+
+def acquire_allocations(testcases, num_nodes, exec_policy, printer):
+    '''Acquire an allocation for every Slurm partition of the test cases.
+
+    The allocations are stored in the ``sched_allocations`` of
+    ``exec_policy`` as soon as they are created, so that they can all be
+    released, even if acquiring any of them fails.
+    '''
+    from reframe.core.schedulers.slurm import (SlurmAllocation,
+                                               SlurmJobScheduler)
+
+    if exec_policy.force_local:
+        return
+
+    for tc in testcases:
+        partition = tc.partition
+        if (partition.fullname in exec_policy.sched_allocations or
+            tc.check.local or
+            not issubclass(partition.scheduler, SlurmJobScheduler)):
+            continue
+
+        options = list(partition.access)
+        for opt, value in [('account', exec_policy.sched_account),
+                           ('partition', exec_policy.sched_partition),
+                           ('reservation', exec_policy.sched_reservation),
+                           ('nodelist', exec_policy.sched_nodelist),
+                           ('exclude', exec_policy.sched_exclude_nodelist)]:
+            if value:
+                options.append(f'--{opt}={value}')
+
+        # Options meant to be emitted in job scripts do not apply
+        options += [opt for opt in exec_policy.sched_options
+                    if not opt.startswith('#')]
+        allocation = SlurmAllocation(
+            f'rfm_alloc_{partition.name}_{os.getpid()}', num_nodes, options
+        )
+        exec_policy.sched_allocations[partition.fullname] = allocation
+        printer.info(f'Acquiring allocation of {num_nodes} node(s) '
+                     f'for partition {partition.fullname!r}')
+        allocation.acquire()
+        printer.info(f'Granted allocation {allocation.jobid} '
+                     f'for partition {partition.fullname!r}')
+
+
+def release_allocations(exec_policy, printer):
+    '''Release the allocations acquired by :func:`acquire_allocations`.'''
+    for partname, allocation in exec_policy.sched_allocations.items():
+        try:
+            allocation.release()
+        except ReframeError as e:
+            printer.warning(f'could not release the allocation '
+                            f'of partition {partname!r}: {e}')
 
 
 def main():
@@ -144,6 +285,11 @@ def main():
         help='Keep stage directories even for successful checks',
         envvar='RFM_KEEP_STAGE_FILES', configvar='general/keep_stage_files'
     )
+    output_options.add_argument(
+        '--build-cache-dir', action='store', metavar='DIR',
+        help='Cache and reuse build artifacts in DIR',
+        envvar='RFM_BUILD_CACHE_DIR', configvar='general/build_cache_dir'
+    )
     output_options.add_argument(
         '--dont-restage', action='store_false', dest='clean_stagedir',
         help='Reuse the test stage directory',
@@ -160,6 +306,21 @@ def main():
         envvar='RFM_REPORT_FILE',
         configvar='general/report_file'
     )
+    output_options.add_argument(
+        '--report-stream', action='store', metavar='FILE',
+        help='Write the run report incrementally in FILE',
+        envvar='RFM_REPORT_STREAM', configvar='general/report_stream'
+    )
+    output_options.add_argument(
+        '--timings-file', action='store', metavar='FILE',
+        help='Record the durations of the test cases in FILE',
+        envvar='RFM_TIMINGS_FILE', configvar='general/timings_file'
+    )
+    output_options.add_argument(
+        '--results-db', action='store', metavar='FILE',
+        help='Store the results of the session in the database FILE',
+        envvar='RFM_RESULTS_DB', configvar='general/results_db'
+    )
 
     # Check discovery options
     locate_options.add_argument(
@@ -179,6 +340,15 @@ def main():
         envvar='RFM_IGNORE_CHECK_CONFLICTS',
         configvar='general/ignore_check_conflicts'
     )
+    locate_options.add_argument(
+        '--discovery-index', action='store', metavar='FILE',
+        help='Index the tests found in the check search path in FILE',
+        envvar='RFM_DISCOVERY_INDEX', configvar='general/discovery_index'
+    )
+    locate_options.add_argument(
+        '--list-workers', metavar='NUM', action='store', default=0,
+        help='List checks importing them with NUM processes (default: 0)'
+    )
 
     # Select options
     select_options.add_argument(
@@ -222,6 +392,19 @@ def main():
         '-r', '--run', action='store_true',
         help='Run the selected checks'
     )
+    action_options.add_argument(
+        '--list-sessions', action='store_true',
+        help='List the sessions stored in the results database'
+    )
+    action_options.add_argument(
+        '--query-results', action='store', metavar='TEST',
+        help='List the stored results of the test TEST'
+    )
+    action_options.add_argument(
+        '--show-report', action='store', metavar='SESSION',
+        help=('Print the JSON report of the stored session SESSION or of '
+              'the report stream file SESSION')
+    )
 
     # Run options
     run_options.add_argument(
@@ -287,11 +470,26 @@ def main():
         help='Set the maximum number of times a failed regression test '
              'may be retried (default: 0)'
     )
+    run_options.add_argument(
+        '--sanity-workers', metavar='NUM', action='store',
+        help='Evaluate sanity and performance checks using NUM threads '
+             '(default: 0)',
+        envvar='RFM_SANITY_WORKERS', configvar='general/sanity_workers'
+    )
+    run_options.add_argument(
+        '--pack-jobs', action='store_true',
+        help='Submit compatible jobs together, e.g., as job arrays'
+    )
     run_options.add_argument(
         '--flex-alloc-nodes', action='store',
         dest='flex_alloc_nodes', metavar='{all|STATE|NUM}', default=None,
         help='Set strategy for the flexible node allocation (default: "idle").'
     )
+    run_options.add_argument(
+        '--persistent-alloc', action='store', metavar='NUM',
+        help='Hold an allocation of NUM nodes per partition and run the '
+             'tests as job steps inside it (Slurm)'
+    )
     env_options.add_argument(
         '-M', '--map-module', action='append', metavar='MAPPING',
         dest='module_mappings', default=[],
@@ -339,6 +537,11 @@ def main():
         help='Disable coloring of output',
         envvar='RFM_COLORIZE', configvar='general/colorize'
     )
+    misc_options.add_argument(
+        '--config-cache', action='store', metavar='DIR',
+        help='Cache the validation of the configuration in DIR',
+        envvar='RFM_CONFIG_CACHE'
+    )
     misc_options.add_argument(
         '--failure-stats', action='store_true', help='Print failure statistics'
     )
@@ -346,6 +549,10 @@ def main():
         '--performance-report', action='store_true',
         help='Print a report for performance tests'
     )
+    misc_options.add_argument(
+        '--profile-startup', action='store_true',
+        help='Print the time spent in each phase of the startup'
+    )
     misc_options.add_argument(
         '--show-config', action='store', nargs='?', const='all',
         metavar='PARAM',
@@ -400,6 +607,9 @@ def main():
         argparser.print_help()
         sys.exit(1)
 
+    # Time spent in each phase of the startup
+    startup_times = {'import': time.time() - reframe.IMPORT_TIME}
+
     # Parse command line
     options = argparser.parse_args()
 
@@ -443,6 +653,7 @@ def main():
 
     # Now configure ReFrame according to the user configuration file
     try:
+        t_start = time.time()
         try:
             site_config = config.load_config(options.config_file)
         except ReframeDeprecationWarning as e:
@@ -454,7 +665,10 @@ def main():
             )
             site_config = config.load_config(converted)
 
-        site_config.validate()
+        startup_times['configuration loading'] = time.time() - t_start
+        t_start = time.time()
+        site_config.validate(options.config_cache)
+        startup_times['configuration validation'] = time.time() - t_start
         site_config.select_subconfig(options.system)
         for err in options.update_config(site_config):
             printer.warning(str(err))
@@ -477,7 +691,9 @@ def main():
     printer.colorize = site_config.get('general/0/colorize')
     printer.inc_verbosity(site_config.get('general/0/verbose'))
     try:
+        t_start = time.time()
         runtime.init_runtime(site_config)
+        startup_times['runtime initialization'] = time.time() - t_start
     except ConfigError as e:
         printer.error(f'failed to initialize runtime: {e}')
         sys.exit(1)
@@ -520,13 +736,69 @@ def main():
 
         sys.exit(0)
 
+    # Open the results database and query it
+    results_db = site_config.get('general/0/results_db')
+    results = None
+    if results_db:
+        try:
+            results = ResultsDatabase(os_ext.expandvars(results_db))
+        except (OSError, sqlite3.Error) as e:
+            printer.warning(
+                f'could not open results database {results_db!r}: {e}'
+            )
+
+    if options.show_report and not options.show_report.isdigit():
+        # Assemble the report from a report stream
+        try:
+            report = load_report(options.show_report)
+        except ReframeError as e:
+            printer.error(str(e))
+            sys.exit(1)
+
+        printer.info(json.dumps(report, indent=2))
+        sys.exit(0)
+
+    if options.list_sessions or options.query_results or options.show_report:
+        if results is None:
+            printer.error('no results database is available')
+            sys.exit(1)
+
+        if options.list_sessions:
+            list_sessions(results, printer)
+        elif options.query_results:
+            list_results(results, options.query_results, printer)
+        else:
+            report = results.report(int(options.show_report))
+            if report is None:
+                printer.error(f'no such session: {options.show_report}')
+                sys.exit(1)
+
+            printer.info(json.dumps(report, indent=2))
+
+        sys.exit(0)
+
     printer.debug(format_env(options.env_vars))
 
     # Setup the check loader
+    index_file = site_config.get('general/0/discovery_index')
+    if index_file:
+        index = DiscoveryIndex(os_ext.expandvars(index_file))
+    else:
+        index = None
+
+    try:
+        list_workers = parse_num_workers('--list-workers',
+                                         options.list_workers)
+    except ConfigError as e:
+        printer.error(str(e))
+        sys.exit(1)
+
     loader = RegressionCheckLoader(
         load_path=site_config.get('general/0/check_search_path'),
         recurse=site_config.get('general/0/check_search_recursive'),
-        ignore_conflicts=site_config.get('general/0/ignore_check_conflicts')
+        ignore_conflicts=site_config.get('general/0/ignore_check_conflicts'),
+        index=index,
+        list_workers=list_workers
     )
 
     def print_infoline(param, value):
@@ -562,37 +834,26 @@ def main():
     print_infoline('output directory', repr(session_info['prefix_output']))
     printer.info('')
     try:
-        # Locate and load checks
-        try:
-            checks_found = loader.load_all()
-        except OSError as e:
-            raise ReframeError from e
-
-        # Filter checks by name
-        checks_matched = checks_found
-        if options.exclude_names:
-            for name in options.exclude_names:
-                checks_matched = filter(filters.have_not_name(name),
-                                        checks_matched)
+        # Set up the test filters
+        check_filters = []
+        for name in options.exclude_names:
+            check_filters.append(filters.have_not_name(name))
 
         if options.names:
-            checks_matched = filter(filters.have_name('|'.join(options.names)),
-                                    checks_matched)
+            check_filters.append(filters.have_name('|'.join(options.names)))
 
         # Filter checks by tags
         for tag in options.tags:
-            checks_matched = filter(filters.have_tag(tag), checks_matched)
+            check_filters.append(filters.have_tag(tag))
 
         # Filter checks by prgenv
         if not options.skip_prgenv_check:
             for prgenv in options.prgenv:
-                checks_matched = filter(filters.have_prgenv(prgenv),
-                                        checks_matched)
+                check_filters.append(filters.have_prgenv(prgenv))
 
         # Filter checks by system
         if not options.skip_system_check:
-            checks_matched = filter(
-                filters.have_partition(rt.system.partitions), checks_matched)
+            check_filters.append(filters.have_partition(rt.system.partitions))
 
         # Filter checks further
         if options.gpu_only and options.cpu_only:
@@ -601,9 +862,27 @@ def main():
             sys.exit(1)
 
         if options.gpu_only:
-            checks_matched = filter(filters.have_gpu_only(), checks_matched)
+            check_filters.append(filters.have_gpu_only())
         elif options.cpu_only:
-            checks_matched = filter(filters.have_cpu_only(), checks_matched)
+            check_filters.append(filters.have_cpu_only())
+
+        def select(check):
+            return all(fn(check) for fn in check_filters)
+
+        # Locate and load checks; if there is a discovery index, only the
+        # check files with selected tests are imported and, when listing,
+        # not even those that are up to date in the index
+        try:
+            t_start = time.time()
+            checks_found = loader.load_all(
+                select=select,
+                info_only=options.list or options.list_detailed
+            )
+            startup_times['check loading'] = time.time() - t_start
+        except OSError as e:
+            raise ReframeError from e
+
+        checks_matched = filter(select, checks_found)
 
         # Determine the allowed programming environments
         allowed_environs = {e.name
@@ -612,6 +891,7 @@ def main():
                             for e in p.environs if re.match(env_patt, e.name)}
 
         # Generate the test cases, validate dependencies and sort them
+        t_start = time.time()
         checks_matched = list(checks_matched)
         testcases = generate_testcases(checks_matched,
                                        options.skip_system_check,
@@ -620,6 +900,13 @@ def main():
         testgraph = dependency.build_deps(testcases)
         dependency.validate_deps(testgraph)
         testcases = dependency.toposort(testgraph)
+        startup_times['test case generation'] = time.time() - t_start
+        if options.profile_startup:
+            printer.info('[Startup Profile]')
+            for phase, elapsed in startup_times.items():
+                printer.info(f"  {phase + ':':<26} {elapsed:.3f}s")
+
+            printer.info('')
 
         # Manipulate ReFrame's environment
         if site_config.get('general/0/purge_environment'):
@@ -699,6 +986,14 @@ def main():
             exec_policy.strict_check = options.strict
             exec_policy.skip_sanity_check = options.skip_sanity_check
             exec_policy.skip_performance_check = options.skip_performance_check
+            exec_policy.sanity_workers = parse_num_workers(
+                '--sanity-workers',
+                site_config.get('general/0/sanity_workers')
+            )
+
+            if options.exec_policy == 'async':
+                exec_policy.pack_jobs = options.pack_jobs
+
             exec_policy.keep_stage_files = site_config.get(
                 'general/0/keep_stage_files'
             )
@@ -727,19 +1022,99 @@ def main():
                     parsed_job_options.append(f'--{opt}')
 
             exec_policy.sched_options = parsed_job_options
+            alloc_nodes = None
+            if options.persistent_alloc is not None:
+                try:
+                    alloc_nodes = int(options.persistent_alloc)
+                    if alloc_nodes <= 0:
+                        raise ValueError
+                except ValueError:
+                    raise ConfigError(
+                        f'--persistent-alloc is not a positive integer: '
+                        f'{options.persistent_alloc}'
+                    ) from None
+
             try:
                 max_retries = int(options.max_retries)
             except ValueError:
                 raise ConfigError('--max-retries is not a valid integer: %s' %
                                   max_retries) from None
+            # Open the timing database; the expected durations of the test
+            # cases help the asynchronous policy prioritize them
+            timings_file = site_config.get('general/0/timings_file')
+            timings = None
+            if timings_file:
+                try:
+                    timings = TimingDatabase(os_ext.expandvars(timings_file))
+                    if options.exec_policy == 'async':
+                        exec_policy.expected_durations = (
+                            timings.expected_durations()
+                        )
+                except (OSError, sqlite3.Error) as e:
+                    printer.warning(
+                        f'could not open timing database '
+                        f'{timings_file!r}: {e}'
+                    )
+                    timings = None
+
             runner = Runner(exec_policy, printer, max_retries)
+            report_writer = None
+            report_stream_tmp = None
             try:
                 time_start = time.time()
                 session_info['time_start'] = time.strftime(
                     '%FT%T%z', time.localtime(time_start),
                 )
+
+                # Write the report incrementally, so that it is not lost if
+                # the session is killed. The final report is assembled from
+                # the stream, so that the test case entries are not kept in
+                # memory; if no report stream is requested, but a report is
+                # needed, a temporary one is written.
+                report_stream = site_config.get('general/0/report_stream')
+                if report_stream:
+                    report_stream = generate_report_filename(
+                        os.path.normpath(os_ext.expandvars(report_stream))
+                    )
+                elif (results or timings or
+                      rt.get_option('general/0/report_file')):
+                    try:
+                        fd, report_stream_tmp = tempfile.mkstemp(
+                            prefix='rfm-report-', suffix='.jsonl'
+                        )
+                        os.close(fd)
+                    except OSError as e:
+                        printer.debug(
+                            f'failed to create temporary report stream: {e}'
+                        )
+                    else:
+                        report_stream = report_stream_tmp
+
+                if report_stream:
+                    try:
+                        basedir = os.path.dirname(report_stream)
+                        if basedir:
+                            os.makedirs(basedir, exist_ok=True)
+
+                        report_writer = RunReportWriter(report_stream,
+                                                        session_info)
+                    except OSError as e:
+                        printer.warning(
+                            f'failed to generate report stream in '
+                            f'{report_stream!r}: {e}'
+                        )
+                    else:
+                        exec_policy.task_listeners.append(report_writer)
+
+                # Hold the allocations up front, so that the test cases wait
+                # in the queue only once per partition
+                if alloc_nodes:
+                    acquire_allocations(testcases, alloc_nodes,
+                                        exec_policy, printer)
+
                 runner.runall(testcases)
             finally:
+                release_allocations(exec_policy, printer)
                 time_end = time.time()
                 session_info['time_end'] = time.strftime(
                     '%FT%T%z', time.localtime(time_end)
@@ -760,32 +1135,92 @@ def main():
                 if options.performance_report:
                     printer.info(runner.stats.performance_report())
 
-                # Generate the report for this session
-                report_file = os.path.normpath(
-                    os_ext.expandvars(rt.get_option('general/0/report_file'))
-                )
-                basedir = os.path.dirname(report_file)
-                if basedir:
-                    os.makedirs(basedir, exist_ok=True)
-
                 # Build final JSON report
-                run_stats = runner.stats.json()
                 session_info.update({
-                    'num_cases': run_stats[0]['num_cases'],
-                    'num_failures': run_stats[-1]['num_failures']
+                    'num_cases': runner.stats.num_cases(run=0),
+                    'num_failures': len(runner.stats.failures())
                 })
-                json_report = {
-                    'session_info': session_info,
-                    'runs': run_stats
-                }
-                report_file = generate_report_filename(report_file)
-                try:
-                    with open(report_file, 'w') as fp:
-                        json.dump(json_report, fp, indent=2)
-                except OSError as e:
-                    printer.warning(
-                        f'failed to generate report in {report_file!r}: {e}'
+                json_report = None
+                if report_writer:
+                    try:
+                        report_writer.close(session_info)
+                        json_report = load_report(report_stream, lazy=True)
+                    except (OSError, ReframeError) as e:
+                        printer.warning(
+                            f'failed to finish report stream in '
+                            f'{report_stream!r}: {e}'
+                        )
+
+                if json_report is None:
+                    json_report = {
+                        'session_info': session_info,
+                        'runs': runner.stats.json()
+                    }
+
+                # The session ids of the report files follow the ids of the
+                # sessions in the results database, unless a report file
+                # of a previous session has already taken the id
+                report_file = rt.get_option('general/0/report_file')
+                report_id = None
+                if report_file:
+                    report_file = os.path.normpath(
+                        os_ext.expandvars(report_file)
                     )
+                    try:
+                        basedir = os.path.dirname(report_file)
+                        if basedir:
+                            os.makedirs(basedir, exist_ok=True)
+
+                        if '{sessionid}' in report_file:
+                            report_id = next_report_id(
+                                report_file,
+                                results.next_id() if results else 0
+                            )
+                    except (OSError, sqlite3.Error) as e:
+                        printer.warning(
+                            f'failed to generate report in {report_file!r}: '
+                            f'{e}'
+                        )
+                        report_file = None
+
+                # Store the results of this session
+                if results:
+                    try:
+                        results.store(json_report, report_id or 0)
+                    except sqlite3.Error as e:
+                        printer.warning(
+                            f'failed to store results in '
+                            f'{results.filename!r}: {e}'
+                        )
+
+                # Generate the report for this session
+                if report_file:
+                    report_file = generate_report_filename(report_file,
+                                                           report_id)
+                    try:
+                        with open(report_file, 'w') as fp:
+                            dump_report(json_report, fp)
+                    except OSError as e:
+                        printer.warning(
+                            f'failed to generate report in {report_file!r}: '
+                            f'{e}'
+                        )
+
+                # Record the durations of the test cases of this session
+                if timings:
+                    try:
+                        timings.ingest(json_report)
+                    except sqlite3.Error as e:
+                        printer.warning(
+                            f'failed to record timings in '
+                            f'{timings.filename!r}: {e}'
+                        )
+
+                if report_stream_tmp:
+                    try:
+                        os.remove(report_stream_tmp)
+                    except OSError:
+                        pass
 
         else:
             printer.error("No action specified. Please specify `-l'/`-L' for "
@@ -809,6 +1244,7 @@ def main():
         sys.exit(1)
     finally:
         try:
+            logging.flush_logging()
             if site_config.get('general/0/save_log_files'):
                 logging.save_log_files(rt.output_prefix)
 
@@ -8,6 +8,7 @@
 #
 
 import collections
+import heapq
 import itertools
 
 import reframe as rfm
@@ -30,7 +31,7 @@ def build_deps(cases, default_cases=None):
 
         ret = {}
         for c in cases:
-            cname, pname = c.check.name, c.partition.fullname
+            cname, pname = c.check_orig.name, c.partition.fullname
             ret.setdefault((cname, pname), [])
             ret[cname, pname].append(c)
 
@@ -42,7 +43,7 @@ def build_deps(cases, default_cases=None):
 
         ret = {}
         for c in cases:
-            cname = c.check.name
+            cname = c.check_orig.name
             pname = c.partition.fullname
             ename = c.environ.name
             ret.setdefault((cname, pname, ename), c)
@@ -81,10 +82,10 @@ def build_deps(cases, default_cases=None):
     # partitions and environments
     graph = collections.OrderedDict()
     for c in cases:
-        cname = c.check.name
+        cname = c.check_orig.name
         pname = c.partition.fullname
         ename = c.environ.name
-        for dep in c.check.user_deps():
+        for dep in c.check_orig.user_deps():
             tname, how, subdeps = dep
             if how == rfm.DEPEND_FULLY:
                 c.deps.extend(resolve_dep(c, cases_by_part,
@@ -121,16 +122,81 @@ def print_deps(graph):
 
 
 def _reduce_deps(graph):
-    '''Reduce test case graph to a test-only graph.'''
-    ret = {}
-    for case, deps in graph.items():
-        test_deps = util.OrderedSet(d.check.name for d in deps)
+    '''Reduce test case graph to a test-only graph.
+
+    Tests are identified by integer ids assigned in the order they are first
+    encountered in ``graph``; any tests that are only found as dependencies
+    come last. Returns the names of the tests indexed by their id and the
+    adjacency lists of their dependencies.
+    '''
+    ids = {}
+    names = []
+    adj = []
+
+    def node_id(name):
         try:
-            ret[case.check.name] |= test_deps
+            return ids[name]
         except KeyError:
-            ret[case.check.name] = test_deps
+            ids[name] = len(names)
+            names.append(name)
+            adj.append([])
+            return ids[name]
 
-    return ret
+    for case in graph.keys():
+        node_id(case.check_orig.name)
+
+    seen = set()
+    for case, deps in graph.items():
+        u = node_id(case.check_orig.name)
+        for d in deps:
+            v = node_id(d.check_orig.name)
+            if (u, v) not in seen:
+                seen.add((u, v))
+                adj[u].append(v)
+
+    return names, adj
+
+
+def _toposort_ids(names, adj):
+    '''Sort the test ids topologically, so that dependencies come first.
+
+    This is Kahn's algorithm; among the tests that are ready, the one with
+    the lowest id comes first, so that the original order of the tests is
+    preserved as much as possible.
+    '''
+    pending = [len(a) for a in adj]
+    dependents = [[] for _ in names]
+    for u, adjacent in enumerate(adj):
+        for v in adjacent:
+            dependents[v].append(u)
+
+    ready = [u for u, num_pending in enumerate(pending) if num_pending == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        u = heapq.heappop(ready)
+        order.append(u)
+        for w in dependents[u]:
+            pending[w] -= 1
+            if pending[w] == 0:
+                heapq.heappush(ready, w)
+
+    if len(order) == len(names):
+        return order
+
+    # Every test that is left has at least one dependency that is left as
+    # well, so following them from any of these tests leads to a cycle
+    u = next(u for u, num_pending in enumerate(pending) if num_pending)
+    path = []
+    path_pos = {}
+    while u not in path_pos:
+        path_pos[u] = len(path)
+        path.append(u)
+        u = next(v for v in adj[u] if pending[v])
+
+    cycle_str = '->'.join(names[v] for v in path[path_pos[u]:] + [u])
+    raise DependencyError('found cyclic dependency between tests: ' +
+                          cycle_str)
 
 
 def validate_deps(graph):
@@ -142,36 +208,7 @@ def validate_deps(graph):
     # (t0, e1) -> (t1, e1)
     # (t1, e0) -> (t0, e0)
     #
-    test_graph = _reduce_deps(graph)
-
-    # Check for cyclic dependencies in the test name graph
-    visited = set()
-    sources = set(test_graph.keys())
-    path = []
-
-    # Since graph may comprise multiple not connected subgraphs, we search for
-    # cycles starting from all possible sources
-    while sources:
-        unvisited = [(sources.pop(), None)]
-        while unvisited:
-            node, parent = unvisited.pop()
-            while path and path[-1] != parent:
-                path.pop()
-
-            adjacent = test_graph[node]
-            path.append(node)
-            for n in adjacent:
-                if n in path:
-                    cycle_str = '->'.join(path + [n])
-                    raise DependencyError(
-                        'found cyclic dependency between tests: ' + cycle_str)
-
-                if n not in visited:
-                    unvisited.append((n, node))
-
-            visited.add(node)
-
-        sources -= visited
+    _toposort_ids(*_reduce_deps(graph))
 
 
 def toposort(graph, is_subgraph=False):
@@ -179,44 +216,44 @@ def toposort(graph, is_subgraph=False):
 
     If ``is_subgraph`` is ``True``, graph will by treated a subgraph, meaning
     that any dangling edges will be ignored.
-    '''
-    test_deps = _reduce_deps(graph)
-    visited = util.OrderedSet()
-
-    def retrieve(d, key, default):
-        try:
-            return d[key]
-        except KeyError:
-            if is_subgraph:
-                return default
-            else:
-                raise
-
-    def visit(node, path):
-        # We assume an acyclic graph
-        assert node not in path
 
-        path.add(node)
-
-        # Do a DFS visit of all the adjacent nodes
-        for adj in retrieve(test_deps, node, []):
-            if adj not in visited:
-                visit(adj, path)
+    This also sets the ``critical_path`` and the
+    ``num_transitive_dependents`` of the test cases in the graph.
+    '''
+    names, adj = _reduce_deps(graph)
+    order = _toposort_ids(names, adj)
 
-        path.pop()
-        visited.add(node)
+    # Index test cases by test id
+    ids = {name: u for u, name in enumerate(names)}
+    cases_by_id = [[] for _ in names]
+    for c in graph.keys():
+        cases_by_id[ids[c.check_orig.name]].append(c)
 
-    for r in test_deps.keys():
-        if r not in visited:
-            visit(r, util.OrderedSet())
+    if not is_subgraph:
+        for u, cases in enumerate(cases_by_id):
+            if not cases:
+                raise DependencyError(
+                    f'could not resolve dependency to test {names[u]!r}'
+                )
 
-    # Index test cases by test name
-    cases_by_name = {}
-    for c in graph.keys():
-        try:
-            cases_by_name[c.check.name].append(c)
-        except KeyError:
-            cases_by_name[c.check.name] = [c]
+    cases = list(itertools.chain(*(cases_by_id[u] for u in order)))
 
-    return list(itertools.chain(*(retrieve(cases_by_name, n, [])
-                                  for n in visited)))
+    # Compute the critical path and the transitive dependents of every test
+    # case; all the dependents of a test case come after it in the sorted
+    # cases. The transitive dependents are kept as bitsets over the sorted
+    # cases and the bitset of a test case is dropped as soon as it is merged
+    # into the bitsets of its dependencies, so that only the bitsets of the
+    # current frontier of the traversal are alive at any time.
+    for c in cases:
+        c.critical_path = 1
+
+    dependents = {}
+    for i, c in reversed(list(enumerate(cases))):
+        bits = dependents.pop(c, 0)
+        c.num_transitive_dependents = bin(bits).count('1')
+        bits |= 1 << i
+        for d in graph[c]:
+            d.critical_path = max(d.critical_path, c.critical_path + 1)
+            dependents[d] = dependents.get(d, 0) | bits
+
+    return cases
@@ -0,0 +1,356 @@
+# Copyright 2016-2020 Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+#
+# Persistent index of the tests found in check files
+#
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+import tempfile
+
+import reframe
+import reframe.core.runtime as runtime
+import reframe.utility as util
+from reframe.core.logging import getlogger
+
+
+def _hash_file(filename):
+    hasher = hashlib.sha256()
+    with open(filename, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(1 << 20), b''):
+            hasher.update(chunk)
+
+    return hasher.hexdigest()
+
+
+def _file_stamp(filename):
+    st = os.stat(filename)
+    return {
+        'mtime': st.st_mtime_ns,
+        'size': st.st_size,
+        'hash': _hash_file(filename)
+    }
+
+
+def _session_context():
+    '''Hash the settings other than the check files that may affect the
+    attributes of the tests, i.e., the configuration file and the ReFrame
+    environment variables.'''
+    hasher = hashlib.sha256()
+    config_file = runtime.runtime().site_config.filename
+    hasher.update(f'{config_file}\0'.encode())
+    if os.path.isfile(config_file):
+        hasher.update(_hash_file(config_file).encode())
+
+    for name, value in sorted(os.environ.items()):
+        if name.startswith('RFM_'):
+            hasher.update(f'{name}={value}\0'.encode())
+
+    return hasher.hexdigest()
+
+
+def _is_local_file(filename):
+    # Files of the framework, the standard library and the installed
+    # packages are not local
+    prefixes = {sys.prefix, sys.base_prefix, sys.exec_prefix,
+                sys.base_exec_prefix, os.path.dirname(reframe.__file__)}
+    return not any(filename.startswith(os.path.join(p, '')) for p in prefixes)
+
+
+def local_dependencies(module):
+    '''Return the files of the local modules that ``module`` uses.
+
+    These are the modules that are referenced from the namespace of
+    ``module``, either directly or through the objects imported from them,
+    as well as the local modules that these use in turn.
+
+    :returns: A list of absolute file names.
+    '''
+    visited = {module.__name__}
+    pending = [module]
+    deps = []
+    while pending:
+        for value in list(vars(pending.pop()).values()):
+            try:
+                if inspect.ismodule(value):
+                    name = value.__name__
+                else:
+                    name = getattr(value, '__module__', None)
+            except Exception:
+                continue
+
+            if not isinstance(name, str) or name in visited:
+                continue
+
+            visited.add(name)
+            dep = sys.modules.get(name)
+            filename = getattr(dep, '__file__', None)
+            if filename and _is_local_file(os.path.abspath(filename)):
+                deps.append(os.path.abspath(filename))
+                pending.append(dep)
+
+    return deps
+
+
+class CheckInfo:
+    '''The metadata of a regression test as recorded in the discovery index.
+
+    A :class:`CheckInfo` provides the attributes of a
+    :class:`reframe.core.pipeline.RegressionTest` that are needed for
+    filtering, listing and resolving the dependencies of tests, so that these
+    can be carried out without importing the test file.
+
+    The :attr:`valid_systems`, :attr:`valid_prog_environs`,
+    :attr:`num_gpus_per_node` and :attr:`tags` may be :class:`None`, if they
+    are not known yet; the test filters do not exclude tests based on unknown
+    attributes.
+    '''
+
+    def __init__(self, name, filename, descr='', valid_systems=None,
+                 valid_prog_environs=None, modules=None, num_tasks=1,
+                 num_gpus_per_node=None, tags=None, maintainers=None,
+                 deps=None):
+        def _convert(value, typ):
+            return None if value is None else typ(value)
+
+        self.name = name
+        self.filename = filename
+        self.descr = descr
+        self.valid_systems = _convert(valid_systems, list)
+        self.valid_prog_environs = _convert(valid_prog_environs, list)
+        self.modules = list(modules or [])
+        self.num_tasks = num_tasks
+        self.num_gpus_per_node = num_gpus_per_node
+        self.tags = _convert(tags, set)
+        self.maintainers = list(maintainers or [])
+        self._deps = [tuple(d) for d in deps or []]
+
+    @classmethod
+    def from_class(cls, check_cls, name):
+        '''Create the :class:`CheckInfo` of a test that is not instantiated
+        yet from the attributes declared by its class.'''
+        return cls(name, inspect.getfile(check_cls),
+                   valid_systems=check_cls._rfm_valid_systems,
+                   tags=check_cls._rfm_tags)
+
+    @classmethod
+    def from_check(cls, check):
+        return cls(check.name, inspect.getfile(type(check)),
+                   descr=check.descr,
+                   valid_systems=check.valid_systems,
+                   valid_prog_environs=check.valid_prog_environs,
+                   modules=check.modules,
+                   num_tasks=check.num_tasks,
+                   num_gpus_per_node=check.num_gpus_per_node,
+                   tags=check.tags,
+                   maintainers=check.maintainers,
+                   deps=check.user_deps())
+
+    @classmethod
+    def from_json(cls, json_info):
+        return cls(**json_info)
+
+    def json(self):
+        return {
+            'name': self.name,
+            'filename': self.filename,
+            'descr': self.descr,
+            'valid_systems': self.valid_systems,
+            'valid_prog_environs': self.valid_prog_environs,
+            'modules': self.modules,
+            'num_tasks': self.num_tasks,
+            'num_gpus_per_node': self.num_gpus_per_node,
+            'tags': None if self.tags is None else sorted(self.tags),
+            'maintainers': self.maintainers,
+            'deps': self._deps
+        }
+
+    def supports_system(self, name):
+        if self.valid_systems is None:
+            return True
+
+        return runtime.is_system_supported(self.valid_systems, name)
+
+    def supports_environ(self, env_name):
+        if self.valid_prog_environs is None:
+            return True
+
+        return runtime.is_environ_supported(self.valid_prog_environs,
+                                            env_name)
+
+    def user_deps(self):
+        return util.SequenceView(self._deps)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.name!r}, {self.filename!r})'
+
+
+class DiscoveryIndex:
+    '''An on-disk index of the tests defined in check files.
+
+    For every check file, the index records whether it is a valid ReFrame
+    source file and the metadata of the tests it defines on the current
+    system. An entry is valid as long as the modification time and the size
+    of its file and of the local modules that the file uses do not change; if
+    they do, the entry is still valid if the contents of the files hash to the
+    same value. All entries of a system are discarded if the configuration
+    file or the ``RFM_*`` environment variables change.
+
+    :arg filename: The file where the index is stored. If :class:`None`,
+        the index is kept only in memory.
+    '''
+
+    _FORMAT_VERSION = 2
+
+    def __init__(self, filename=None):
+        if filename is not None:
+            filename = os.path.abspath(filename)
+
+        self._filename = filename
+        self._system = runtime.runtime().system.name
+        self._context = _session_context()
+        self._entries = {}
+        self._modified = False
+        self._load()
+
+    @property
+    def filename(self):
+        return self._filename
+
+    def _load(self):
+        if self._filename is None:
+            return
+
+        try:
+            with open(self._filename) as fp:
+                data = json.load(fp)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            getlogger().debug(
+                f'could not read discovery index {self._filename!r}: {e}'
+            )
+            return
+
+        if (data.get('version') != self._FORMAT_VERSION or
+            data.get('reframe_version') != reframe.VERSION):
+            # The metadata of the tests may have changed meaning
+            return
+
+        system_data = data.get('systems', {}).get(self._system, {})
+        if system_data.get('context') != self._context:
+            getlogger().debug(
+                f'discarding the entries of the discovery index '
+                f'{self._filename!r}: the configuration has changed'
+            )
+            return
+
+        self._entries = system_data.get('files', {})
+
+    def _is_up_to_date(self, filename, stamp):
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return False
+
+        if st.st_size != stamp['size']:
+            return False
+
+        if st.st_mtime_ns != stamp['mtime']:
+            if _hash_file(filename) != stamp['hash']:
+                return False
+
+            stamp['mtime'] = st.st_mtime_ns
+            self._modified = True
+
+        return True
+
+    def lookup(self, filename):
+        '''Look up the tests of ``filename`` in the index.
+
+        :returns: :class:`None` if ``filename`` is not in the index or its
+            entry is out of date. Otherwise, a tuple of a boolean indicating
+            whether ``filename`` is a valid ReFrame source file and a list of
+            the :class:`CheckInfo` objects of the tests defined in it.
+        '''
+        filename = os.path.abspath(filename)
+        entry = self._entries.get(filename)
+        if entry is None:
+            return None
+
+        if not self._is_up_to_date(filename, entry['stamp']):
+            return None
+
+        if not all(self._is_up_to_date(f, stamp)
+                   for f, stamp in entry['deps'].items()):
+            return None
+
+        return entry['valid'], [CheckInfo.from_json(t)
+                                for t in entry['tests']]
+
+    def update(self, filename, valid, tests, deps=()):
+        '''Record the tests found in ``filename``.
+
+        :arg valid: Whether ``filename`` is a valid ReFrame source file.
+        :arg tests: The :class:`CheckInfo` objects of the tests defined in
+            ``filename``.
+        :arg deps: The files of the local modules that ``filename`` uses, as
+            returned by :func:`local_dependencies`.
+        '''
+        filename = os.path.abspath(filename)
+        self._entries[filename] = {
+            'stamp': _file_stamp(filename),
+            'deps': {f: _file_stamp(f) for f in deps if f != filename},
+            'valid': valid,
+            'tests': [t.json() for t in tests]
+        }
+        self._modified = True
+
+    def save(self):
+        '''Save the index, if it has been modified.'''
+        if self._filename is None or not self._modified:
+            return
+
+        # Merge our entries with those of the other systems stored in the
+        # index file
+        data = {}
+        try:
+            with open(self._filename) as fp:
+                data = json.load(fp)
+        except (OSError, ValueError):
+            pass
+
+        if (data.get('version') != self._FORMAT_VERSION or
+            data.get('reframe_version') != reframe.VERSION):
+            data = {}
+
+        data['version'] = self._FORMAT_VERSION
+        data['reframe_version'] = reframe.VERSION
+        data.setdefault('systems', {})
+        data['systems'][self._system] = {
+            'context': self._context,
+            'files': self._entries
+        }
+
+        # Write to a temporary file first and move it in place atomically, so
+        # that concurrent sessions never read a partially written index
+        dirname = os.path.dirname(self._filename)
+        try:
+            os.makedirs(dirname, exist_ok=True)
+            fd, tmpfile = tempfile.mkstemp(prefix='.tmp', dir=dirname)
+            with os.fdopen(fd, 'w') as fp:
+                json.dump(data, fp)
+
+            os.replace(tmpfile, self._filename)
+        except OSError as e:
+            getlogger().warning(
+                f'could not save discovery index {self._filename!r}: {e}'
+            )
+        else:
+            self._modified = False
@@ -21,30 +21,44 @@ from reframe.frontend.statistics import TestStats
 
 ABORT_REASONS = (KeyboardInterrupt, ReframeForceExitError, AssertionError)
 
+# Pipeline functions that only query the state of a test; they do not mark the
+# beginning of a new stage
+_POLL_STAGES = ('poll', 'compile_complete')
+
 
 class TestCase:
     '''A combination of a regression check, a system partition
     and a programming environment.
+
+    Partitions and environments are immutable, so they are shared among all
+    the test cases that use them. The check of the test case is copied from
+    the original check the first time it is accessed through :attr:`check`.
     '''
 
     def __init__(self, check, partition, environ):
         self.__check_orig = check
-        self.__check = copy.deepcopy(check)
-        self.__partition = copy.deepcopy(partition)
-        self.__environ = copy.deepcopy(environ)
-        self.__check._case = weakref.ref(self)
+        self.__check = None
+        self.__partition = partition
+        self.__environ = environ
         self.__deps = []
 
         # Incoming dependencies
         self.in_degree = 0
 
+        # Number of test cases in the longest chain of dependents starting at
+        # this test case, including itself
+        self.critical_path = 1
+
+        # Number of test cases that depend on this one, directly or not
+        self.num_transitive_dependents = 0
+
     def __iter__(self):
         # Allow unpacking a test case with a single liner:
         #       c, p, e = case
-        return iter([self.__check, self.__partition, self.__environ])
+        return iter([self.check, self.__partition, self.__environ])
 
     def __hash__(self):
-        return (hash(self.check.name) ^
+        return (hash(self.check_orig.name) ^
                 hash(self.partition.fullname) ^
                 hash(self.environ.name))
 
@@ -52,18 +66,31 @@ class TestCase:
         if not isinstance(other, type(self)):
             return NotImplemented
 
-        return (self.check.name == other.check.name and
+        return (self.check_orig.name == other.check_orig.name and
                 self.environ.name == other.environ.name and
                 self.partition.fullname == other.partition.fullname)
 
     def __repr__(self):
-        return '(%r, %r, %r)' % (self.check.name,
+        return '(%r, %r, %r)' % (self.check_orig.name,
                                  self.partition.fullname, self.environ.name)
 
     @property
     def check(self):
+        if self.__check is None:
+            self.__check = copy.deepcopy(self.__check_orig)
+            self.__check._case = weakref.ref(self)
+
         return self.__check
 
+    @property
+    def check_orig(self):
+        '''The check this test case was generated from.
+
+        This is shared among all the test cases of the check and it must not
+        be modified.
+        '''
+        return self.__check_orig
+
     @property
     def partition(self):
         return self.__partition
@@ -123,6 +150,9 @@ class RegressionTask:
         self._exc_info = (None, None, None)
         self._listeners = list(listeners)
 
+        # Listener notifications held back by hold_events()
+        self._held_events = None
+
         # Reference count for dependent tests; safe to cleanup the test only
         # if it is zero
         self.ref_count = case.num_dependents
@@ -212,6 +242,10 @@ class RegressionTask:
         return self._current_stage in {'finalize', 'cleanup'}
 
     def _notify_listeners(self, callback_name):
+        if self._held_events is not None:
+            self._held_events.append(callback_name)
+            return
+
         for l in self._listeners:
             callback = getattr(l, callback_name)
             callback(self)
@@ -224,7 +258,7 @@ class RegressionTask:
             # we don't want to masquerade the self argument of our containing
             # function
             def __enter__(this):
-                if fn.__name__ != 'poll':
+                if fn.__name__ not in _POLL_STAGES:
                     stage = self._current_stage
                     self._timestamps[f'{stage}_start'] = time.time()
 
@@ -233,7 +267,7 @@ class RegressionTask:
                 self._timestamps[f'{stage}_finish'] = time.time()
                 self._timestamps['pipeline_end'] = time.time()
 
-        if fn.__name__ != 'poll':
+        if fn.__name__ not in _POLL_STAGES:
             self._current_stage = fn.__name__
 
         try:
@@ -256,6 +290,9 @@ class RegressionTask:
     def compile(self):
         self._safe_call(self.check.compile)
 
+    def compile_complete(self):
+        return self._safe_call(self.check.compile_complete)
+
     def compile_wait(self):
         self._safe_call(self.check.compile_wait)
 
@@ -275,6 +312,20 @@ class RegressionTask:
 
         return finished
 
+    def hold_events(self):
+        '''Hold back the notifications of the task listeners.
+
+        This is needed when the task is processed outside the main thread;
+        the held notifications are delivered by :func:`release_events`.
+        '''
+        self._held_events = []
+
+    def release_events(self):
+        '''Deliver any held back notifications to the task listeners.'''
+        events, self._held_events = self._held_events or [], None
+        for callback_name in events:
+            self._notify_listeners(callback_name)
+
     def sanity(self):
         self._safe_call(self.check.sanity)
 
@@ -362,7 +413,7 @@ class Runner:
         return self._stats
 
     def runall(self, testcases):
-        num_checks = len({tc.check.name for tc in testcases})
+        num_checks = len({tc.check_orig.name for tc in testcases})
         self._printer.separator('short double line',
                                 'Running %d check(s)' % num_checks)
         self._printer.timestamp('Started on', 'short double line')
@@ -443,6 +494,7 @@ class ExecutionPolicy(abc.ABC):
         self.skip_environ_check = False
         self.skip_sanity_check = False
         self.skip_performance_check = False
+        self.sanity_workers = 0
         self.keep_stage_files = False
         self.only_environs = None
         self.printer = None
@@ -457,6 +509,10 @@ class ExecutionPolicy(abc.ABC):
         self.sched_exclude_nodelist = None
         self.sched_options = []
 
+        # Allocations to run the jobs of the test cases in, indexed by the
+        # full names of their partitions
+        self.sched_allocations = {}
+
         # Task event listeners
         self.task_listeners = []
         self.stats = None
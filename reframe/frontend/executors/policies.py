@@ -3,16 +3,18 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+import concurrent.futures
 import contextlib
 import functools
+import heapq
 import itertools
 import math
 import sys
-import time
 
 from datetime import datetime
 
-from reframe.core.exceptions import (TaskDependencyError, TaskExit)
+import reframe.core.schedulers as sched
+from reframe.core.exceptions import (JobError, TaskDependencyError, TaskExit)
 from reframe.core.logging import getlogger
 from reframe.frontend.executors import (ExecutionPolicy, RegressionTask,
                                         TaskEventListener, ABORT_REASONS)
@@ -66,7 +68,10 @@ class SerialExecutionPolicy(ExecutionPolicy, TaskEventListener):
                        sched_reservation=self.sched_reservation,
                        sched_nodelist=self.sched_nodelist,
                        sched_exclude_nodelist=self.sched_exclude_nodelist,
-                       sched_options=self.sched_options)
+                       sched_options=self.sched_options,
+                       sched_allocation=self.sched_allocations.get(
+                           partition.fullname
+                       ))
 
             task.compile()
             task.compile_wait()
@@ -173,6 +178,10 @@ class PollRateFunction:
 
 
 class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
+    # Maximum number of ready tasks per partition to gather before scheduling
+    # them, when their jobs are packed
+    _MAX_PACKED_JOBS = 64
+
     def __init__(self):
 
         super().__init__()
@@ -183,17 +192,40 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
         # All currently running tasks
         self._running_tasks = []
 
+        # All tasks currently building
+        self._building_tasks = []
+
         # Tasks that need to be finalized
         self._completed_tasks = []
 
+        # Tasks being evaluated by the sanity workers along with the futures
+        # of their evaluation
+        self._evaluating_tasks = []
+
+        # Thread pool of the sanity workers
+        self._sanity_pool = None
+
         # Retired tasks that need to be cleaned up
         self._retired_tasks = []
 
         # Counts of running tasks per partition
         self._running_tasks_counts = {}
 
-        # Ready tasks to be executed per partition
+        # Counts of building tasks per partition
+        self._building_tasks_counts = {}
+
+        # Ready tasks to be executed per partition; these are heaps of
+        # (priority, sequence number, task) tuples
         self._ready_tasks = {}
+        self._ready_seqno = itertools.count()
+
+        # Expected durations of test cases in seconds, indexed by the names of
+        # their test, partition and environment
+        self.expected_durations = {}
+
+        # Submit the jobs of the tasks scheduled together packed, e.g., as
+        # job arrays, if their scheduler supports it
+        self.pack_jobs = False
 
         # Tasks that are waiting for dependencies
         self._waiting_tasks = []
@@ -201,6 +233,9 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
         # Job limit per partition
         self._max_jobs = {}
 
+        # Build limit per partition
+        self._max_builds = {}
+
         self.task_listeners.append(self)
 
     def _remove_from_running(self, task):
@@ -216,6 +251,62 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
             partname = task.check.current_partition.fullname
             self._running_tasks_counts[partname] -= 1
 
+    def _remove_from_building(self, task):
+        getlogger().debug(
+            'removing task from building list: %s' % task.check.info()
+        )
+        try:
+            self._building_tasks.remove(task)
+        except ValueError:
+            getlogger().debug('not in building tasks')
+        else:
+            partname = task.check.current_partition.fullname
+            self._building_tasks_counts[partname] -= 1
+
+    def _num_free_slots(self, partname):
+        '''Number of tasks that may be rescheduled on a partition.
+
+        Building tasks occupy a job slot, since they will be submitted as
+        soon as they are built.
+        '''
+        num_jobs = (self._running_tasks_counts[partname] +
+                    self._building_tasks_counts[partname])
+        num_builds = self._building_tasks_counts[partname]
+        return max(min(self._max_jobs[partname] - num_jobs,
+                       self._max_builds[partname] - num_builds), 0)
+
+    def _priority(self, task):
+        '''The priority of a ready task; lower values come first.
+
+        Tasks at the head of longer chains of dependent test cases come
+        first, since these chains are the longest to finish. Among these,
+        tasks blocking more test cases, directly or not, and then tasks
+        expected to run longer come first.
+        '''
+        case = task.testcase
+        duration = self.expected_durations.get(
+            (case.check.name, case.partition.fullname, case.environ.name), 0
+        )
+        return (-case.critical_path, -case.num_transitive_dependents,
+                -duration)
+
+    def _push_ready(self, task):
+        partname = task.check.current_partition.fullname
+        heapq.heappush(self._ready_tasks[partname],
+                       (self._priority(task), next(self._ready_seqno), task))
+
+    def _pop_ready(self, partname):
+        *_, task = heapq.heappop(self._ready_tasks[partname])
+        return task
+
+    @contextlib.contextmanager
+    def _packing_jobs(self):
+        if self.pack_jobs:
+            with sched.pack_jobs():
+                yield
+        else:
+            yield
+
     def deps_failed(self, task):
         return any(self._task_index[c].failed for c in task.testcase.deps)
 
@@ -223,8 +314,7 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
         return all(self._task_index[c].succeeded for c in task.testcase.deps)
 
     def on_task_setup(self, task):
-        partname = task.check.current_partition.fullname
-        self._ready_tasks[partname].append(task)
+        self._push_ready(task)
 
     def on_task_run(self, task):
         partname = task.check.current_partition.fullname
@@ -237,6 +327,7 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
             self.printer.status('ERROR', msg, just='right')
         else:
             self._remove_from_running(task)
+            self._remove_from_building(task)
             self.printer.status('FAIL', msg, just='right')
 
         getlogger().verbose(f"==> {task.pipeline_timings_all()}")
@@ -267,7 +358,10 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
                            sched_reservation=self.sched_reservation,
                            sched_nodelist=self.sched_nodelist,
                            sched_exclude_nodelist=self.sched_exclude_nodelist,
-                           sched_options=self.sched_options)
+                           sched_options=self.sched_options,
+                           sched_allocation=self.sched_allocations.get(
+                               task.testcase.partition.fullname
+                           ))
             except TaskExit:
                 return False
             else:
@@ -286,8 +380,10 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
 
         # Set partition-based counters, if not set already
         self._running_tasks_counts.setdefault(partition.fullname, 0)
+        self._building_tasks_counts.setdefault(partition.fullname, 0)
         self._ready_tasks.setdefault(partition.fullname, [])
         self._max_jobs.setdefault(partition.fullname, partition.max_jobs)
+        self._max_builds.setdefault(partition.fullname, partition.max_builds)
 
         task = RegressionTask(case, self.task_listeners)
         self._task_index[case] = task
@@ -309,22 +405,37 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
 
                 return
 
-            if self._running_tasks_counts[partname] >= partition.max_jobs:
-                # Make sure that we still exceeded the job limit
-                getlogger().debug('reached job limit (%s) for partition %s' %
-                                  (partition.max_jobs, partname))
+            if not self._num_free_slots(partname):
+                # Make sure that we still exceeded the job or build limit
+                getlogger().debug(
+                    'reached job limit (%s) or build limit (%s) '
+                    'for partition %s' %
+                    (partition.max_jobs, partition.max_builds, partname)
+                )
                 self._poll_tasks()
 
-            if self._running_tasks_counts[partname] < partition.max_jobs:
-                # Task was put in _ready_tasks during setup
-                self._ready_tasks[partname].pop()
-                self._reschedule(task)
-            else:
+            num_free_slots = self._num_free_slots(partname)
+            if not num_free_slots:
                 self.printer.status('HOLD', task.check.info(), just='right')
+            elif not self.pack_jobs:
+                # Task was put in _ready_tasks during setup; submit the ready
+                # task with the highest priority, which is not necessarily
+                # this one
+                self._reschedule(self._pop_ready(partname))
+            elif (len(self._ready_tasks[partname]) >=
+                  min(num_free_slots, self._MAX_PACKED_JOBS)):
+                # Ready tasks are scheduled in batches, so that their jobs can
+                # be packed; a batch is scheduled as soon as it fills the free
+                # job slots of the partition or reaches the maximum size,
+                # whereas any remaining tasks are scheduled by
+                # _reschedule_all()
+                self._reschedule_ready(partname)
         except TaskExit:
+            # Another task has failed; this task, if it is still ready, is
+            # submitted along with the rest of the ready tasks by priority
             if not task.failed:
                 with contextlib.suppress(TaskExit):
-                    self._reschedule(task)
+                    self._reschedule_ready(partname)
 
             return
         except ABORT_REASONS as e:
@@ -338,11 +449,28 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
 
     def _poll_tasks(self):
         '''Update the counts of running checks per partition.'''
+        self._poll_builds()
         getlogger().debug('updating counts for running test cases')
         getlogger().debug('polling %s task(s)' % len(self._running_tasks))
+
+        # Retrieve the state of all the running jobs in batches, so that
+        # backends can avoid querying the scheduler once per job
+        sched.poll_jobs(t.check.job for t in self._running_tasks
+                        if t.check.job is not None)
         for t in self._running_tasks:
             t.poll()
 
+    def _poll_builds(self):
+        '''Submit the tasks that have finished building.'''
+        getlogger().debug('polling %s build(s)' % len(self._building_tasks))
+        with self._packing_jobs():
+            for t in list(self._building_tasks):
+                with contextlib.suppress(TaskExit):
+                    if t.compile_complete():
+                        self._remove_from_building(t)
+                        t.compile_wait()
+                        t.run()
+
     def _setup_all(self):
         still_waiting = []
         for task in self._waiting_tasks:
@@ -360,18 +488,67 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
                 break
 
             getlogger().debug('finalizing task: %s' % task.check.info())
+            if self.sanity_workers:
+                self._submit_evaluation(task)
+                continue
+
             with contextlib.suppress(TaskExit):
                 self._finalize_task(task)
 
-    def _finalize_task(self, task):
+    def _evaluate_task(self, task):
         if not self.skip_sanity_check:
             task.sanity()
 
         if not self.skip_performance_check:
             task.performance()
 
+    def _finalize_task(self, task):
+        self._evaluate_task(task)
         task.finalize()
 
+    def _submit_evaluation(self, task):
+        '''Evaluate the sanity and performance of a task in a sanity worker.
+
+        The listeners are notified only when the task is finalized by
+        _poll_evaluations(), so that the policy's state is only updated from
+        the main thread.
+        '''
+        if self._sanity_pool is None:
+            self._sanity_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.sanity_workers
+            )
+
+        task.hold_events()
+        future = self._sanity_pool.submit(self._evaluate_task, task)
+        self._evaluating_tasks.append((task, future))
+
+    def _poll_evaluations(self):
+        '''Finalize the tasks that have been evaluated.'''
+        getlogger().debug('polling %s evaluation(s)' %
+                          len(self._evaluating_tasks))
+        evaluating_tasks = []
+        for task, future in self._evaluating_tasks:
+            if not future.done():
+                evaluating_tasks.append((task, future))
+                continue
+
+            task.release_events()
+            with contextlib.suppress(TaskExit):
+                future.result()
+                task.finalize()
+
+        self._evaluating_tasks = evaluating_tasks
+
+    def _shutdown_sanity_pool(self):
+        if self._sanity_pool is None:
+            return
+
+        for _, future in self._evaluating_tasks:
+            future.cancel()
+
+        self._sanity_pool.shutdown(wait=True)
+        self._sanity_pool = None
+
     def _failall(self, cause):
         '''Mark all tests as failures'''
         try:
@@ -380,11 +557,27 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
         except IndexError:
             pass
 
+        while self._building_tasks:
+            task = self._building_tasks.pop()
+            with contextlib.suppress(JobError, OSError):
+                task.check.build_job.cancel()
+
+            task.abort(cause)
+
         for ready_list in self._ready_tasks.values():
             getlogger().debug('ready list size: %s' % len(ready_list))
-            for task in ready_list:
+            for *_, task in ready_list:
+                task.abort(cause)
+
+        # Tasks whose evaluation has already failed are reported with their
+        # own failure and they are not aborted, so as not to report them twice
+        self._shutdown_sanity_pool()
+        for task, _ in self._evaluating_tasks:
+            task.release_events()
+            if not task.failed:
                 task.abort(cause)
 
+        self._evaluating_tasks = []
         for task in itertools.chain(self._waiting_tasks,
                                     self._retired_tasks,
                                     self._completed_tasks):
@@ -393,27 +586,55 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
     def _reschedule(self, task):
         getlogger().debug('scheduling test case for running')
 
+        # The build job is not waited for here; tasks that are still building
+        # will be submitted by _poll_builds() as soon as they are built
         task.compile()
-        task.compile_wait()
-        task.run()
-
-    def _reschedule_all(self):
-        for partname, num_jobs in self._running_tasks_counts.items():
-            assert(num_jobs >= 0)
-            num_empty_slots = self._max_jobs[partname] - num_jobs
-            num_rescheduled = 0
+        if task.compile_complete():
+            task.compile_wait()
+            task.run()
+        else:
+            partname = task.check.current_partition.fullname
+            self._building_tasks_counts[partname] += 1
+            self._building_tasks.append(task)
+
+    def _reschedule_ready(self, partname):
+        '''Reschedule as many ready tasks of a partition as its free job slots
+        allow.'''
+        num_empty_slots = self._num_free_slots(partname)
+        num_rescheduled = 0
+        with self._packing_jobs():
             for _ in range(num_empty_slots):
                 try:
-                    task = self._ready_tasks[partname].pop()
+                    ready = self._pop_ready(partname)
                 except IndexError:
                     break
 
-                self._reschedule(task)
+                self._reschedule(ready)
                 num_rescheduled += 1
 
-            if num_rescheduled:
-                getlogger().debug('rescheduled %s job(s) on %s' %
-                                  (num_rescheduled, partname))
+        if num_rescheduled:
+            getlogger().debug('rescheduled %s job(s) on %s' %
+                              (num_rescheduled, partname))
+
+    def _reschedule_all(self):
+        for partname, num_jobs in self._running_tasks_counts.items():
+            assert(num_jobs >= 0)
+            self._reschedule_ready(partname)
+
+    def _wait_any(self, timeout):
+        '''Wait until any of the running jobs, builds or evaluations finishes
+        or until timeout expires.'''
+        jobs = [t.check.job for t in self._running_tasks
+                if t.check.job is not None]
+        jobs += [t.check.build_job for t in self._building_tasks
+                 if t.check.build_job is not None]
+        if not jobs and self._evaluating_tasks:
+            concurrent.futures.wait(
+                [f for _, f in self._evaluating_tasks], timeout,
+                return_when=concurrent.futures.FIRST_COMPLETED
+            )
+        else:
+            sched.wait_any(jobs, timeout)
 
     def exit(self):
         self.printer.separator('short single line',
@@ -421,13 +642,17 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
         pollrate = PollRateFunction(0.2, 60)
         num_polls = 0
         t_start = datetime.now()
-        while (self._running_tasks or self._waiting_tasks or
-               self._completed_tasks or dictlist_len(self._ready_tasks)):
+        while (self._running_tasks or self._building_tasks or
+               self._waiting_tasks or self._completed_tasks or
+               self._evaluating_tasks or dictlist_len(self._ready_tasks)):
             getlogger().debug('running tasks: %s' % len(self._running_tasks))
-            num_polls += len(self._running_tasks)
+            getlogger().debug('building tasks: %s' %
+                              len(self._building_tasks))
+            num_polls += len(self._running_tasks) + len(self._building_tasks)
             try:
                 self._poll_tasks()
                 self._finalize_all()
+                self._poll_evaluations()
                 self._setup_all()
                 self._reschedule_all()
                 _cleanup_all(self._retired_tasks, not self.keep_stage_files)
@@ -436,13 +661,16 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
                 getlogger().debug(
                     'polling rate (real): %.3f polls/sec' % real_rate)
 
-                if len(self._running_tasks):
+                num_active = (len(self._running_tasks) +
+                              len(self._building_tasks) +
+                              len(self._evaluating_tasks))
+                if num_active:
                     desired_rate = pollrate(t_elapsed, real_rate)
                     getlogger().debug(
                         'polling rate (desired): %.3f' % desired_rate)
-                    t = len(self._running_tasks) / desired_rate
+                    t = num_active / desired_rate
                     getlogger().debug('sleeping: %.3fs' % t)
-                    time.sleep(t)
+                    self._wait_any(t)
 
             except TaskExit:
                 with contextlib.suppress(TaskExit):
@@ -451,5 +679,6 @@ class AsynchronousExecutionPolicy(ExecutionPolicy, TaskEventListener):
                 self._failall(e)
                 raise
 
+        self._shutdown_sanity_pool()
         self.printer.separator('short single line',
                                'all spawned checks have finished\n')
@@ -9,12 +9,16 @@
 
 import ast
 import collections
+import concurrent.futures
+import multiprocessing
 import os
 
 import reframe.utility as util
 import reframe.utility.os_ext as os_ext
 from reframe.core.exceptions import NameConflictError, RegressionTestLoadError
 from reframe.core.logging import getlogger
+from reframe.frontend.discovery import (CheckInfo, DiscoveryIndex,
+                                        local_dependencies)
 
 
 class RegressionCheckValidator(ast.NodeVisitor):
@@ -37,12 +41,31 @@ class RegressionCheckValidator(ast.NodeVisitor):
 
 
 class RegressionCheckLoader:
-    def __init__(self, load_path, recurse=False, ignore_conflicts=False):
+    '''Load the regression tests found in the check search path.
+
+    If a :class:`reframe.frontend.discovery.DiscoveryIndex` is passed, the
+    loader consults it before parsing or importing any check file.
+
+    If ``list_workers`` is greater than zero and the tests are only listed,
+    :func:`load_all` first indexes the check files that are not up to date
+    in the index using a pool of ``list_workers`` processes. If no index is
+    passed, a temporary one is used. The workers only describe the tests, so
+    that they are not used when loading the tests for running them; the
+    check files would have to be imported once more by the loader. The
+    workers are forked from the current process; if the ``fork`` start method
+    is not available on this platform, the check files are loaded
+    sequentially.
+    '''
+
+    def __init__(self, load_path, recurse=False, ignore_conflicts=False,
+                 index=None, list_workers=0):
         # Expand any environment variables and symlinks
         load_path = [os.path.realpath(os_ext.expandvars(p)) for p in load_path]
         self._load_path = os_ext.unique_abs_paths(load_path, recurse)
         self._recurse = recurse
         self._ignore_conflicts = ignore_conflicts
+        self._index = index
+        self._list_workers = list_workers
 
         # Loaded tests by name; maps test names to the file that were defined
         self._loaded = {}
@@ -80,11 +103,26 @@ class RegressionCheckLoader:
     def recurse(self):
         return self._recurse
 
-    def load_from_module(self, module):
-        '''Load user checks from module.
+    @property
+    def index(self):
+        return self._index
+
+    def _register(self, name, testfile):
+        try:
+            conflicted = self._loaded[name]
+        except KeyError:
+            self._loaded[name] = testfile
+            return True
+
+        msg = ("%s: test `%s' already defined in `%s'" %
+               (testfile, name, conflicted))
+        if self._ignore_conflicts:
+            getlogger().warning(msg + '; ignoring...')
+            return False
+        else:
+            raise NameConflictError(msg)
 
-        This method tries to call the `_rfm_gettests()` method of the user
-        check and validates its return value.'''
+    def _module_checks(self, module, select=None):
         from reframe.core.pipeline import RegressionTest
 
         # Warn in case of old syntax
@@ -98,66 +136,176 @@ class RegressionCheckLoader:
         if not hasattr(module, '_rfm_gettests'):
             return []
 
-        candidates = module._rfm_gettests()
+        if select:
+            candidates = module._rfm_gettests(_class_selector(select))
+        else:
+            candidates = module._rfm_gettests()
+
         if not isinstance(candidates, collections.abc.Sequence):
             return []
 
-        ret = []
-        for c in candidates:
-            if not isinstance(c, RegressionTest):
-                continue
-
-            testfile = module.__file__
-            try:
-                conflicted = self._loaded[c.name]
-            except KeyError:
-                self._loaded[c.name] = testfile
-                ret.append(c)
-            else:
-                msg = ("%s: test `%s' already defined in `%s'" %
-                       (testfile, c.name, conflicted))
+        return [c for c in candidates if isinstance(c, RegressionTest)]
 
-                if self._ignore_conflicts:
-                    getlogger().warning(msg + '; ignoring...')
-                else:
-                    raise NameConflictError(msg)
+    def load_from_module(self, module, select=None):
+        '''Load user checks from module.
 
-        return ret
+        This method tries to call the `_rfm_gettests()` method of the user
+        check and validates its return value. Tests that declare their tags or
+        valid systems at the class level are not instantiated, unless
+        ``select`` selects them.'''
+        return [c for c in self._module_checks(module, select)
+                if self._register(c.name, module.__file__)]
+
+    def load_from_file(self, filename, select=None, info_only=False):
+        '''Load the checks defined in ``filename``.
+
+        Tests that declare their tags or valid systems at the class level are
+        instantiated only if ``select`` selects them. If the loader has a
+        discovery index and ``filename`` is up to date in it, ``select`` is
+        also applied to the
+        :class:`reframe.frontend.discovery.CheckInfo` objects of its tests and
+        the file is imported only if any of them is selected. If
+        ``info_only`` is :class:`True`, the selected
+        :class:`reframe.frontend.discovery.CheckInfo` objects are returned
+        instead and the file is not imported at all.
+        '''
+        if self._index is None:
+            if not self._validate_source(filename):
+                return []
+
+            return self.load_from_module(
+                util.import_module_from_file(filename), select
+            )
 
-    def load_from_file(self, filename, **check_args):
-        if not self._validate_source(filename):
+        indexed = self._index.lookup(filename)
+        if indexed is not None:
+            valid, tests = indexed
+            if not valid:
+                return []
+
+            if select:
+                tests = [t for t in tests if select(t)]
+                if not tests:
+                    return []
+
+            if info_only:
+                return [t for t in tests if self._register(t.name, filename)]
+        elif not self._validate_source(filename):
+            self._index.update(filename, False, [])
             return []
 
-        return self.load_from_module(util.import_module_from_file(filename))
+        module = util.import_module_from_file(filename)
+        if indexed is None:
+            # All the tests must be instantiated for indexing them
+            checks = self._module_checks(module)
+            self._index.update(filename, True,
+                               [CheckInfo.from_check(c) for c in checks],
+                               local_dependencies(module))
+        else:
+            checks = self._module_checks(module, select)
 
-    def load_from_dir(self, dirname, recurse=False):
-        checks = []
+        return [c for c in checks if self._register(c.name, module.__file__)]
+
+    def _list_dir(self, dirname, recurse=False):
         for entry in os.scandir(dirname):
             if recurse and entry.is_dir():
-                checks.extend(
-                    self.load_from_dir(entry.path, recurse)
-                )
+                yield from self._list_dir(entry.path, recurse)
 
             if (entry.name.startswith('.') or
                 not entry.name.endswith('.py') or
                 not entry.is_file()):
                 continue
 
-            checks.extend(self.load_from_file(entry.path))
+            yield entry.path
+
+    def load_from_dir(self, dirname, recurse=False, **kwargs):
+        checks = []
+        for filename in self._list_dir(dirname, recurse):
+            checks.extend(self.load_from_file(filename, **kwargs))
 
         return checks
 
-    def load_all(self):
+    def _index_all(self):
+        filenames = []
+        for d in self._load_path:
+            if not os.path.exists(d):
+                continue
+
+            if os.path.isdir(d):
+                filenames += self._list_dir(d, self._recurse)
+            else:
+                filenames.append(d)
+
+        filenames = [f for f in filenames if self._index.lookup(f) is None]
+        if not filenames:
+            return
+
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            getlogger().debug('cannot fork the list workers; '
+                              'loading the check files sequentially')
+            return
+
+        # The workers inherit the runtime of the current process, since the
+        # tests may access it during their construction; the asynchronous
+        # log handlers are reinitialized in the workers upon forking
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=self._list_workers,
+                mp_context=multiprocessing.get_context('fork')) as pool:
+            for f, result in zip(filenames,
+                                 pool.map(_describe_file, filenames)):
+                self._index.update(f, *result)
+
+    def load_all(self, select=None, info_only=False):
         '''Load all checks in self._load_path.
 
-        If a prefix exists, it will be prepended to each path.'''
+        If a prefix exists, it will be prepended to each path. The ``select``
+        and ``info_only`` arguments are passed to :func:`load_from_file`.'''
+        if self._list_workers and info_only:
+            if self._index is None:
+                self._index = DiscoveryIndex()
+
+            self._index_all()
+
         checks = []
         for d in self._load_path:
             if not os.path.exists(d):
                 continue
             if os.path.isdir(d):
-                checks.extend(self.load_from_dir(d, self._recurse))
+                checks.extend(self.load_from_dir(d, self._recurse,
+                                                 select=select,
+                                                 info_only=info_only))
             else:
-                checks.extend(self.load_from_file(d))
+                checks.extend(self.load_from_file(d, select=select,
+                                                  info_only=info_only))
+
+        if self._index is not None:
+            self._index.save()
 
         return checks
+
+
+def _class_selector(select):
+    '''Adapt ``select`` for selecting tests before instantiating them.'''
+
+    def _fn(cls, name):
+        if cls._rfm_tags is None and cls._rfm_valid_systems is None:
+            # The test may set its name in its constructor
+            return True
+
+        return select(CheckInfo.from_class(cls, name))
+
+    return _fn
+
+
+def _describe_file(filename):
+    '''Import ``filename`` and describe its tests.
+
+    This is the function called by the workers of the loader.'''
+    loader = RegressionCheckLoader([])
+    if not loader._validate_source(filename):
+        return False, []
+
+    module = util.import_module_from_file(filename)
+    return (True,
+            [CheckInfo.from_check(c) for c in loader._module_checks(module)],
+            local_dependencies(module))
@@ -0,0 +1,229 @@
+# Copyright 2016-2020 Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+#
+# Indexed store of the results of past sessions
+#
+
+import contextlib
+import json
+import os
+import sqlite3
+
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sessions(
+    id INTEGER PRIMARY KEY,
+    time_start TEXT,
+    time_end TEXT,
+    num_cases INTEGER,
+    num_failures INTEGER,
+    session_info TEXT
+);
+CREATE TABLE IF NOT EXISTS testcases(
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    runid INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    system TEXT,
+    environment TEXT,
+    result TEXT,
+    time_total REAL,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS perfvars(
+    testcase_id INTEGER NOT NULL REFERENCES testcases(id),
+    name TEXT NOT NULL,
+    value REAL,
+    reference REAL,
+    thres_lower REAL,
+    thres_upper REAL,
+    unit TEXT
+);
+CREATE INDEX IF NOT EXISTS testcases_session_index
+    ON testcases(session_id);
+CREATE INDEX IF NOT EXISTS testcases_name_index
+    ON testcases(name, system, environment);
+CREATE INDEX IF NOT EXISTS perfvars_testcase_index
+    ON perfvars(testcase_id);
+'''
+
+
+class ResultsDatabase:
+    '''An SQLite database of the results of past sessions.
+
+    Every session stored in the database is assigned a session id; session
+    ids are increasing and start from zero, unless requested otherwise. For
+    every session, the database stores the session information and the test cases of all its runs,
+    indexed by the name of their test, their partition and their environment,
+    as well as their performance variables. The run report of a session can be
+    reconstructed from the database.
+
+    :arg filename: The SQLite database file; it will be created if it does not
+        exist.
+    '''
+
+    def __init__(self, filename):
+        self._filename = os.path.abspath(filename)
+        os.makedirs(os.path.dirname(self._filename), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @property
+    def filename(self):
+        return self._filename
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self._filename, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def next_id(self):
+        '''Return the id that the next stored session would be assigned.'''
+        with self._connect() as conn:
+            return conn.execute(
+                'SELECT COALESCE(MAX(id) + 1, 0) FROM sessions'
+            ).fetchone()[0]
+
+    def store(self, report, min_id=0):
+        '''Store the run report of a session.
+
+        :arg report: A run report as generated by the ``--report-file``
+            option.
+        :arg min_id: The minimum id to assign to the new session.
+        :returns: The id of the new session.
+        '''
+        session_info = report['session_info']
+        with self._connect() as conn:
+            # Assign the next session id in the same statement that inserts
+            # the session, so that concurrent sessions never get the same id
+            cursor = conn.execute(
+                'INSERT INTO sessions(id, time_start, time_end, num_cases, '
+                'num_failures, session_info) '
+                'SELECT MAX(COALESCE(MAX(id) + 1, 0), ?), ?, ?, ?, ?, ? '
+                'FROM sessions',
+                (min_id, session_info.get('time_start'),
+                 session_info.get('time_end'),
+                 session_info.get('num_cases'),
+                 session_info.get('num_failures'),
+                 json.dumps(session_info))
+            )
+            session_id = cursor.lastrowid
+            for run in report['runs']:
+                for tc in run['testcases']:
+                    cursor = conn.execute(
+                        'INSERT INTO testcases(session_id, runid, name, '
+                        'system, environment, result, time_total, data) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                        (session_id, run['runid'], tc['name'], tc['system'],
+                         tc['environment'], tc['result'], tc['time_total'],
+                         json.dumps(tc))
+                    )
+                    conn.executemany(
+                        'INSERT INTO perfvars(testcase_id, name, value, '
+                        'reference, thres_lower, thres_upper, unit) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        ((cursor.lastrowid, p['name'], p['value'],
+                          p['reference'], p['thres_lower'], p['thres_upper'],
+                          p['unit']) for p in tc['perfvars'] or [])
+                    )
+
+        return session_id
+
+    def sessions(self, limit=None):
+        '''Return the information of the stored sessions, latest first.
+
+        :arg limit: The maximum number of sessions to return; if
+            :class:`None`, all sessions are returned.
+        :returns: A list of the session information dictionaries of the run
+            reports, each one augmented with a ``session_id`` key.
+        '''
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT id, session_info FROM sessions '
+                'ORDER BY id DESC LIMIT ?',
+                (-1 if limit is None else limit,)
+            ).fetchall()
+
+        return [{'session_id': r['id'], **json.loads(r['session_info'])}
+                for r in rows]
+
+    def report(self, session_id):
+        '''Reconstruct the run report of a session.
+
+        :returns: The run report or :class:`None` if there is no such session.
+        '''
+        with self._connect() as conn:
+            session = conn.execute(
+                'SELECT session_info FROM sessions WHERE id = ?',
+                (session_id,)
+            ).fetchone()
+            if session is None:
+                return None
+
+            rows = conn.execute(
+                'SELECT runid, result, data FROM testcases '
+                'WHERE session_id = ? ORDER BY id', (session_id,)
+            ).fetchall()
+
+        runs = []
+        for r in rows:
+            if r['runid'] == len(runs):
+                runs.append({'num_cases': 0, 'num_failures': 0,
+                             'runid': r['runid'], 'testcases': []})
+
+            run = runs[r['runid']]
+            run['num_cases'] += 1
+            if r['result'] == 'failure':
+                run['num_failures'] += 1
+
+            run['testcases'].append(json.loads(r['data']))
+
+        return {
+            'session_info': json.loads(session['session_info']),
+            'runs': runs
+        }
+
+    def testcases(self, name, system=None, environment=None):
+        '''Return the results of the test cases of a test, latest first.
+
+        Only the test cases of the last run of each session are returned.
+
+        :arg name: The name of the test.
+        :arg system: If not :class:`None`, return only the test cases that ran
+            on this partition.
+        :arg environment: If not :class:`None`, return only the test cases
+            that ran with this environment.
+        :returns: A list of the test case entries of the run reports, each one
+            augmented with the ``session_id`` and the ``time_start`` of its
+            session.
+        '''
+        query = ('SELECT t.session_id, s.time_start, t.data '
+                 'FROM testcases AS t JOIN sessions AS s '
+                 'ON t.session_id = s.id '
+                 'WHERE t.name = ? AND t.runid = ('
+                 '    SELECT MAX(runid) FROM testcases '
+                 '    WHERE session_id = t.session_id)')
+        params = [name]
+        if system is not None:
+            query += ' AND t.system = ?'
+            params.append(system)
+
+        if environment is not None:
+            query += ' AND t.environment = ?'
+            params.append(environment)
+
+        query += ' ORDER BY t.id DESC'
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+
+        return [{'session_id': r['session_id'],
+                 'time_start': r['time_start'],
+                 **json.loads(r['data'])} for r in rows]
@@ -0,0 +1,232 @@
+# Copyright 2016-2020 Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+#
+# Incremental run reports
+#
+
+import collections.abc
+import json
+
+import reframe.core.runtime as runtime
+from reframe.core.exceptions import ReframeError
+from reframe.frontend.executors import TaskEventListener
+from reframe.frontend.statistics import testcase_json
+
+
+class RunReportWriter(TaskEventListener):
+    '''Write the run report of a session incrementally.
+
+    The report is written in the JSON Lines format: the first record holds
+    the session information known at the start of the session and every
+    following record holds the report entry of a test case, written as soon
+    as the test case succeeds or fails. If a test case is reported more than
+    once, e.g., because it failed during its cleanup after it had succeeded,
+    its last record supersedes the previous ones. When the session finishes,
+    a final record with the complete session information is written.
+
+    Every record is flushed as soon as it is written, so that the report of a
+    session that is killed contains all the test cases finished so far. The
+    report can be converted to the run report format with
+    :func:`load_report`.
+
+    :arg filename: The file to write the report to.
+    :arg session_info: The session information known at the start of the
+        session.
+    '''
+
+    def __init__(self, filename, session_info):
+        self._fp = open(filename, 'w')
+        self._num_records = 0
+
+        # Record ids of the reported tasks
+        self._task_ids = {}
+        self._write({'type': 'session_start', 'session_info': session_info})
+
+    def _write(self, record):
+        self._fp.write(json.dumps(record) + '\n')
+        self._fp.flush()
+
+    def _write_testcase(self, task):
+        try:
+            recid = self._task_ids[task]
+        except KeyError:
+            recid = self._num_records
+            self._task_ids[task] = recid
+            self._num_records += 1
+
+        self._write({
+            'type': 'testcase',
+            'id': recid,
+            'runid': runtime.runtime().current_run,
+            'testcase': testcase_json(task)
+        })
+
+    def close(self, session_info):
+        '''Write the final session information and close the report.'''
+        self._write({'type': 'session_end', 'session_info': session_info})
+        self._fp.close()
+
+    def on_task_setup(self, task):
+        pass
+
+    def on_task_run(self, task):
+        pass
+
+    def on_task_exit(self, task):
+        pass
+
+    def on_task_failure(self, task):
+        self._write_testcase(task)
+
+    def on_task_success(self, task):
+        self._write_testcase(task)
+
+
+class _ReportTestCases(collections.abc.Sequence):
+    '''The test case entries of a run read from a report on demand.'''
+
+    def __init__(self, filename, offsets):
+        self._filename = filename
+        self._offsets = offsets
+
+    def _read(self, fp, offset):
+        fp.seek(offset)
+        return json.loads(fp.readline())['testcase']
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        with open(self._filename, 'rb') as fp:
+            return self._read(fp, self._offsets[index])
+
+    def __iter__(self):
+        with open(self._filename, 'rb') as fp:
+            for offset in self._offsets:
+                yield self._read(fp, offset)
+
+
+def load_report(filename, lazy=False):
+    '''Load a report written by :class:`RunReportWriter`.
+
+    Reports of sessions that did not finish are loaded as well; their
+    ``num_cases`` and ``num_failures`` reflect only the reported test cases.
+
+    If ``lazy`` is :class:`True`, only the positions of the test case records
+    are kept in memory and the test case entries of every run are read from
+    ``filename`` whenever they are accessed.
+
+    :returns: The report converted to the run report format.
+    :raises reframe.core.exceptions.ReframeError: If ``filename`` is not a
+        valid report.
+    '''
+    session_info = None
+
+    # The offset, the run id and the result of the last record of every
+    # test case
+    testcases = {}
+    invalid_line = None
+    try:
+        with open(filename, 'rb') as fp:
+            lineno = 0
+            while True:
+                offset = fp.tell()
+                line = fp.readline()
+                if not line:
+                    break
+
+                lineno += 1
+                if invalid_line:
+                    raise ReframeError(
+                        f'invalid report {filename!r}: '
+                        f'line {invalid_line[0]}: {invalid_line[1]}'
+                    )
+
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    # This is not an error if this is the last record, since
+                    # the session may have been killed while writing it
+                    invalid_line = (lineno, e)
+                    continue
+
+                if record['type'] == 'testcase':
+                    testcases[record['id']] = (
+                        offset, record['runid'],
+                        record['testcase']['result'] == 'failure'
+                    )
+                else:
+                    session_info = record['session_info']
+    except OSError as e:
+        raise ReframeError(f'could not load report {filename!r}') from e
+
+    if session_info is None:
+        raise ReframeError(f'invalid report {filename!r}: no session info')
+
+    runs = []
+    offsets = []
+    for recid in sorted(testcases):
+        offset, runid, failed = testcases[recid]
+        while runid >= len(runs):
+            runs.append({'num_cases': 0, 'num_failures': 0,
+                         'runid': len(runs), 'testcases': []})
+            offsets.append([])
+
+        runs[runid]['num_cases'] += 1
+        runs[runid]['num_failures'] += failed
+        offsets[runid].append(offset)
+
+    for run, run_offsets in zip(runs, offsets):
+        run['testcases'] = _ReportTestCases(filename, run_offsets)
+        if not lazy:
+            run['testcases'] = list(run['testcases'])
+
+    session_info.setdefault('num_cases', runs[0]['num_cases'] if runs else 0)
+    session_info.setdefault('num_failures',
+                            runs[-1]['num_failures'] if runs else 0)
+    return {'session_info': session_info, 'runs': runs}
+
+
+def _indented_json(obj, level):
+    return json.dumps(obj, indent=2).replace('\n', '\n' + level*'  ')
+
+
+def dump_report(report, fp):
+    '''Write a run report to ``fp`` in JSON.
+
+    The output is the same as that of ``json.dump(report, fp, indent=2)``,
+    but the test case entries are written one at a time, so that the test
+    cases of a report returned by :func:`load_report` with ``lazy=True`` are
+    never loaded in memory all together.
+    '''
+    fp.write('{\n')
+    fp.write('  "session_info": ')
+    fp.write(_indented_json(report['session_info'], 1))
+    fp.write(',\n  "runs": [')
+    for i, run in enumerate(report['runs']):
+        fp.write(',\n    {' if i else '\n    {')
+        for j, (key, value) in enumerate(run.items()):
+            fp.write(',\n' if j else '\n')
+            fp.write(f'      {json.dumps(key)}: ')
+            if key != 'testcases':
+                fp.write(_indented_json(value, 3))
+                continue
+
+            fp.write('[')
+            empty = True
+            for tc in value:
+                fp.write('\n        ' if empty else ',\n        ')
+                fp.write(_indented_json(tc, 4))
+                empty = False
+
+            fp.write(']' if empty else '\n      ]')
+
+        fp.write('\n    }' if run else '}')
+
+    fp.write('\n  ]\n}' if report['runs'] else ']\n}')
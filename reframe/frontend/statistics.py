@@ -7,6 +7,83 @@ import reframe.core.runtime as rt
 from reframe.core.exceptions import format_exception, StatisticsError
 
 
+def testcase_json(task):
+    '''Return the run report entry of the test case of a task.'''
+    check = task.check
+    entry = {
+        'build_stderr': None,
+        'build_stdout': None,
+        'description': check.descr,
+        'environment': None,
+        'fail_reason': None,
+        'fail_phase': None,
+        'jobid': None,
+        'job_stderr': None,
+        'job_stdout': None,
+        'name': check.name,
+        'maintainers': check.maintainers,
+        'nodelist': [],
+        'outputdir': None,
+        'perfvars': None,
+        'result': None,
+        'stagedir': None,
+        'scheduler': None,
+        'system': check.current_system.name,
+        'tags': list(check.tags),
+        'time_compile': task.duration('compile_complete'),
+        'time_performance': task.duration('performance'),
+        'time_run': task.duration('run_complete'),
+        'time_sanity': task.duration('sanity'),
+        'time_setup': task.duration('setup'),
+        'time_total': task.duration('total')
+    }
+    partition = check.current_partition
+    environ = check.current_environ
+    if partition:
+        entry['system'] = partition.fullname
+        entry['scheduler'] = partition.scheduler.registered_name
+
+    if environ:
+        entry['environment'] = environ.name
+
+    if check.job:
+        entry['jobid'] = check.job.jobid
+        entry['job_stderr'] = check.stderr.evaluate()
+        entry['job_stdout'] = check.stdout.evaluate()
+        entry['nodelist'] = check.job.nodelist or []
+
+    if check.build_job:
+        entry['build_stderr'] = check.build_stderr.evaluate()
+        entry['build_stdout'] = check.build_stdout.evaluate()
+
+    if task.failed:
+        entry['result'] = 'failure'
+        entry['stagedir'] = check.stagedir
+        entry['fail_phase'] = task.failed_stage
+        if task.exc_info is not None:
+            entry['fail_reason'] = format_exception(*task.exc_info)
+    else:
+        entry['result'] = 'success'
+        entry['outputdir'] = check.outputdir
+
+    if check.perf_patterns:
+        # Record performance variables
+        entry['perfvars'] = []
+        for key, ref in check.perfvalues.items():
+            var = key.split(':')[-1]
+            val, ref, lower, upper, unit = ref
+            entry['perfvars'].append({
+                'name': var,
+                'reference': ref,
+                'thres_lower': lower,
+                'thres_upper': upper,
+                'unit': unit,
+                'value': val
+            })
+
+    return entry
+
+
 class TestStats:
     '''Stores test case statistics.'''
 
@@ -73,88 +150,10 @@ class TestStats:
             return self._run_data
 
         for runid, run in enumerate(self._alltasks):
-            testcases = []
-            num_failures = 0
-            for t in run:
-                check = t.check
-                partition = check.current_partition
-                entry = {
-                    'build_stderr': None,
-                    'build_stdout': None,
-                    'description': check.descr,
-                    'environment': None,
-                    'fail_reason': None,
-                    'fail_phase': None,
-                    'jobid': None,
-                    'job_stderr': None,
-                    'job_stdout': None,
-                    'name': check.name,
-                    'maintainers': check.maintainers,
-                    'nodelist': [],
-                    'outputdir': None,
-                    'perfvars': None,
-                    'result': None,
-                    'stagedir': None,
-                    'scheduler': None,
-                    'system': check.current_system.name,
-                    'tags': list(check.tags),
-                    'time_compile': t.duration('compile_complete'),
-                    'time_performance': t.duration('performance'),
-                    'time_run': t.duration('run_complete'),
-                    'time_sanity': t.duration('sanity'),
-                    'time_setup': t.duration('setup'),
-                    'time_total': t.duration('total')
-                }
-                partition = check.current_partition
-                environ = check.current_environ
-                if partition:
-                    entry['system'] = partition.fullname
-                    entry['scheduler'] = partition.scheduler.registered_name
-
-                if environ:
-                    entry['environment'] = environ.name
-
-                if check.job:
-                    entry['jobid'] = check.job.jobid
-                    entry['job_stderr'] = check.stderr.evaluate()
-                    entry['job_stdout'] = check.stdout.evaluate()
-                    entry['nodelist'] = check.job.nodelist or []
-
-                if check.build_job:
-                    entry['build_stderr'] = check.build_stderr.evaluate()
-                    entry['build_stdout'] = check.build_stdout.evaluate()
-
-                if t.failed:
-                    num_failures += 1
-                    entry['result'] = 'failure'
-                    entry['stagedir'] = check.stagedir
-                    entry['fail_phase'] = t.failed_stage
-                    if t.exc_info is not None:
-                        entry['fail_reason'] = format_exception(*t.exc_info)
-                else:
-                    entry['result'] = 'success'
-                    entry['outputdir'] = check.outputdir
-
-                if check.perf_patterns:
-                    # Record performance variables
-                    entry['perfvars'] = []
-                    for key, ref in check.perfvalues.items():
-                        var = key.split(':')[-1]
-                        val, ref, lower, upper, unit = ref
-                        entry['perfvars'].append({
-                            'name': var,
-                            'reference': ref,
-                            'thres_lower': lower,
-                            'thres_upper': upper,
-                            'unit': unit,
-                            'value': val
-                        })
-
-                testcases.append(entry)
-
+            testcases = [testcase_json(t) for t in run]
             self._run_data.append({
                 'num_cases': len(run),
-                'num_failures': num_failures,
+                'num_failures': sum(t.failed for t in run),
                 'runid': runid,
                 'testcases': testcases
             })
@@ -165,12 +164,11 @@ class TestStats:
         line_width = 78
         report = [line_width * '=']
         report.append('SUMMARY OF FAILURES')
-        run_report = self.json()[-1]
-        last_run = run_report['runid']
-        for r in run_report['testcases']:
-            if r['result'] == 'success':
-                continue
-
+        last_run = len(self._alltasks) - 1
+        for t in self.failures():
+            # Generate the report entries of the failures only, so that the
+            # entries of all the test cases are not kept in memory
+            r = testcase_json(t)
             retry_info = (
                 f'(for the last of {last_run} retries)' if last_run > 0 else ''
             )
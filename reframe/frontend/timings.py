@@ -0,0 +1,172 @@
+# Copyright 2016-2020 Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+#
+# Persistent store of the durations of test cases across sessions
+#
+
+import collections
+import contextlib
+import os
+import sqlite3
+import statistics
+
+
+# The per-stage durations of a test case as recorded in the run reports
+_STAGES = ('setup', 'compile', 'run', 'sanity', 'performance', 'total')
+
+# Window functions are supported since SQLite 3.25
+_WINDOW_FUNCTIONS = sqlite3.sqlite_version_info >= (3, 25, 0)
+
+
+class TimingDatabase:
+    '''A database of the durations of the test cases run in past sessions.
+
+    The database is an SQLite file, which records the per-stage durations of
+    every test case found in the run reports fed to it. The durations of
+    failed test cases are recorded as well, but they are not taken into
+    account when estimating the expected durations.
+
+    Only the last ``history`` durations of every test case are kept; older
+    ones are removed when new ones are recorded.
+
+    :arg filename: The SQLite database file; it will be created if it does not
+        exist.
+    :arg history: The number of durations to keep per test case.
+    '''
+
+    def __init__(self, filename, history=100):
+        self._filename = os.path.abspath(filename)
+        self._history = history
+        dirname = os.path.dirname(self._filename)
+        os.makedirs(dirname, exist_ok=True)
+        columns = ', '.join(f'time_{s} REAL' for s in _STAGES)
+        with self._connect() as conn:
+            conn.execute(
+                f'CREATE TABLE IF NOT EXISTS timings('
+                f'id INTEGER PRIMARY KEY, session_start TEXT, '
+                f'name TEXT NOT NULL, partition TEXT, environ TEXT, '
+                f'result TEXT, {columns})'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS timings_case_index '
+                'ON timings(name, partition, environ)'
+            )
+
+    @property
+    def filename(self):
+        return self._filename
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self._filename, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def ingest(self, report):
+        '''Record the durations of the test cases of a run report.
+
+        :arg report: A run report as generated by the ``--report-file``
+            option.
+        '''
+        session_start = report['session_info'].get('time_start')
+        rows = []
+        for run in report['runs']:
+            for tc in run['testcases']:
+                rows.append(
+                    (session_start, tc['name'], tc['system'],
+                     tc['environment'], tc['result'],
+                     *(tc[f'time_{s}'] for s in _STAGES))
+                )
+
+        columns = ', '.join(f'time_{s}' for s in _STAGES)
+        placeholders = ', '.join('?' * (len(_STAGES) + 5))
+        with self._connect() as conn:
+            conn.executemany(
+                f'INSERT INTO timings(session_start, name, partition, environ, '
+                f'result, {columns}) VALUES ({placeholders})', rows
+            )
+
+            # Remove the durations beyond the history of the test cases
+            conn.executemany(
+                'DELETE FROM timings '
+                'WHERE name = ? AND partition IS ? AND environ IS ? '
+                'AND id NOT IN ('
+                '    SELECT id FROM timings '
+                '    WHERE name = ? AND partition IS ? AND environ IS ? '
+                '    ORDER BY id DESC LIMIT ?)',
+                (case + case + (self._history,)
+                 for case in {r[1:4] for r in rows})
+            )
+
+    def _check_stage(self, stage):
+        if stage not in _STAGES:
+            raise ValueError(f'unknown stage: {stage!r}')
+
+    def expected_duration(self, name, partition, environ,
+                          stage='run', samples=10):
+        '''Return the expected duration of a test case in seconds.
+
+        This is the median duration of ``stage`` over the last ``samples``
+        successful runs of the test case.
+
+        :returns: The expected duration or :class:`None` if the test case has
+            not been run successfully before.
+        '''
+        self._check_stage(stage)
+        with self._connect() as conn:
+            durations = [
+                d for d, in conn.execute(
+                    f'SELECT time_{stage} FROM timings '
+                    f'WHERE name = ? AND partition = ? AND environ = ? '
+                    f"AND result = 'success' AND time_{stage} IS NOT NULL "
+                    f'ORDER BY id DESC LIMIT ?',
+                    (name, partition, environ, samples)
+                )
+            ]
+
+        return statistics.median(durations) if durations else None
+
+    def expected_durations(self, stage='run', samples=10):
+        '''Return the expected durations of all the known test cases.
+
+        :returns: A dictionary mapping the tuples of the names of the test,
+            the partition and the environment of each test case to its
+            expected duration, as returned by :func:`expected_duration`.
+        '''
+        self._check_stage(stage)
+        condition = f"result = 'success' AND time_{stage} IS NOT NULL"
+        with self._connect() as conn:
+            if _WINDOW_FUNCTIONS:
+                rows = conn.execute(
+                    f'SELECT name, partition, environ, time_{stage} FROM ('
+                    f'    SELECT name, partition, environ, time_{stage}, '
+                    f'    ROW_NUMBER() OVER ('
+                    f'        PARTITION BY name, partition, environ '
+                    f'        ORDER BY id DESC) AS sample '
+                    f'    FROM timings WHERE {condition}) '
+                    f'WHERE sample <= ?', (samples,)
+                ).fetchall()
+            else:
+                rows = []
+                for case in conn.execute(
+                    'SELECT DISTINCT name, partition, environ FROM timings'
+                ).fetchall():
+                    rows += conn.execute(
+                        f'SELECT name, partition, environ, time_{stage} '
+                        f'FROM timings '
+                        f'WHERE name = ? AND partition IS ? AND environ IS ? '
+                        f'AND {condition} ORDER BY id DESC LIMIT ?',
+                        (*case, samples)
+                    ).fetchall()
+
+        durations = collections.defaultdict(list)
+        for *case, d in rows:
+            durations[tuple(case)].append(d)
+
+        return {case: statistics.median(d) for case, d in durations.items()}
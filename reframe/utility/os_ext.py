@@ -27,10 +27,11 @@ from reframe.core.exceptions import (ReframeError, SpawnedProcessError,
 from . import OrderedSet
 
 
-def run_command(cmd, check=False, timeout=None, shell=False, log=True):
+def run_command(cmd, check=False, timeout=None, shell=False, log=True,
+                cwd=None):
     try:
         proc = run_command_async(cmd, shell=shell, start_new_session=True,
-                                 log=log)
+                                 log=log, cwd=cwd)
         proc_stdout, proc_stderr = proc.communicate(timeout=timeout)
     except subprocess.TimeoutExpired as e:
         os.killpg(proc.pid, signal.SIGKILL)
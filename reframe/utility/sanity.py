@@ -4,11 +4,17 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 import builtins
+import codecs
 import collections
+import contextlib
 import glob as pyglob
 import itertools
+import mmap
+import os
 import re
+import string
 import sys
+import threading
 
 import reframe.utility as util
 from reframe.core.deferrable import deferrable, _DeferredExpression
@@ -31,6 +37,230 @@ def _format(s, *args, **kwargs):
 sanity_function = deferrable
 
 
+# Per-thread cache of file contents and glob results and working directory of
+# the sanity functions; they are active only inside a `_file_cache()` context
+_cache_state = threading.local()
+
+
+@contextlib.contextmanager
+def _file_cache(workdir=None):
+    '''Cache the file reads and globs of the sanity functions.
+
+    Inside this context every file is read only once by the sanity functions
+    that examine files, no matter how many patterns are looked up in it, and
+    every pattern is scanned only once per file, no matter how many values are
+    extracted from its matches. Different patterns scan the cached contents
+    of the file separately. The cache is discarded upon exit, so files must
+    not change inside the context.
+
+    :arg workdir: If not :class:`None`, relative file names are resolved
+        against this directory instead of the current working directory.
+
+    :meta private:
+    '''
+    cache_save = builtins.getattr(_cache_state, 'cache', None)
+    workdir_save = builtins.getattr(_cache_state, 'workdir', None)
+    _cache_state.cache = {}
+    _cache_state.workdir = workdir
+    try:
+        yield
+    finally:
+        _cache_state.cache = cache_save
+        _cache_state.workdir = workdir_save
+
+
+def _workdir():
+    workdir = builtins.getattr(_cache_state, 'workdir', None)
+    return workdir or os.getcwd()
+
+
+def _cached(key, fn, *args, **kwargs):
+    cache = builtins.getattr(_cache_state, 'cache', None)
+    if cache is None:
+        return fn(*args, **kwargs)
+
+    try:
+        return cache[key]
+    except KeyError:
+        ret = cache[key] = fn(*args, **kwargs)
+        return ret
+
+
+def _read_file(filename, encoding):
+    with open(filename, 'rt', encoding=encoding) as fp:
+        return fp.read()
+
+
+# Files larger than this size in bytes are scanned through a memory map of
+# their raw contents instead of being read and decoded as a whole
+_MMAP_THRESHOLD = 16 * 1024 * 1024
+
+# Encodings, where an ASCII pattern matches the same characters in the raw
+# bytes as in the decoded text
+_MMAP_ENCODINGS = {'ascii', 'utf-8', 'iso8859-1'}
+
+# Group references and escapes in the templates of `_DecodedMatch.expand()`
+_TEMPLATE_REF = re.compile(r'\\(?:g<([^>]*)>|(0[0-7]{0,2}|[1-9]\d?)|(.))',
+                           re.DOTALL)
+_TEMPLATE_ESCAPES = {
+    'a': '\a', 'b': '\b', 'f': '\f', 'n': '\n',
+    'r': '\r', 't': '\t', 'v': '\v', '\\': '\\'
+}
+
+
+class _DecodedMatch:
+    '''A regex match over the raw bytes of a file that looks like a match of
+    the original string pattern.
+
+    The groups are copied out of the memory map, so that the match remains
+    valid after the map is closed, and they are decoded only when accessed.
+    Positions refer to the raw bytes of the file, so they are the same as in
+    the decoded file only for ASCII files. The :attr:`string` attribute reads
+    and decodes the whole file on first access.
+    '''
+
+    def __init__(self, match, regex, filename, encoding):
+        self.re = regex
+        self.pos = match.pos
+        self.endpos = match.endpos
+        self.lastindex = match.lastindex
+        self.lastgroup = match.lastgroup
+        self.regs = match.regs
+        self._raw_groups = (match.group(0), *match.groups())
+        self._decoded = {}
+        self._filename = filename
+        self._encoding = encoding
+        self._string = None
+
+    def __repr__(self):
+        return '<%s object; span=%r, match=%r>' % (
+            type(self).__name__, self.span(), self.group()
+        )
+
+    @property
+    def string(self):
+        if self._string is None:
+            self._string = _read_file(self._filename, self._encoding)
+
+        return self._string
+
+    def _index(self, group):
+        if isinstance(group, str):
+            group = self.re.groupindex.get(group, -1)
+
+        if not 0 <= group < builtins.len(self._raw_groups):
+            raise IndexError('no such group')
+
+        return group
+
+    def _group(self, index, default=None):
+        raw = self._raw_groups[index]
+        if raw is None:
+            return default
+
+        try:
+            return self._decoded[index]
+        except KeyError:
+            ret = self._decoded[index] = raw.decode(self._encoding,
+                                                    errors='replace')
+            return ret
+
+    def group(self, *groups):
+        if not groups:
+            groups = (0,)
+
+        ret = tuple(self._group(self._index(g)) for g in groups)
+        return ret[0] if builtins.len(ret) == 1 else ret
+
+    def __getitem__(self, group):
+        return self.group(group)
+
+    def groups(self, default=None):
+        return tuple(self._group(i, default)
+                     for i in range(1, builtins.len(self._raw_groups)))
+
+    def groupdict(self, default=None):
+        return {name: self._group(i, default)
+                for name, i in self.re.groupindex.items()}
+
+    def span(self, group=0):
+        return self.regs[self._index(group)]
+
+    def start(self, group=0):
+        return self.span(group)[0]
+
+    def end(self, group=0):
+        return self.span(group)[1]
+
+    def expand(self, template):
+        def _replace(m):
+            name, number, char = m.groups()
+            if char is not None:
+                if char in _TEMPLATE_ESCAPES:
+                    return _TEMPLATE_ESCAPES[char]
+
+                if char in string.ascii_letters:
+                    raise re.error('bad escape \\%s' % char)
+
+                return '\\' + char
+
+            if number and number.startswith('0'):
+                return chr(int(number, 8))
+
+            group = number or name
+            if group.isdigit():
+                group = int(group)
+
+            try:
+                return self.group(group) or ''
+            except IndexError:
+                raise re.error('invalid group reference %s' % group) from None
+
+        return _TEMPLATE_REF.sub(_replace, template)
+
+
+def _mmap_regex(patt, encoding):
+    # Only ASCII patterns that are valid bytes patterns, e.g., that do not
+    # use `\u' escapes, and whose meaning does not depend on the locale are
+    # converted
+    if not isinstance(patt, str):
+        return None
+
+    try:
+        if codecs.lookup(encoding).name not in _MMAP_ENCODINGS:
+            return None
+
+        regex = re.compile(patt.encode('ascii'), re.MULTILINE)
+    except (LookupError, UnicodeEncodeError, re.error):
+        return None
+
+    return None if regex.flags & re.LOCALE else regex
+
+
+def _finditer(patt, filename, encoding):
+    if os.path.getsize(filename) < _MMAP_THRESHOLD:
+        contents = _cached(('file', filename, encoding),
+                           _read_file, filename, encoding)
+        yield from re.finditer(patt, contents, re.MULTILINE)
+        return
+
+    regex = _mmap_regex(patt, encoding)
+    if regex is not None:
+        yield from _finditer_mmap(patt, regex, filename, encoding)
+        return
+
+    # Large files are never kept in the cache
+    yield from re.finditer(patt, _read_file(filename, encoding), re.MULTILINE)
+
+
+def _finditer_mmap(patt, regex, filename, encoding):
+    str_regex = re.compile(patt, re.MULTILINE)
+    with open(filename, 'rb') as fp:
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+            for m in regex.finditer(contents):
+                yield _DecodedMatch(m, str_regex, filename, encoding)
+
+
 # Deferrable versions of selected builtins
 
 @deferrable
@@ -491,10 +721,31 @@ def finditer(patt, filename, encoding='utf-8'):
     This function is equivalent to :func:`findall()` except that it returns
     a generator object instead of a list, which you can use to iterate over
     the raw matches.
+
+    Files larger than 16 MiB are scanned through a memory map of their raw
+    contents, so that they are never loaded into memory as a whole, if
+    ``patt`` is an ASCII string and ``encoding`` is ASCII-compatible. The
+    pattern is then matched against the raw bytes, so its character classes,
+    e.g., ``\\w``, ``\\d`` or ``\\s``, and case-insensitive matching apply
+    only to ASCII characters, as with the `re.ASCII
+    <https://docs.python.org/3/library/re.html#re.ASCII>`_ flag, and
+    carriage returns are not translated to newlines. The matches of such
+    files are not standard regex match objects: their positions refer to the
+    raw bytes of the file, undecodable bytes in their groups are replaced and
+    their ``string`` attribute reads the whole file on first access.
     '''
+    path = os.path.join(_workdir(), filename)
     try:
-        with open(filename, 'rt', encoding=encoding) as fp:
-            yield from re.finditer(patt, fp.read(), re.MULTILINE)
+        if builtins.getattr(_cache_state, 'cache', None) is None:
+            yield from _finditer(patt, path, encoding)
+        else:
+            # Scan the whole file once and share the matches with all the
+            # sanity functions looking for the same pattern in it. Different
+            # patterns are not combined into a single scan: an alternation
+            # loses the literal prefix search of the individual patterns and
+            # its matches cannot overlap, so it is both slower and inexact.
+            key = ('matches', patt, path, encoding)
+            yield from _cached(key, list, _finditer(patt, path, encoding))
     except OSError as e:
         # Re-raise it as sanity error
         raise SanityError('%s: %s' % (filename, e.strerror))
@@ -768,11 +1019,28 @@ def count_uniq(iterable):
 @deferrable
 def glob(pathname, *, recursive=False):
     '''Replacement for the :func:`glob.glob() <python:glob.glob>` function.'''
-    return pyglob.glob(pathname, recursive=recursive)
+    workdir = _workdir()
+    key = ('glob', workdir, pathname, recursive)
+    if workdir == os.getcwd() or os.path.isabs(pathname):
+        return list(_cached(key, pyglob.glob, pathname, recursive=recursive))
+
+    # Resolve the pattern against the working directory of the sanity
+    # functions, but return paths relative to it, as glob.glob() would do
+    matches = _cached(key, pyglob.glob, os.path.join(workdir, pathname),
+                      recursive=recursive)
+    return [os.path.relpath(m, workdir) for m in matches]
 
 
 @deferrable
 def iglob(pathname, recursive=False):
     '''Replacement for the :func:`glob.iglob() <python:glob.iglob>`
     function.'''
-    return pyglob.iglob(pathname, recursive=recursive)
+    workdir = _workdir()
+    if workdir == os.getcwd() or os.path.isabs(pathname):
+        return pyglob.iglob(pathname, recursive=recursive)
+
+    # Resolve the pattern against the working directory of the sanity
+    # functions, but yield paths relative to it, as glob.iglob() would do
+    return (os.path.relpath(m, workdir)
+            for m in pyglob.iglob(os.path.join(workdir, pathname),
+                                  recursive=recursive))
@@ -230,3 +230,23 @@ class CompileFailureCheck(rfm.RegressionTest):
         self.sourcesdir = None
         self.sourcepath = 'x.c'
         self.prebuild_cmds = ['echo foo > x.c']
+
+
+class SleepCompileCheck(rfm.RegressionTest):
+    '''Emulate a test with a long compilation phase.'''
+
+    _next_id = 0
+
+    def __init__(self, sleep_time):
+        self.name = '%s_%s' % (self.name, SleepCompileCheck._next_id)
+        self.local = True
+        self.valid_systems = ['*']
+        self.valid_prog_environs = ['*']
+        self.sourcesdir = None
+        self.sourcepath = 'x.c'
+        self.prebuild_cmds = [
+            'sleep %s' % sleep_time,
+            'echo "int main() { return 0; }" > x.c'
+        ]
+        self.sanity_patterns = sn.assert_found(r'.*', self.stdout)
+        SleepCompileCheck._next_id += 1
@@ -0,0 +1,30 @@
+# Copyright 2016-2020 Swiss National Supercomputing Centre (CSCS/ETH Zurich)
+# ReFrame Project Developers. See the top-level LICENSE file for details.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+#
+# Checks with class-level declarations for testing the test selection before
+# instantiation
+#
+
+import reframe as rfm
+
+
+@rfm.parameterized_test(*([i] for i in range(100)))
+class DeclaredTest(rfm.RunOnlyRegressionTest, tags={'declared'},
+                   valid_systems=['*']):
+    num_instances = 0
+
+    def __init__(self, i):
+        type(self).num_instances += 1
+        self.valid_prog_environs = ['*']
+        self.tags |= {f'variant{i}'}
+
+
+@rfm.simple_test
+class UndeclaredTest(rfm.RunOnlyRegressionTest):
+    def __init__(self):
+        self.name = 'RenamedTest'
+        self.valid_systems = ['*']
+        self.valid_prog_environs = ['*']
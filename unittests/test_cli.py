@@ -4,17 +4,20 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 import itertools
+import json
 import os
 import pathlib
 import pytest
 import re
 import sys
+import tempfile
 from contextlib import redirect_stdout, redirect_stderr, suppress
 from io import StringIO
 
 import reframe.core.config as config
 import reframe.core.environments as env
 import reframe.core.runtime as rt
+import reframe.frontend.statistics as statistics
 import reframe.utility.os_ext as os_ext
 import unittests.fixtures as fixtures
 
@@ -75,10 +78,12 @@ def run_reframe(tmp_path, logfile, perflogdir):
                      perflogdir=str(perflogdir)):
         import reframe.frontend.cli as cli
 
-        # We always pass the --report-file option, because we don't want to
-        # pollute the user's home directory
+        # We always pass the --report-file, --timings-file and --results-db
+        # options, because we don't want to pollute the user's home directory
         argv = ['./bin/reframe', '--prefix', str(tmp_path), '--nocolor',
-                f'--report-file={tmp_path / "report.json"}']
+                f'--report-file={tmp_path / "report.json"}',
+                f'--timings-file={tmp_path / "timings.db"}',
+                f'--results-db={tmp_path / "results.db"}']
         if mode:
             argv += ['--mode', mode]
 
@@ -163,6 +168,222 @@ def test_report_file_with_sessionid(run_reframe, tmp_path):
     assert os.path.exists(tmp_path / 'rfm-report-0.json')
 
 
+def test_results_db(run_reframe, tmp_path):
+    for i in range(2):
+        returncode, *_ = run_reframe(
+            more_options=[
+                f'--report-file={tmp_path / "rfm-report-{sessionid}.json"}'
+            ]
+        )
+        assert returncode == 0
+
+    # The session ids of the reports are assigned by the results database
+    assert os.path.exists(tmp_path / 'rfm-report-0.json')
+    assert os.path.exists(tmp_path / 'rfm-report-1.json')
+
+    returncode, stdout, _ = run_reframe(
+        action=None, more_options=['--list-sessions']
+    )
+    assert returncode == 0
+    assert 'Found 2 session(s)' in stdout
+
+    returncode, stdout, _ = run_reframe(
+        action=None, more_options=['--query-results=hellocheck']
+    )
+    assert returncode == 0
+    assert 'generic:default, builtin-gcc: success' in stdout
+    assert 'Found 2 test case(s)' in stdout
+
+    returncode, stdout, _ = run_reframe(
+        action=None, more_options=['--show-report=1']
+    )
+    assert returncode == 0
+    with open(tmp_path / 'rfm-report-1.json') as fp:
+        assert json.loads(stdout[stdout.index('{'):]) == json.load(fp)
+
+    returncode, stdout, stderr = run_reframe(
+        action=None, more_options=['--show-report=2']
+    )
+    assert returncode == 1
+    assert 'no such session: 2' in stdout + stderr
+
+
+def test_report_stream(run_reframe, tmp_path):
+    returncode, *_ = run_reframe(
+        checkpath=['unittests/resources/checks/frontend_checks.py'],
+        more_options=['-t', 'PerformanceFailureCheck',
+                      f'--report-stream={tmp_path / "report.jsonl"}']
+    )
+    assert returncode == 1
+
+    returncode, stdout, _ = run_reframe(
+        action=None,
+        more_options=[f'--show-report={tmp_path / "report.jsonl"}']
+    )
+    assert returncode == 0
+    report = json.loads(stdout[stdout.index('{'):])
+    with open(tmp_path / 'report.json') as fp:
+        expected_report = json.load(fp)
+
+    assert report['session_info'] == expected_report['session_info']
+    assert len(report['runs']) == len(expected_report['runs'])
+    for run, expected_run in zip(report['runs'], expected_report['runs']):
+        assert run['num_cases'] == expected_run['num_cases']
+        assert run['num_failures'] == expected_run['num_failures']
+
+
+def test_report_from_stream(run_reframe, tmp_path, monkeypatch):
+    # The final report is assembled from a temporary report stream and not
+    # from the test cases kept in memory
+    def _json(self, force=False):
+        assert False, 'the report must be built from the report stream'
+
+    tmpdir = tmp_path / 'tmp'
+    tmpdir.mkdir()
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmpdir))
+    monkeypatch.setattr(statistics.TestStats, 'json', _json)
+    returncode, stdout, stderr = run_reframe(
+        checkpath=['unittests/resources/checks/frontend_checks.py'],
+        more_options=['-t', 'SanityFailureCheck']
+    )
+    assert 'Traceback' not in stdout
+    assert 'Traceback' not in stderr
+    assert returncode == 1
+    with open(tmp_path / 'report.json') as fp:
+        report = json.load(fp)
+
+    assert report['session_info']['num_cases'] == 1
+    assert report['session_info']['num_failures'] == 1
+    assert len(report['runs'][0]['testcases']) == 1
+    assert report['runs'][0]['testcases'][0]['result'] == 'failure'
+    assert os.listdir(tmpdir) == []
+
+
+def test_results_db_keeps_reports(run_reframe, tmp_path):
+    # The reports of previous sessions are not overwritten by the sessions
+    # stored in a new results database
+    for i in range(2):
+        (tmp_path / f'rfm-report-{i}.json').write_text('old')
+
+    returncode, *_ = run_reframe(
+        more_options=[
+            f'--report-file={tmp_path / "rfm-report-{sessionid}.json"}'
+        ]
+    )
+    assert returncode == 0
+    assert 'old' == (tmp_path / 'rfm-report-0.json').read_text()
+    assert 'old' == (tmp_path / 'rfm-report-1.json').read_text()
+    assert os.path.exists(tmp_path / 'rfm-report-2.json')
+
+    returncode, stdout, _ = run_reframe(
+        action=None, more_options=['--show-report=2']
+    )
+    assert returncode == 0
+    with open(tmp_path / 'rfm-report-2.json') as fp:
+        assert json.loads(stdout[stdout.index('{'):]) == json.load(fp)
+
+
+def test_next_report_id(tmp_path, monkeypatch):
+    import reframe.frontend.cli as cli
+
+    filepatt = str(tmp_path / 'rfm-report-{sessionid}.json')
+    (tmp_path / 'rfm-report-0.json').write_text('old')
+    assert cli.next_report_id(filepatt) == 1
+    assert cli.next_report_id(filepatt) == 2
+    assert cli.next_report_id(filepatt, min_id=5) == 5
+    assert 'old' == (tmp_path / 'rfm-report-0.json').read_text()
+
+    # The directory of the report files is not scanned; the next id is read
+    # from the counter file
+    def _listdir(path):
+        assert False, 'the report directory must not be listed'
+
+    monkeypatch.setattr(os, 'listdir', _listdir)
+    monkeypatch.setattr(os, 'scandir', _listdir)
+    assert cli.next_report_id(filepatt) == 6
+    assert os.path.exists(tmp_path / 'rfm-report-6.json')
+
+
+def test_timings_file(run_reframe, tmp_path):
+    from reframe.frontend.timings import TimingDatabase
+
+    for i in range(2):
+        returncode, *_ = run_reframe(more_options=['--exec-policy=async'])
+        assert returncode == 0
+
+    timings = TimingDatabase(tmp_path / 'timings.db')
+    durations = timings.expected_durations()
+    assert len(durations) == 1
+    (name, partition, environ), duration = durations.popitem()
+    assert name == 'hellocheck'
+    assert partition == 'generic:default'
+    assert environ == 'builtin-gcc'
+    assert duration == timings.expected_duration(name, partition, environ)
+    assert duration > 0
+    assert timings.expected_duration('foo', partition, environ) is None
+    with pytest.raises(ValueError):
+        timings.expected_durations(stage='foo')
+
+
+def test_timings_file_disabled(run_reframe, tmp_path):
+    returncode, *_ = run_reframe(more_options=['--exec-policy=async',
+                                               '--timings-file='])
+    assert returncode == 0
+    assert not os.path.exists(tmp_path / 'timings.db')
+
+
+def test_timings_history(tmp_path, monkeypatch):
+    import reframe.frontend.timings as timings_mod
+
+    def _report(*durations, result='success'):
+        return {
+            'session_info': {'time_start': 'now'},
+            'runs': [{
+                'testcases': [
+                    {'name': name, 'system': 'sys:part',
+                     'environment': 'env', 'result': result,
+                     **{f'time_{s}': d for s in timings_mod._STAGES}}
+                    for name, d in durations
+                ]
+            }]
+        }
+
+    timings = timings_mod.TimingDatabase(tmp_path / 'timings.db', history=4)
+    for i in range(6):
+        timings.ingest(_report(('foo', i), ('bar', 10 + i)))
+
+    timings.ingest(_report(('foo', 100), result='failure'))
+    for window_functions in (True, False):
+        monkeypatch.setattr(timings_mod, '_WINDOW_FUNCTIONS',
+                            window_functions)
+        assert {
+            ('foo', 'sys:part', 'env'): 4,
+            ('bar', 'sys:part', 'env'): 14
+        } == timings.expected_durations(samples=3)
+
+    # Only the last durations of every test case are kept
+    with timings._connect() as conn:
+        assert [('bar', 4), ('foo', 4)] == conn.execute(
+            'SELECT name, COUNT(*) FROM timings GROUP BY name ORDER BY name'
+        ).fetchall()
+
+
+def test_profile_startup(run_reframe, tmp_path):
+    returncode, stdout, _ = run_reframe(
+        action='list',
+        more_options=['--profile-startup',
+                      f'--config-cache={tmp_path / "config-cache"}']
+    )
+    assert returncode == 0
+    assert '[Startup Profile]' in stdout
+    for phase in ('import', 'configuration loading',
+                  'configuration validation', 'runtime initialization',
+                  'check loading', 'test case generation'):
+        assert f'  {phase}:' in stdout
+
+    assert os.listdir(tmp_path / 'config-cache')
+
+
 def test_check_submit_success(run_reframe, remote_exec_ctx):
     # This test will run on the auto-detected system
     partition, environ = remote_exec_ctx
@@ -471,6 +692,60 @@ def test_list_with_details(run_reframe):
     assert returncode == 0
 
 
+def test_list_with_discovery_index(run_reframe, tmp_path):
+    index_file = tmp_path / 'index.json'
+    outputs = []
+    for _ in range(2):
+        returncode, stdout, stderr = run_reframe(
+            checkpath=['unittests/resources/checks/frontend_checks.py'],
+            action='list_detailed',
+            more_options=[f'--discovery-index={index_file}']
+        )
+        assert 'Traceback' not in stdout
+        assert 'Traceback' not in stderr
+        assert returncode == 0
+        outputs.append(stdout[stdout.index('[List of matched checks]'):])
+
+    assert os.path.exists(index_file)
+    assert outputs[0] == outputs[1]
+
+
+def test_list_with_list_workers(run_reframe):
+    returncode, stdout, stderr = run_reframe(
+        checkpath=['unittests/resources/checks'],
+        action='list',
+        more_options=['-R', '--list-workers=2']
+    )
+    assert 'Traceback' not in stdout
+    assert 'Traceback' not in stderr
+    assert 'Found 0 check(s)' not in stdout
+    assert returncode == 0
+
+
+def test_negative_num_workers(run_reframe):
+    for option in ('--list-workers=-1', '--sanity-workers=-1'):
+        returncode, stdout, stderr = run_reframe(
+            checkpath=['unittests/resources/checks/frontend_checks.py'],
+            more_options=['-n', 'PerformanceFailureCheck', option]
+        )
+        assert 'is not a non-negative integer' in stdout
+        assert 'Traceback' not in stdout
+        assert 'Traceback' not in stderr
+        assert returncode != 0
+
+
+def test_sanity_workers_envvar(run_reframe, monkeypatch):
+    monkeypatch.setenv('RFM_SANITY_WORKERS', '-1')
+    returncode, stdout, stderr = run_reframe(
+        checkpath=['unittests/resources/checks/frontend_checks.py'],
+        more_options=['-n', 'PerformanceFailureCheck']
+    )
+    assert '--sanity-workers is not a non-negative integer: -1' in stdout
+    assert 'Traceback' not in stdout
+    assert 'Traceback' not in stderr
+    assert returncode != 0
+
+
 def test_show_config_all(run_reframe):
     # Just make sure that this option does not make the frontend crash
     returncode, stdout, stderr = run_reframe(
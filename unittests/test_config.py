@@ -4,6 +4,7 @@
 # SPDX-License-Identifier: BSD-3-Clause
 
 import json
+import jsonschema
 import os
 import pytest
 
@@ -127,6 +128,25 @@ def test_validate_config_duplicate_partitions():
         site_config.validate()
 
 
+def test_validate_cached(tmp_path, monkeypatch):
+    site_config = config.load_config('unittests/resources/settings.py')
+    site_config.validate(tmp_path)
+    assert len(os.listdir(tmp_path)) == 1
+
+    # The cached validation is reused
+    def _validate(*args, **kwargs):
+        raise AssertionError('configuration validated again')
+
+    monkeypatch.setattr(jsonschema, 'validate', _validate)
+    site_config = config.load_config('unittests/resources/settings.py')
+    site_config.validate(tmp_path)
+
+    # but not if the configuration changes
+    site_config['systems'][0]['descr'] = 'foo'
+    with pytest.raises(AssertionError):
+        site_config.validate(tmp_path)
+
+
 def test_select_subconfig_autodetect():
     site_config = config.load_config('reframe/core/settings.py')
     site_config.select_subconfig()
@@ -300,6 +320,29 @@ def test_sticky_options():
     assert site_config.get('environments/@PrgEnv-cray/cc') == 'cc'
 
 
+def test_select_subconfig_cached():
+    site_config = config.load_config('unittests/resources/settings.py')
+    site_config.select_subconfig('testsys:gpu')
+    gpu_systems = site_config['systems']
+    assert site_config.get('systems/0/partitions/0/name') == 'gpu'
+    site_config.select_subconfig('testsys:login')
+    assert site_config.get('systems/0/partitions/0/name') == 'login'
+
+    # Switching back to a partition does not rebuild its configuration
+    site_config.select_subconfig('testsys:gpu')
+    assert site_config['systems'] is gpu_systems
+    assert site_config.get('systems/0/partitions/0/name') == 'gpu'
+
+    # Memoized options are invalidated by sticky options
+    assert site_config.get('general/0/verbose') == 0
+    site_config.add_sticky_option('general/verbose', 2)
+    assert site_config.get('general/0/verbose') == 2
+    site_config.remove_sticky_option('general/verbose')
+    assert site_config.get('general/0/verbose') == 0
+    assert site_config.get('foo/0/bar', 'default') == 'default'
+    assert site_config.get('/foo', 'default') == 'default'
+
+
 def test_system_create():
     site_config = config.load_config('unittests/resources/settings.py')
     site_config.select_subconfig('testsys:gpu')
@@ -327,6 +370,7 @@ def test_system_create():
     assert partition.local_env.modules == ['foogpu']
     assert partition.local_env.variables == {'FOO_GPU': 'yes'}
     assert partition.max_jobs == 10
+    assert partition.max_builds == 8
     assert len(partition.environs) == 2
     assert partition.environment('PrgEnv-gnu').cc == 'cc'
     assert partition.environment('PrgEnv-gnu').cflags == []
@@ -112,6 +112,61 @@ def test_eq_hash(loader, exec_ctx):
     assert hash(case1) != hash(case0)
 
 
+def test_lazy_check_copy(loader, exec_ctx):
+    checks = loader.load_all()
+    cases = executors.generate_testcases(checks)
+    dependency.build_deps(cases)
+    case0 = find_case('Test0', 'e0', cases)
+    case1 = find_case('Test0', 'e1', cases)
+
+    # Partitions and environments are shared with the runtime
+    assert case0.partition in rt.runtime().system.partitions
+    assert case0.environ in case0.partition.environs
+    assert case0.partition is case1.partition
+    assert case0.check_orig is case1.check_orig
+
+    # The check is copied on first access and only once
+    check = case0.check
+    assert check is not case0.check_orig
+    assert check is case0.check
+    assert check is not case1.check
+
+    # Clones share the original check, but not its copy
+    case0_copy = case0.clone()
+    assert case0_copy.check_orig is case0.check_orig
+    assert case0_copy.check is not check
+
+
+def test_shared_partition_environ(loader, exec_ctx):
+    cases = executors.generate_testcases(loader.load_all())
+    case0 = find_case('Test0', 'e0', cases)
+    case1 = find_case('Test1_exact', 'e0', cases)
+    case2 = find_case('Test0', 'e1', cases)
+    assert case0.environ is case1.environ
+
+    # The partition and the environment of a test case are read-only, so
+    # that a test case cannot modify them for the others
+    with pytest.raises(AttributeError):
+        case0.environ.cflags.append('-O3')
+
+    with pytest.raises(TypeError):
+        case0.environ.variables['FOO'] = 'foo'
+
+    with pytest.raises(AttributeError):
+        case0.partition.access.append('--foo')
+
+    # Modifying the check does not affect the other test cases
+    check = case0.check
+    check.variables['FOO'] = 'foo'
+    check.build_system = 'SingleSource'
+    check.build_system.cflags = ['-O3']
+    assert case1.environ.cflags == []
+    assert 'FOO' not in case1.environ.variables
+    assert case1.partition.access == []
+    assert 'FOO' not in case2.check.variables
+    assert case2.check.build_system is None
+
+
 def test_build_deps(loader, exec_ctx):
     checks = loader.load_all()
     cases = executors.generate_testcases(checks)
@@ -438,6 +493,34 @@ def test_toposort(make_test, exec_ctx):
     cases = dependency.toposort(deps)
     assert_topological_order(cases, deps)
 
+    # Check the critical paths of the test cases
+    critical_paths = {'t0': 5, 't1': 4, 't2': 3, 't3': 2, 't4': 1,
+                      't5': 3, 't6': 1, 't7': 2, 't8': 1}
+    for c in cases:
+        assert critical_paths[c.check.name] == c.critical_path
+
+    # Check the number of the transitive dependents of the test cases
+    num_dependents = {'t0': 4, 't1': 3, 't2': 2, 't3': 1, 't4': 0,
+                      't5': 3, 't6': 0, 't7': 1, 't8': 0}
+    for c in cases:
+        assert num_dependents[c.check.name] == c.num_transitive_dependents
+
+
+def test_toposort_deep_chain(make_test, exec_ctx):
+    # A chain longer than the recursion limit, where every test depends on
+    # the next one
+    num_tests = 1500
+    tests = [make_test(f't{i}') for i in range(num_tests)]
+    for i, t in enumerate(tests[:-1]):
+        t.depends_on(f't{i+1}')
+
+    deps = dependency.build_deps(executors.generate_testcases(tests))
+    dependency.validate_deps(deps)
+    cases = dependency.toposort(deps)
+    assert [f't{i}' for i in reversed(range(num_tests))] == [
+        c.check_orig.name for c in cases[::4]
+    ]
+
 
 def test_toposort_subgraph(make_test, exec_ctx):
     #
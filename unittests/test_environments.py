@@ -210,6 +210,14 @@ class TestEnvironment(unittest.TestCase):
         with pytest.raises(AttributeError):
             prgenv.ldflags = ['-lm']
 
+        # Environments are shared among test cases, so their flags may not
+        # be modified in place
+        with pytest.raises(AttributeError):
+            prgenv.cflags.append('-O1')
+
+        with pytest.raises(AttributeError):
+            prgenv.cflags += ['-O1']
+
     @fixtures.switch_to_user_runtime
     def test_emit_load_commands(self):
         self.setup_modules_system()
@@ -237,3 +245,28 @@ class TestEnvironment(unittest.TestCase):
             'export _var3=${_var1}',
         ]
         assert expected_commands == rt.emit_loadenv_commands(self.environ)
+
+    def test_emit_load_commands_cached(self):
+        num_loads = 0
+        load_module = rt.runtime().modules_system.load_module
+
+        def _load_module(*args, **kwargs):
+            nonlocal num_loads
+            num_loads += 1
+            return load_module(*args, **kwargs)
+
+        environ = env.Environment(name='TestEnv3', modules=['testmod_foo'],
+                                  variables={'_var4': 'val4'})
+        rt.runtime().modules_system.load_module = _load_module
+        try:
+            commands = rt.emit_loadenv_commands(environ)
+            assert commands == rt.emit_loadenv_commands(environ)
+            assert 1 == num_loads
+
+            # A change in the environment of the process must not reuse the
+            # cached commands
+            os.environ['_var5'] = 'val5'
+            assert commands == rt.emit_loadenv_commands(environ)
+            assert 2 == num_loads
+        finally:
+            del rt.runtime().modules_system.load_module
@@ -3,15 +3,21 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+import concurrent.futures
+import multiprocessing
 import os
 import pytest
+import sys
 import unittest
 
 import reframe as rfm
+import reframe.utility as util
 from reframe.core.exceptions import (ConfigError, NameConflictError,
                                      ReframeDeprecationWarning,
                                      RegressionTestLoadError)
 from reframe.core.systems import System
+from reframe.frontend.check_filters import have_name, have_tag
+from reframe.frontend.discovery import CheckInfo, DiscoveryIndex
 from reframe.frontend.loader import RegressionCheckLoader
 
 
@@ -161,3 +167,139 @@ class TestRegressionCheckLoader(unittest.TestCase):
             class TestFinalDerived(TestFinal):
                 def my_new_final(self, a, b):
                     pass
+
+
+def test_load_with_index(tmp_path):
+    index_file = tmp_path / 'index.json'
+    loader = RegressionCheckLoader(['unittests/resources/checks'],
+                                   ignore_conflicts=True,
+                                   index=DiscoveryIndex(index_file))
+    checks = loader.load_all()
+    assert 11 == len(checks)
+    assert os.path.exists(index_file)
+
+    # Up to date files are not imported when listing
+    loader = RegressionCheckLoader(['unittests/resources/checks'],
+                                   ignore_conflicts=True,
+                                   index=DiscoveryIndex(index_file))
+    tests = loader.load_all(info_only=True)
+    assert sorted(c.name for c in checks) == sorted(t.name for t in tests)
+    assert all(isinstance(t, CheckInfo) for t in tests)
+
+    # Only files with selected tests are imported
+    loader = RegressionCheckLoader(['unittests/resources/checks'],
+                                   ignore_conflicts=True,
+                                   index=DiscoveryIndex(index_file))
+    checks = loader.load_all(select=lambda c: c.name == 'EmptyTest')
+    assert ['EmptyTest'] == [c.name for c in checks]
+    assert not isinstance(checks[0], CheckInfo)
+
+
+def test_index_update(tmp_path):
+    checkfile = tmp_path / 'indexed_check.py'
+    checkfile.write_text('import reframe as rfm\n\n\n'
+                         '@rfm.simple_test\n'
+                         'class IndexedTest(rfm.RunOnlyRegressionTest):\n'
+                         '    def __init__(self):\n'
+                         "        self.valid_systems = ['*']\n"
+                         "        self.tags = {'foo'}\n")
+    invalid_file = tmp_path / 'invalid_check.py'
+    invalid_file.write_text('import os\n')
+
+    index = DiscoveryIndex(tmp_path / 'index.json')
+    loader = RegressionCheckLoader([str(tmp_path)], index=index)
+    checks = loader.load_all()
+    assert ['IndexedTest'] == [c.name for c in checks]
+
+    valid, tests = index.lookup(str(checkfile))
+    assert valid
+    assert ['IndexedTest'] == [t.name for t in tests]
+    assert {'foo'} == tests[0].tags
+    assert tests[0].supports_system('generic:default')
+    assert (False, []) == index.lookup(str(invalid_file))
+
+    # Touching the file does not invalidate its entry
+    os.utime(checkfile, ns=(0, 0))
+    assert index.lookup(str(checkfile)) is not None
+
+    checkfile.write_text('import reframe as rfm\n')
+    assert index.lookup(str(checkfile)) is None
+
+
+def test_index_dependencies(tmp_path, monkeypatch):
+    helper = tmp_path / 'indexed_deps_helper.py'
+    helper.write_text("TAGS = {'foo'}\n")
+    checkfile = tmp_path / 'indexed_deps_check.py'
+    checkfile.write_text('import reframe as rfm\n'
+                         'import indexed_deps_helper\n\n\n'
+                         '@rfm.simple_test\n'
+                         'class IndexedTest(rfm.RunOnlyRegressionTest):\n'
+                         '    def __init__(self):\n'
+                         '        self.tags = indexed_deps_helper.TAGS\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, 'indexed_deps_helper', raising=False)
+    monkeypatch.delitem(sys.modules, 'indexed_deps_check', raising=False)
+    index_file = tmp_path / 'index.json'
+    loader = RegressionCheckLoader([str(checkfile)],
+                                   index=DiscoveryIndex(index_file))
+    loader.load_all()
+
+    # Changes in the local modules used by a check file invalidate its entry
+    index = DiscoveryIndex(index_file)
+    assert index.lookup(str(checkfile)) is not None
+    helper.write_text("TAGS = {'bar'}\n")
+    assert index.lookup(str(checkfile)) is None
+
+    # Changes in the environment variables of ReFrame discard all entries
+    monkeypatch.setenv('RFM_INDEXED_VAR', 'foo')
+    loader = RegressionCheckLoader([str(checkfile)],
+                                   index=DiscoveryIndex(index_file))
+    loader.load_all()
+    assert DiscoveryIndex(index_file).lookup(str(checkfile)) is not None
+    monkeypatch.setenv('RFM_INDEXED_VAR', 'bar')
+    assert DiscoveryIndex(index_file).lookup(str(checkfile)) is None
+
+
+def test_load_parallel(tmp_path):
+    checks = RegressionCheckLoader(['unittests/resources/checks'],
+                                   ignore_conflicts=True).load_all()
+    loader = RegressionCheckLoader(['unittests/resources/checks'],
+                                   ignore_conflicts=True, list_workers=2)
+    tests = loader.load_all(info_only=True)
+    assert [c.name for c in checks] == [t.name for t in tests]
+    assert all(isinstance(t, CheckInfo) for t in tests)
+
+    # Name conflicts are still detected
+    loader = RegressionCheckLoader(['unittests/resources/checks'],
+                                   recurse=True, list_workers=2)
+    with pytest.raises(NameConflictError):
+        loader.load_all(info_only=True)
+
+
+def test_load_parallel_no_fork(monkeypatch):
+    checks = RegressionCheckLoader(['unittests/resources/checks'],
+                                   ignore_conflicts=True).load_all()
+    monkeypatch.setattr(multiprocessing, 'get_all_start_methods',
+                        lambda: ['spawn'])
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', None)
+    loader = RegressionCheckLoader(['unittests/resources/checks'],
+                                   ignore_conflicts=True, list_workers=2)
+    tests = loader.load_all(info_only=True)
+    assert [c.name for c in checks] == [t.name for t in tests]
+
+
+def test_select_before_instantiation():
+    testfile = 'unittests/resources/checks_unlisted/class_decls.py'
+    module = util.import_module_from_file(testfile)
+    module.DeclaredTest.num_instances = 0
+    loader = RegressionCheckLoader([testfile])
+    checks = loader.load_all(select=have_name('DeclaredTest_42|Renamed'))
+    assert ['DeclaredTest_42', 'RenamedTest'] == [c.name for c in checks]
+    assert {'declared', 'variant42'} == checks[0].tags
+    assert ['*'] == checks[0].valid_systems
+    assert 1 == module.DeclaredTest.num_instances
+
+    # Tests are selected by their class-level tags
+    loader = RegressionCheckLoader([testfile])
+    checks = loader.load_all(select=have_tag('foo'))
+    assert ['RenamedTest'] == [c.name for c in checks]
@@ -306,6 +306,87 @@ def test_multiple_handlers(temp_runtime, logfile):
     assert len(rlog.getlogger().logger.handlers) == 3
 
 
+def test_async_handler(temp_runtime, logfile):
+    runtime = temp_runtime({
+        'level': 'info',
+        'handlers': [
+            {'type': 'file', 'name': logfile, 'async': True},
+        ],
+        'handlers_perflog': [
+            {'type': 'filelog', 'prefix': '%(check_system)s'}
+        ]
+    })
+    next(runtime)
+    rlog.configure_logging(rt.runtime().site_config)
+    handler, = rlog.getlogger().logger.handlers
+    assert isinstance(handler, rlog.AsyncHandler)
+    assert isinstance(handler.target, logging.FileHandler)
+
+    # Handlers are not asynchronous by default
+    perf_handler, = rlog.getperflogger(None).logger.handlers
+    assert isinstance(perf_handler, rlog.MultiFileHandler)
+
+    rlog.getlogger().inc_verbosity(1)
+    assert rlog.VERBOSE == handler.level
+    assert rlog.VERBOSE == handler.target.level
+
+    rlog.getlogger().warning('foo')
+    assert _found_in_logfile('foo', logfile)
+
+
+class _RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.buffer = []
+
+    def emit(self, record):
+        self.buffer.append(record)
+
+
+def test_async_handler_stop():
+    target = _RecordingHandler()
+    handler = rlog.AsyncHandler(target, maxsize=4, batch_size=2)
+    logger = rlog.Logger('reframe')
+    logger.addHandler(handler)
+    for i in range(100):
+        logger.info(f'message {i}')
+
+    handler.flush()
+    assert [f'message {i}' for i in range(100)] == [
+        r.getMessage() for r in target.buffer
+    ]
+
+    # Records logged after stopping the handler are handled immediately
+    handler.stop()
+    logger.info('message 100')
+    assert 'message 100' == target.buffer[-1].getMessage()
+    handler.close()
+
+
+@pytest.mark.skipif(not hasattr(os, 'register_at_fork'),
+                    reason='fork handlers are not supported')
+def test_async_handler_fork(logfile):
+    target = logging.FileHandler(logfile)
+    handler = rlog.AsyncHandler(target)
+    logger = rlog.Logger('reframe')
+    logger.addHandler(handler)
+    logger.info('parent')
+    handler.flush()
+    pid = os.fork()
+    if pid == 0:
+        # The background thread does not exist in the child
+        try:
+            logger.info('child')
+            handler.flush()
+        finally:
+            os._exit(0)
+
+    os.waitpid(pid, 0)
+    handler.close()
+    with open(logfile) as fp:
+        assert ['parent', 'child'] == fp.read().split()
+
+
 def test_file_handler_timestamp(temp_runtime, logfile):
     runtime = temp_runtime({
         'level': 'info',
@@ -3,10 +3,13 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+import concurrent.futures
 import os
 import pathlib
 import pytest
 import re
+import subprocess
+import sys
 
 import reframe as rfm
 import reframe.core.runtime as rt
@@ -77,6 +80,21 @@ def local_exec_ctx(generic_system):
     yield partition, environ
 
 
+@pytest.fixture
+def build_cache_system(temp_runtime, tmp_path):
+    yield from temp_runtime(
+        fixtures.TEST_CONFIG_FILE, 'generic',
+        {'general/build_cache_dir': str(tmp_path / 'build_cache')}
+    )
+
+
+@pytest.fixture
+def build_cache_exec_ctx(build_cache_system):
+    partition = fixtures.partition_by_name('default')
+    environ = fixtures.environment_by_name('builtin-gcc', partition)
+    yield partition, environ
+
+
 @pytest.fixture
 def local_user_exec_ctx(user_system):
     partition = fixtures.partition_by_scheduler('local')
@@ -146,6 +164,32 @@ def container_local_exec_ctx(local_user_exec_ctx):
     return _container_exec_ctx
 
 
+def test_lazy_names():
+    import reframe.core.decorators as decorators
+    import reframe.core.pipeline as pipeline
+
+    for mod in (pipeline, decorators):
+        for name in mod.__all__:
+            assert name in rfm.__all__
+            assert name in dir(rfm)
+            assert getattr(rfm, name) is getattr(mod, name)
+
+    with pytest.raises(AttributeError):
+        rfm.foo
+
+
+@pytest.mark.skipif(sys.version_info[:2] < (3, 7),
+                    reason='lazy imports require Python 3.7')
+def test_import_reframe_lazily():
+    completed = subprocess.run(
+        [sys.executable, '-c',
+         'import sys; import reframe; '
+         'print("reframe.core.pipeline" in sys.modules)'],
+        stdout=subprocess.PIPE, universal_newlines=True, check=True
+    )
+    assert completed.stdout.strip() == 'False'
+
+
 def test_environ_setup(hellotest, local_exec_ctx):
     # Use test environment for the regression check
     hellotest.variables = {'_FOO_': '1', '_BAR_': '2'}
@@ -185,6 +229,127 @@ def test_hellocheck_local(hellotest, local_exec_ctx):
         assert os.path.exists(os.path.join(hellotest.outputdir, f))
 
 
+def test_hellocheck_build_cache(build_cache_exec_ctx, tmp_path):
+    cache_dir = tmp_path / 'build_cache'
+    partition, environ = build_cache_exec_ctx
+    test = load_test('unittests/resources/checks/hellocheck.py')[0]
+    test.local = True
+    _run(test, partition, environ)
+    assert len(os.listdir(cache_dir)) == 1
+
+    # The build artifacts must be restored from the cache this time
+    test = load_test('unittests/resources/checks/hellocheck.py')[0]
+    test.local = True
+    test.setup(partition, environ)
+    test.compile()
+    assert test.compile_complete()
+    assert test.build_job.jobid is None
+    test.compile_wait()
+    test.run()
+    test.wait()
+    test.check_sanity()
+    test.cleanup(remove_files=True)
+    assert len(os.listdir(cache_dir)) == 1
+
+    # A change in the build commands must invalidate the cache
+    test = load_test('unittests/resources/checks/hellocheck.py')[0]
+    test.local = True
+    test.prebuild_cmds = ['touch prebuild']
+    _run(test, partition, environ)
+    assert len(os.listdir(cache_dir)) == 2
+
+    # So must a change in the modules that the test's modules resolve to
+    modules_system = rt.runtime().modules_system
+    for version in ('1.0', '2.0', '1.0'):
+        modules_system.module_map = {'foo': [f'foo/{version}']}
+        test = load_test('unittests/resources/checks/hellocheck.py')[0]
+        test.local = True
+        test.modules = ['foo']
+        _run(test, partition, environ)
+
+    assert len(os.listdir(cache_dir)) == 4
+
+
+def test_compile_only_build_cache(build_cache_exec_ctx, tmp_path):
+    @fixtures.custom_prefix('unittests/resources/checks')
+    class MyTest(rfm.CompileOnlyRegressionTest):
+        def __init__(self):
+            self.sourcepath = 'hello.c'
+            self.executable = './hello'
+            self.valid_prog_environs = ['*']
+            self.valid_systems = ['*']
+            self.sanity_patterns = sn.assert_not_found(r'(?i)error',
+                                                       self.stderr)
+
+    # Compile-only tests check their build output, so they are never
+    # restored from the cache
+    for _ in range(2):
+        test = MyTest()
+        test.setup(*build_cache_exec_ctx)
+        test.compile()
+        assert test.build_job.jobid is not None
+        test.compile_wait()
+        test.check_sanity()
+
+    assert not os.path.exists(tmp_path / 'build_cache')
+
+
+def test_hellocheck_local_keep_cwd(hellotest, local_exec_ctx):
+    @sn.sanity_function
+    def getcwd():
+        return os.getcwd()
+
+    @sn.sanity_function
+    def stagedir(test):
+        return test.stagedir
+
+    @sn.sanity_function
+    def stagedir_patt(test):
+        return r'^%s$' % re.escape(test.stagedir)
+
+    # The test must run in its stage directory without changing the current
+    # working directory of the framework; only the sanity and performance
+    # checks are evaluated inside the stage directory
+    cwd = os.getcwd()
+    hellotest.local = True
+    hellotest.prerun_cmds = ['pwd']
+    hellotest.sanity_patterns = sn.all([
+        sn.assert_eq(getcwd(), stagedir(hellotest)),
+        sn.assert_found(stagedir_patt(hellotest), hellotest.stdout)
+    ])
+    hellotest.setup(*local_exec_ctx)
+    hellotest.compile()
+    hellotest.compile_wait()
+    hellotest.run()
+    hellotest.wait()
+    assert os.getcwd() == cwd
+
+    hellotest.check_sanity()
+    assert os.getcwd() == cwd
+
+
+def test_hellocheck_sanity_worker_thread(hellotest, local_exec_ctx):
+    @sn.sanity_function
+    def getcwd():
+        return os.getcwd()
+
+    # Checks evaluated by other threads must not change the current working
+    # directory, but the sanity functions must still find the test's files
+    cwd = os.getcwd()
+    hellotest.local = True
+    hellotest.sanity_patterns = sn.all([
+        sn.assert_eq(getcwd(), cwd),
+        sn.assert_found(r'Hello, World\!', hellotest.stdout)
+    ])
+    hellotest.setup(*local_exec_ctx)
+    hellotest.compile()
+    hellotest.compile_wait()
+    hellotest.run()
+    hellotest.wait()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+        pool.submit(hellotest.check_sanity).result()
+
+
 def test_hellocheck_local_prepost_run(hellotest, local_exec_ctx):
     @sn.sanity_function
     def stagedir(test):
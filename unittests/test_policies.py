@@ -3,6 +3,8 @@
 #
 # SPDX-License-Identifier: BSD-3-Clause
 
+import concurrent.futures
+import io
 import json
 import jsonschema
 import os
@@ -18,6 +20,7 @@ import reframe.frontend.executors as executors
 import reframe.frontend.executors.policies as policies
 import reframe.utility as util
 import reframe.utility.os_ext as os_ext
+from reframe.core.backends import getscheduler
 from reframe.core.exceptions import (JobNotStartedError,
                                      ReframeForceExitError,
                                      TaskDependencyError)
@@ -35,6 +38,7 @@ from unittests.resources.checks.frontend_checks import (
     SleepCheck,
     SleepCheckPollFail,
     SleepCheckPollFailLate,
+    SleepCompileCheck,
     SystemExitCheck,
 )
 
@@ -160,6 +164,57 @@ def test_runall(make_runner, make_cases, common_exec_ctx):
     _validate_runreport(report)
 
 
+def test_runall_report_stream(make_runner, make_cases, common_exec_ctx,
+                               tmp_path):
+    from reframe.frontend.runreport import (RunReportWriter, dump_report,
+                                            load_report)
+
+    runner = make_runner()
+    report_file = tmp_path / 'report.jsonl'
+    writer = RunReportWriter(report_file, {'data_version': '1.0'})
+    runner.policy.task_listeners.append(writer)
+    runner.runall(make_cases())
+    writer.close({'data_version': '1.0', 'num_cases': 8})
+
+    report = load_report(report_file)
+    _validate_runreport(report)
+
+    # Lazily loaded reports read their test cases from the report file
+    lazy_report = load_report(report_file, lazy=True)
+    assert report == json.loads(json.dumps({
+        'session_info': lazy_report['session_info'],
+        'runs': [{**r, 'testcases': list(r['testcases'])}
+                 for r in lazy_report['runs']]
+    }))
+    assert report['runs'][0]['testcases'][-1] == (
+        lazy_report['runs'][0]['testcases'][-1]
+    )
+    fp = io.StringIO()
+    dump_report(lazy_report, fp)
+    assert json.dumps(report, indent=2) == fp.getvalue()
+    assert 8 == report['session_info']['num_cases']
+    assert 1 == len(report['runs'])
+    assert 8 == report['runs'][0]['num_cases']
+    assert 5 == report['runs'][0]['num_failures']
+    results = {(t.check.name, t.failed_stage)
+               for t in runner.stats.tasks()}
+    assert results == {(tc['name'], tc['fail_phase'])
+                       for tc in report['runs'][0]['testcases']}
+
+    # Emulate a session that was killed while writing a test case
+    with open(report_file) as fp:
+        lines = fp.readlines()
+
+    with open(report_file, 'w') as fp:
+        fp.writelines(lines[:-2])
+        fp.write(lines[-2][:10])
+
+    report = load_report(report_file)
+    _validate_runreport(report)
+    testcase_ids = {json.loads(l)['id'] for l in lines[1:-2]}
+    assert len(testcase_ids) == report['runs'][0]['num_cases']
+
+
 def test_runall_skip_system_check(make_runner, make_cases, common_exec_ctx):
     runner = make_runner()
     runner.runall(make_cases(skip_system_check=True))
@@ -200,6 +255,66 @@ def test_runall_skip_sanity_check(make_runner, make_cases, common_exec_ctx):
     assert 1 == num_failures_stage(runner, 'cleanup')
 
 
+def test_runall_sanity_workers(make_runner, make_cases, common_exec_ctx):
+    runner = make_runner()
+    runner.policy.sanity_workers = 2
+    runner.runall(make_cases())
+    stats = runner.stats
+    assert 8 == stats.num_cases()
+    assert_runall(runner)
+    assert 5 == len(stats.failures())
+    assert 2 == num_failures_stage(runner, 'setup')
+    assert 1 == num_failures_stage(runner, 'sanity')
+    assert 1 == num_failures_stage(runner, 'performance')
+    assert 1 == num_failures_stage(runner, 'cleanup')
+
+
+def test_failall_evaluating_tasks(make_cases, common_exec_ctx):
+    class _FailureCounter(executors.TaskEventListener):
+        def __init__(self):
+            self.failures = []
+
+        def on_task_setup(self, task):
+            pass
+
+        def on_task_run(self, task):
+            pass
+
+        def on_task_exit(self, task):
+            pass
+
+        def on_task_failure(self, task):
+            self.failures.append(task)
+
+        def on_task_success(self, task):
+            pass
+
+    listener = _FailureCounter()
+    policy = policies.AsynchronousExecutionPolicy()
+    failed_task, evaluated_task = (
+        executors.RegressionTask(case, [listener])
+        for case in make_cases([HelloTest(), HelloTest()])[:2]
+    )
+
+    # One evaluation failed in a worker thread, the other one succeeded
+    for task in (failed_task, evaluated_task):
+        task.hold_events()
+        future = concurrent.futures.Future()
+        future.set_result(None)
+        policy._evaluating_tasks.append((task, future))
+
+    try:
+        raise ValueError('sanity failure')
+    except ValueError:
+        failed_task.fail()
+
+    # Every task must be reported as failed exactly once
+    policy._failall(KeyboardInterrupt())
+    assert [failed_task, evaluated_task] == listener.failures
+    assert isinstance(failed_task.exc_info[1], ValueError)
+    assert evaluated_task.failed
+
+
 def test_runall_skip_performance_check(make_runner, make_cases,
                                        common_exec_ctx):
     runner = make_runner()
@@ -397,11 +512,21 @@ class _TaskEventMonitor(executors.TaskEventListener):
 
 @pytest.fixture
 def make_async_exec_ctx(temp_runtime):
-    def _make_async_exec_ctx(max_jobs):
-        yield from temp_runtime(fixtures.TEST_CONFIG_FILE, 'generic',
-                                {'systems/partitions/max_jobs': max_jobs})
+    exec_contexts = []
 
-    return _make_async_exec_ctx
+    def _make_async_exec_ctx(max_jobs, max_builds=8):
+        ctx = temp_runtime(fixtures.TEST_CONFIG_FILE, 'generic',
+                           {'systems/partitions/max_jobs': max_jobs,
+                            'systems/partitions/max_builds': max_builds})
+        exec_contexts.append(ctx)
+        return ctx
+
+    yield _make_async_exec_ctx
+
+    # Restore the runtime explicitly; if the context is kept alive, e.g., by a
+    # traceback, the garbage collector would restore it at a random point
+    for ctx in reversed(exec_contexts):
+        ctx.close()
 
 
 @pytest.fixture
@@ -503,6 +628,82 @@ def test_concurrency_limited(async_runner, make_cases, make_async_exec_ctx):
         pytest.skip('the system seems too loaded.')
 
 
+def test_concurrency_limited_priority(async_runner, make_cases,
+                                     make_async_exec_ctx):
+    ctx = make_async_exec_ctx(1)
+    next(ctx)
+
+    runner, monitor = async_runner
+    checks = [SleepCheck(.1) for i in range(3)]
+    cases = make_cases(checks)
+    runner.policy.expected_durations = {
+        (c.check.name, c.partition.fullname, c.environ.name): 100
+        for c in cases if c.check.name == checks[-1].name
+    }
+    runner.runall(cases)
+
+    assert 3 == runner.stats.num_cases()
+    assert_runall(runner)
+    assert 0 == len(runner.stats.failures())
+
+    # The first test is submitted as soon as it is set up; the test expected
+    # to run longer must be submitted before the rest
+    assert checks[-1].name == monitor.tasks[1].check.name
+
+
+def test_ready_tasks_priority(make_cases, common_exec_ctx):
+    policy = policies.AsynchronousExecutionPolicy()
+    checks = [HelloTest() for i in range(4)]
+    for i, c in enumerate(checks):
+        c.name = f'hellocheck_{i}'
+
+    cases = make_cases(checks)[:4]
+    attrs = [(1, 0, 0), (2, 1, 0), (2, 3, 0), (2, 3, 10)]
+    for case, (critical_path, num_dependents, duration) in zip(cases, attrs):
+        case.critical_path = critical_path
+        case.num_transitive_dependents = num_dependents
+        policy.expected_durations[(case.check.name, case.partition.fullname,
+                                   case.environ.name)] = duration
+
+    # Longer chains come first, then test cases blocking more test cases and
+    # then test cases expected to run longer
+    tasks = [executors.RegressionTask(c) for c in cases]
+    tasks.sort(key=policy._priority)
+    assert [cases[3], cases[2], cases[1], cases[0]] == [
+        t.testcase for t in tasks
+    ]
+
+
+def test_concurrency_pack_jobs(async_runner, make_cases, make_async_exec_ctx,
+                               monkeypatch):
+    ctx = make_async_exec_ctx(2)
+    next(ctx)
+
+    # Let the local scheduler pack all its jobs
+    packed_jobs = []
+
+    def _submit_packed(jobs):
+        packed_jobs.append((len(jobs), len(runner.policy._task_index)))
+        for job in jobs:
+            job.scheduler.submit(job)
+
+    local_sched = getscheduler('local')
+    monkeypatch.setattr(local_sched, 'packing_key', lambda self, job: 0)
+    monkeypatch.setattr(local_sched, 'submit_packed', _submit_packed)
+    runner, monitor = async_runner
+    runner.policy.pack_jobs = True
+    runner.runall(make_cases([SleepCheck(.1) for i in range(4)]))
+
+    assert 4 == runner.stats.num_cases()
+    assert_runall(runner)
+    assert 0 == len(runner.stats.failures())
+
+    # The ready test cases are submitted in batches of up to max_jobs as soon
+    # as the batch is complete, without waiting for all the test cases to be
+    # set up
+    assert (2, 2) == packed_jobs[0]
+
+
 def test_concurrency_none(async_runner, make_cases, make_async_exec_ctx):
     num_checks = 3
     ctx = make_async_exec_ctx(1)
@@ -529,6 +730,70 @@ def test_concurrency_none(async_runner, make_cases, make_async_exec_ctx):
     assert all(begin_after_end)
 
 
+def _read_build_timestamps(tasks):
+    begin_stamps = sorted(t._timestamps['compile_start'] for t in tasks)
+    end_stamps = sorted(t._timestamps['compile_wait_finish'] for t in tasks)
+    return begin_stamps, end_stamps
+
+
+def test_concurrent_builds(async_runner, make_cases, make_async_exec_ctx):
+    num_checks = 3
+    ctx = make_async_exec_ctx(num_checks)
+    next(ctx)
+
+    runner, monitor = async_runner
+    runner.runall(make_cases([SleepCompileCheck(.5)
+                              for i in range(num_checks)]))
+
+    assert num_checks == runner.stats.num_cases()
+    assert_runall(runner)
+    assert 0 == len(runner.stats.failures())
+
+    # Warn if not all tests were compiled in parallel; the corresponding
+    # strict check would be:
+    #
+    #     assert begin_stamps[-1] <= end_stamps[0]
+    #
+    begin_stamps, end_stamps = _read_build_timestamps(monitor.tasks)
+    if begin_stamps[-1] > end_stamps[0]:
+        pytest.skip('the system seems too much loaded.')
+
+
+def test_concurrent_builds_limited(async_runner, make_cases,
+                                   make_async_exec_ctx):
+    num_checks = 3
+    ctx = make_async_exec_ctx(num_checks, max_builds=1)
+    next(ctx)
+
+    runner, monitor = async_runner
+    runner.runall(make_cases([SleepCompileCheck(.2)
+                              for i in range(num_checks)]))
+
+    assert num_checks == runner.stats.num_cases()
+    assert_runall(runner)
+    assert 0 == len(runner.stats.failures())
+
+    # Ensure that a test was compiled after the previous one had finished
+    begin_stamps, end_stamps = _read_build_timestamps(monitor.tasks)
+    assert all(b > e for b, e in zip(begin_stamps[1:], end_stamps[:-1]))
+
+
+def test_compile_fail_concurrent_builds(async_runner, make_cases,
+                                        make_async_exec_ctx):
+    ctx = make_async_exec_ctx(4)
+    next(ctx)
+
+    runner, _ = async_runner
+    runner.runall(make_cases([SleepCompileCheck(.2), CompileFailureCheck(),
+                              SleepCompileCheck(.2)]))
+
+    stats = runner.stats
+    assert 3 == stats.num_cases()
+    assert_runall(runner)
+    assert 1 == len(stats.failures())
+    assert 1 == num_failures_stage(runner, 'compile_wait')
+
+
 def assert_interrupted_run(runner):
     assert 4 == runner.stats.num_cases()
     assert_runall(runner)
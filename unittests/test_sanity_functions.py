@@ -8,6 +8,7 @@ import io
 import itertools
 import os
 import pytest
+import re
 import sys
 import unittest
 
@@ -579,6 +580,19 @@ class TestUtilityFunctions(unittest.TestCase):
         assert sn.count(sn.iglob(filepatt))
         assert sn.count(sn.iglob(sn.defer(filepatt)))
 
+    def test_glob_workdir(self):
+        # Relative patterns are resolved against the working directory of the
+        # sanity functions and the matches are relative to it
+        checks_dir = os.path.abspath(TEST_RESOURCES_CHECKS)
+        expected = sorted(os.path.relpath(p, checks_dir)
+                          for p in sn.evaluate(
+                              sn.glob(os.path.join(checks_dir, '*.py'))
+                          ))
+        assert expected
+        with sn._file_cache(checks_dir):
+            assert expected == sorted(sn.evaluate(sn.glob('*.py')))
+            assert expected == sorted(sn.evaluate(sn.iglob('*.py')))
+
     def test_chain(self):
         list1 = ['A', 'B', 'C']
         list2 = ['D', 'E', 'F']
@@ -634,6 +648,96 @@ class TestPatternMatchingFunctions(unittest.TestCase):
         with pytest.raises(SanityError):
             sn.evaluate(sn.findall(r'Step: \d+', 'foo.txt'))
 
+    def test_findall_file_cache(self):
+        with sn._file_cache():
+            res = sn.evaluate(sn.findall(r'Step: \d+', self.tempfile))
+            assert 3 == len(res)
+
+            # Changes to the file are not visible inside the cache context
+            with open(self.tempfile, 'a') as fp:
+                fp.write('Step: 4\n')
+
+            res_cached = sn.evaluate(sn.findall(r'Step: \d+', self.tempfile))
+            assert 3 == len(res_cached)
+
+            # The file is scanned only once for the same pattern
+            assert all(m0 is m1 for m0, m1 in zip(res, res_cached))
+            res = sn.evaluate(sn.findall(r'Number: \d+', self.tempfile))
+            assert 3 == len(res)
+
+        res = sn.evaluate(sn.findall(r'Step: \d+', self.tempfile))
+        assert 4 == len(res)
+
+    def test_findall_mmap(self):
+        expected = sn.evaluate(sn.findall(r'Number: (\d+) (?P<y>\d+)',
+                                          self.tempfile))
+        mmap_threshold = sn._MMAP_THRESHOLD
+        sn._MMAP_THRESHOLD = 0
+        try:
+            res = sn.evaluate(sn.findall(r'Number: (\d+) (?P<y>\d+)',
+                                         self.tempfile))
+            assert len(expected) == len(res)
+            for e, m in zip(expected, res):
+                assert isinstance(m, sn._DecodedMatch)
+                assert e.group(0) == m.group(0)
+                assert e.group(1, 'y') == m.group(1, 'y')
+                assert e.groups() == m.groups()
+                assert e.groupdict() == m.groupdict()
+                assert e.span('y') == m.span('y')
+
+            with pytest.raises(IndexError):
+                res[0].group('foo')
+
+            # The matches look like the matches of the string pattern
+            assert res[0].re.pattern == r'Number: (\d+) (?P<y>\d+)'
+            assert res[0].regs == expected[0].regs
+            assert res[0].string == expected[0].string
+            assert (res[0].expand(r'\g<y>-\1\t\g<0>') ==
+                    expected[0].expand(r'\g<y>-\1\t\g<0>'))
+            with pytest.raises(re.error):
+                res[0].expand(r'\3')
+
+            # Non-ASCII compatible encodings are never memory-mapped
+            res = sn.evaluate(
+                sn.findall('Odyssey', self.utf16_file, encoding='utf-16')
+            )
+            assert 1 == len(res)
+        finally:
+            sn._MMAP_THRESHOLD = mmap_threshold
+
+    def test_findall_mmap_raw_bytes(self):
+        # Patterns are matched against the raw bytes of memory-mapped files
+        with NamedTemporaryFile('wb+', delete=False) as fp:
+            fp.write('Step: \u00e9t\u00e9 1\r\nStep: 2\r\n'.encode())
+
+        mmap_threshold = sn._MMAP_THRESHOLD
+        sn._MMAP_THRESHOLD = 0
+        try:
+            with sn._file_cache():
+                res = sn.evaluate(sn.findall(r'Step: (\S+)', fp.name))
+                assert ['\u00e9t\u00e9', '2'] == [m.group(1) for m in res]
+                assert (6, 11) == res[0].span(1)
+
+                # Character classes are ASCII-only and carriage returns are
+                # not translated
+                assert [] == sn.evaluate(sn.findall(r'Step: (\w+) ', fp.name))
+                assert [] == sn.evaluate(sn.findall(r'Step: (\d)$', fp.name))
+
+                # Undecodable groups do not fail the whole scan
+                res = sn.evaluate(sn.findall(r'Step: (.)', fp.name,
+                                             encoding='ascii'))
+                assert ['\ufffd', '2'] == [m.group(1) for m in res]
+
+                # Non-ASCII patterns read the file, but large files are never
+                # kept in the cache
+                res = sn.evaluate(sn.findall('Step: \u00e9', fp.name))
+                assert 1 == len(res)
+                assert not any(k[0] == 'file'
+                               for k in sn._cache_state.cache.keys())
+        finally:
+            sn._MMAP_THRESHOLD = mmap_threshold
+            os.remove(fp.name)
+
     def test_extractall(self):
         # Check numeric groups
         res = sn.evaluate(sn.extractall(
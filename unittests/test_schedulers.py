@@ -9,6 +9,7 @@ import os
 import pytest
 import re
 import socket
+import subprocess
 import tempfile
 import time
 import unittest
@@ -17,9 +18,12 @@ from datetime import datetime, timedelta
 import reframe.core.runtime as rt
 import reframe.utility.os_ext as os_ext
 import unittests.fixtures as fixtures
+import reframe.core.schedulers as sched
+import reframe.core.schedulers.slurm as slurm
 from reframe.core.backends import (getlauncher, getscheduler)
 from reframe.core.environments import Environment
-from reframe.core.exceptions import JobError, JobNotStartedError
+from reframe.core.exceptions import (JobBlockedError, JobError,
+                                     JobNotStartedError)
 from reframe.core.launchers.local import LocalLauncher
 from reframe.core.schedulers import Job
 from reframe.core.schedulers.slurm import _SlurmNode, _create_nodes
@@ -74,6 +78,9 @@ def exec_ctx(temp_runtime, scheduler):
         partition = fixtures.partition_by_scheduler(scheduler.registered_name)
 
     if partition is None:
+        # Restore the runtime now; the skip exception would keep the
+        # generator alive and the runtime would be restored at a random point
+        rt.close()
         pytest.skip(
             f"scheduler '{scheduler.registered_name}' not configured"
         )
@@ -359,6 +366,32 @@ def test_poll(make_job, exec_ctx):
     minimal_job.wait()
 
 
+def test_wait_any(make_job, local_only, scheduler, launcher, tmp_path):
+    short_job = make_job()
+    long_job = Job.create(scheduler(), launcher(),
+                          name='longjob',
+                          workdir=tmp_path,
+                          script_filename=str(tmp_path / 'longjob.sh'),
+                          stdout=str(tmp_path / 'longjob.out'),
+                          stderr=str(tmp_path / 'longjob.err'))
+    prepare_job(short_job, 'sleep 1')
+    prepare_job(long_job, 'sleep 5')
+    t_wait = datetime.now()
+    short_job.submit()
+    long_job.submit()
+    sched.wait_any([short_job, long_job], 10)
+    t_wait = datetime.now() - t_wait
+    if short_job.scheduler.completion_fd(short_job) is None:
+        pytest.skip('process file descriptors are not supported')
+
+    assert t_wait.total_seconds() < 5
+    assert short_job.finished()
+    assert not long_job.finished()
+    short_job.wait()
+    long_job.cancel()
+    assert short_job.scheduler.completion_fd(short_job) is None
+
+
 def test_poll_before_submit(minimal_job):
     prepare_job(minimal_job, 'sleep 3')
     with pytest.raises(JobNotStartedError):
@@ -1089,3 +1122,265 @@ def test_slurm_node_is_down(slurm_node_allocated,
     assert not slurm_node_allocated.is_down()
     assert not slurm_node_idle.is_down()
     assert slurm_node_nopart.is_down()
+
+
+@pytest.fixture
+def slurm_commands(monkeypatch):
+    # Record the Slurm commands issued and fake their output
+    commands = []
+    outputs = {
+        'sacct': ('1|COMPLETED|0:0|None assigned\n'
+                  '1.batch|COMPLETED|0:0|None assigned\n'
+                  '2_0|PENDING|0:0|None assigned\n'
+                  '2_1|PENDING|0:0|None assigned\n'
+                  '3|PENDING|0:0|None assigned\n'
+                  '5_0|COMPLETED|0:0|None assigned\n'
+                  '5_0.batch|COMPLETED|0:0|None assigned\n'
+                  '5_[1-2]|PENDING|0:0|None assigned\n'),
+        'squeue': '2|Priority\n2|Priority\n3|PartitionDown\n',
+        'sbatch': 'Submitted batch job 5\n',
+        'salloc': 'salloc: Granted job allocation 7\n'
+    }
+
+    def _run_strict(cmd, **kwargs):
+        commands.append(cmd)
+        stdout = outputs.get(cmd.split()[0], '')
+        return subprocess.CompletedProcess(cmd, 0, stdout=stdout, stderr='')
+
+    monkeypatch.setattr(slurm, '_run_strict', _run_strict)
+    monkeypatch.setattr(slurm.SlurmJobScheduler, '_get_nodes_by_name',
+                        lambda self, nodespec: set())
+    return commands
+
+
+@pytest.fixture
+def make_slurm_jobs(tmp_path):
+    def _make_slurm_jobs(num_jobs):
+        ret = []
+        for i in range(1, num_jobs + 1):
+            job = Job.create(getscheduler('slurm')(), getlauncher('local')(),
+                             name=f'testjob{i}', workdir=tmp_path)
+            job.jobid = i
+            job.scheduler._submit_time = datetime.now()
+            ret.append(job)
+
+        return ret
+
+    return _make_slurm_jobs
+
+
+def test_slurm_poll_jobs(make_slurm_jobs, slurm_commands):
+    jobs = make_slurm_jobs(3)
+    sched.poll_jobs(jobs)
+    assert len(slurm_commands) == 1
+    assert '-j 1,2,3' in slurm_commands[0]
+
+    # The job states must be set from the batched poll
+    assert jobs[0].finished()
+    assert jobs[0].exitcode == 0
+    assert not jobs[1].finished()
+    assert jobs[1].state == 'PENDING,PENDING'
+    assert not jobs[2].finished()
+    assert len(slurm_commands) == 1
+
+    # Without a batched poll, the job is polled separately
+    assert not jobs[2].finished()
+    assert len(slurm_commands) == 2
+    assert '-j 3' in slurm_commands[1]
+
+
+def test_slurm_poll_jobs_blocked(make_slurm_jobs, slurm_commands):
+    jobs = make_slurm_jobs(3)
+    for j in jobs:
+        j.scheduler._update_state_count = j.scheduler.SACCT_SQUEUE_RATIO - 1
+
+    sched.poll_jobs(jobs)
+
+    # Blocking reasons are retrieved with a single squeue for the pending
+    # jobs only
+    assert len(slurm_commands) == 2
+    assert '-j 2,3' in slurm_commands[1]
+    assert not jobs[1].finished()
+    with pytest.raises(JobBlockedError):
+        jobs[2].finished()
+
+    assert slurm_commands[-1] == 'scancel 3'
+
+
+def test_slurm_pack_jobs(tmp_path, slurm_commands, monkeypatch):
+    stage_prefix = tmp_path / 'stage'
+    monkeypatch.setattr(type(rt.runtime()), 'stage_prefix',
+                        property(lambda self: str(stage_prefix)))
+
+    # Keep a copy of the array script, since it is removed after submission
+    scripts = []
+    run_strict = slurm._run_strict
+
+    def _run_strict(cmd, **kwargs):
+        if cmd.startswith('sbatch') and 'rfm_array_' in cmd:
+            with open(cmd.split()[-1]) as fp:
+                scripts.append(fp.read())
+
+        return run_strict(cmd, **kwargs)
+
+    monkeypatch.setattr(slurm, '_run_strict', _run_strict)
+    jobs = []
+    for i in range(4):
+        workdir = tmp_path / f'test{i}'
+        workdir.mkdir()
+        job = Job.create(getscheduler('slurm')(), getlauncher('local')(),
+                         name=f'testjob{i}', workdir=str(workdir),
+                         sched_partition='foo')
+        jobs.append(job)
+
+    # This job spans multiple nodes, so it may not be packed
+    jobs[3].num_tasks = 4
+    jobs[3].num_tasks_per_node = 2
+    with sched.pack_jobs():
+        for job in jobs:
+            job.submit()
+
+        assert len(slurm_commands) == 1
+        assert all(job.jobid is None for job in jobs[:3])
+
+    # The jobs of the job array are submitted when the context exits
+    assert len(slurm_commands) == 2
+    assert re.match(rf'sbatch {stage_prefix}/rfm_array_\S+\.sh',
+                    slurm_commands[1])
+    assert len(scripts) == 1
+    script = scripts[0]
+    assert not list(stage_prefix.glob('rfm_array_*.sh'))
+    assert f'#SBATCH --output={stage_prefix}/rfm_array_' in script
+    assert '/dev/null' not in script
+    assert '#SBATCH --array=0-2' in script
+    assert '#SBATCH --partition=foo' in script
+    for i in range(3):
+        assert (f'{i}) exec >{tmp_path}/test{i}/{jobs[i].stdout} '
+                f'2>{tmp_path}/test{i}/{jobs[i].stderr}; '
+                f'cd {tmp_path}/test{i} && ') in script
+        assert jobs[i].jobid == 5
+        assert jobs[i].scheduler._array_task_id == i
+
+    # The array tasks are polled separately
+    sched.poll_jobs(jobs[:3])
+    assert '-j 5_0,5_1,5_2' in slurm_commands[-1]
+    assert jobs[0].finished()
+    assert not jobs[1].finished()
+    assert jobs[1].state == 'PENDING'
+    assert not jobs[2].finished()
+
+    jobs[2].cancel()
+    assert slurm_commands[-1] == 'scancel 5_2'
+
+
+def test_slurm_pack_jobs_submit_error(tmp_path, slurm_commands, monkeypatch):
+    def _submit_packed(jobs):
+        raise JobError('sbatch failed')
+
+    monkeypatch.setattr(slurm.SlurmJobScheduler, 'submit_packed',
+                        _submit_packed)
+    jobs = [Job.create(getscheduler('slurm')(), getlauncher('local')(),
+                       name=f'testjob{i}', workdir=str(tmp_path))
+            for i in range(2)]
+    with sched.pack_jobs():
+        for job in jobs:
+            job.submit()
+
+    for job in jobs:
+        with pytest.raises(JobError, match='job submission failed'):
+            job.finished()
+
+
+def test_slurm_allocation(tmp_path, slurm_commands):
+    allocation = slurm.SlurmAllocation('testalloc', 2, ['--partition=foo'])
+    allocation.acquire()
+    assert allocation.jobid == 7
+    assert slurm_commands[-1] == ('salloc --no-shell --job-name=testalloc '
+                                  '--nodes=2 --partition=foo')
+
+    # Only jobs of the Slurm backends run inside the allocation
+    job = Job.create(getscheduler('local')(), getlauncher('local')(),
+                     name='localjob', sched_allocation=allocation)
+    assert type(job.scheduler) == getscheduler('local')
+
+    job = Job.create(getscheduler('slurm')(), getlauncher('local')(),
+                     name='testjob', workdir=str(tmp_path),
+                     sched_allocation=allocation)
+    job.num_tasks = 4
+    job.num_tasks_per_node = 2
+    job.num_cpus_per_task = 3
+    prepare_job(job, command='echo $SLURM_JOB_ID $SLURM_NTASKS '
+                             '$SLURM_NNODES $SLURM_CPUS_PER_TASK')
+    with open(os.path.join(job.workdir, job.script_filename)) as fp:
+        assert '#SBATCH' not in fp.read()
+
+    # The job script runs locally and the parallel launch picks up the
+    # allocation from the environment
+    job.submit()
+    job.wait()
+    assert job.exitcode == 0
+    assert job.nodelist is None
+    with open(os.path.join(job.workdir, job.stdout)) as fp:
+        assert '7 4 2 3' in fp.read()
+
+    allocation.release()
+    assert slurm_commands[-1] == 'scancel 7'
+    assert allocation.jobid is None
+
+    # Jobs may not run inside a released allocation
+    with pytest.raises(JobError):
+        job.submit()
+
+
+def test_slurm_allocation_num_nodes(tmp_path, slurm_commands):
+    allocation = slurm.SlurmAllocation('testalloc', 2)
+    allocation.acquire()
+    job = Job.create(getscheduler('slurm')(), getlauncher('local')(),
+                     name='testjob', workdir=str(tmp_path),
+                     sched_allocation=allocation)
+
+    # Partially filled nodes count towards the number of nodes
+    job.num_tasks = 5
+    job.num_tasks_per_node = 2
+    assert 'export SLURM_NNODES=3' in job.scheduler.emit_preamble(job)
+
+
+def test_slurm_allocation_flex_alloc(tmp_path, slurm_commands, slurm_nodes,
+                                     monkeypatch):
+    run_strict = slurm._run_strict
+
+    def _run_strict(cmd, **kwargs):
+        if cmd.startswith('scontrol show -o job'):
+            slurm_commands.append(cmd)
+            return subprocess.CompletedProcess(
+                cmd, 0, stdout='JobId=7 JobName=testalloc '
+                               'NodeList=nid0000[1-2] BatchHost=nid00001\n',
+                stderr=''
+            )
+        elif cmd.startswith('scontrol -a show -o node'):
+            slurm_commands.append(cmd)
+            return subprocess.CompletedProcess(
+                cmd, 0, stdout='\n'.join(slurm_nodes[:2]), stderr=''
+            )
+
+        return run_strict(cmd, **kwargs)
+
+    monkeypatch.setattr(slurm, '_run_strict', _run_strict)
+    allocation = slurm.SlurmAllocation('testalloc', 2)
+    job = Job.create(getscheduler('slurm')(), getlauncher('local')(),
+                     name='testjob', workdir=str(tmp_path),
+                     sched_allocation=allocation,
+                     sched_flex_alloc_nodes='all')
+    job.num_tasks = 0
+    job.num_tasks_per_node = 4
+
+    # The nodes are not known before the allocation is acquired
+    with pytest.raises(JobError, match='not acquired'):
+        prepare_job(job)
+
+    # Only the nodes of the allocation are available to the job
+    allocation.acquire()
+    prepare_job(job)
+    assert job.num_tasks == 8
+    assert slurm_commands[-2] == 'scontrol show -o job 7'
+    assert slurm_commands[-1] == 'scontrol -a show -o node nid0000[1-2]'